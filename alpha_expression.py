@@ -0,0 +1,336 @@
+"""Alpha 表达式 (FASTEXPR) 解析模块 - 表达式与语法树互相转换"""
+
+import re
+
+
+class ExpressionSyntaxError(ValueError):
+    """表达式语法错误"""
+
+
+class Node:
+    """语法树节点基类"""
+
+    def children(self):
+        return []
+
+    def to_expression(self):
+        raise NotImplementedError
+
+    def __str__(self):
+        return self.to_expression()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_expression()!r})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_expression() == other.to_expression()
+
+    def __hash__(self):
+        return hash((type(self).__name__, self.to_expression()))
+
+
+class Number(Node):
+    """数值常量"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_expression(self):
+        if isinstance(self.value, float) and self.value.is_integer():
+            return str(int(self.value)) if abs(self.value) < 1e15 else repr(self.value)
+        return repr(self.value) if isinstance(self.value, float) else str(self.value)
+
+
+class String(Node):
+    """字符串常量，例如 bucket 的 range 参数"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_expression(self):
+        return f"'{self.value}'"
+
+
+class Field(Node):
+    """数据字段或分组名称"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def to_expression(self):
+        return self.name
+
+
+class Call(Node):
+    """算子调用，kwargs 为 [(参数名, 节点)] 列表以保持顺序"""
+
+    def __init__(self, name, args, kwargs=None):
+        self.name = name
+        self.args = list(args)
+        self.kwargs = list(kwargs or [])
+
+    def children(self):
+        return self.args + [value for _, value in self.kwargs]
+
+    def to_expression(self):
+        parts = [arg.to_expression() for arg in self.args]
+        parts += [f"{key}={value.to_expression()}" for key, value in self.kwargs]
+        return f"{self.name}({', '.join(parts)})"
+
+
+class UnaryOp(Node):
+    """一元运算: -x, !x"""
+
+    def __init__(self, op, operand):
+        self.op = op
+        self.operand = operand
+
+    def children(self):
+        return [self.operand]
+
+    def to_expression(self):
+        operand = self.operand.to_expression()
+        if _precedence(self.operand) < _UNARY_PRECEDENCE:
+            operand = f"({operand})"
+        return f"{self.op}{operand}"
+
+
+class BinaryOp(Node):
+    """二元运算: 算术、比较、逻辑"""
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def children(self):
+        return [self.left, self.right]
+
+    def to_expression(self):
+        own = BINARY_PRECEDENCE[self.op]
+        left = self.left.to_expression()
+        right = self.right.to_expression()
+        if _precedence(self.left) < own:
+            left = f"({left})"
+        # 右侧同级也需括号，保证 a - (b - c) 等语义不变
+        if _precedence(self.right) <= own:
+            right = f"({right})"
+        return f"{left} {self.op} {right}"
+
+
+class Conditional(Node):
+    """三元条件: cond ? a : b"""
+
+    def __init__(self, condition, if_true, if_false):
+        self.condition = condition
+        self.if_true = if_true
+        self.if_false = if_false
+
+    def children(self):
+        return [self.condition, self.if_true, self.if_false]
+
+    def to_expression(self):
+        parts = [self.condition, self.if_true, self.if_false]
+        text = [f"({p.to_expression()})" if isinstance(p, Conditional) else p.to_expression() for p in parts]
+        return f"{text[0]} ? {text[1]} : {text[2]}"
+
+
+BINARY_PRECEDENCE = {
+    '||': 1, '&&': 2,
+    '==': 3, '!=': 3, '<': 3, '<=': 3, '>': 3, '>=': 3,
+    '+': 4, '-': 4,
+    '*': 5, '/': 5,
+    '^': 7,
+}
+_UNARY_PRECEDENCE = 6
+_ATOM_PRECEDENCE = 10
+
+
+def _precedence(node):
+    if isinstance(node, BinaryOp):
+        return BINARY_PRECEDENCE[node.op]
+    if isinstance(node, UnaryOp):
+        return _UNARY_PRECEDENCE
+    if isinstance(node, Conditional):
+        return 0
+    if isinstance(node, Number) and isinstance(node.value, (int, float)) and node.value < 0:
+        return _UNARY_PRECEDENCE
+    return _ATOM_PRECEDENCE
+
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)
+  | (?P<string>'[^']*'|"[^"]*")
+  | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+  | (?P<op>&&|\|\||==|!=|<=|>=|[-+*/^<>!?:(),=])
+""", re.VERBOSE)
+
+
+def tokenize(text):
+    """把表达式切分为 (类型, 值, 位置) 记号列表"""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_PATTERN.match(text, pos)
+        if not match:
+            raise ExpressionSyntaxError(f"无法识别的字符 {text[pos]!r} (位置 {pos})")
+        kind = match.lastgroup
+        if kind != 'space':
+            tokens.append((kind, match.group(), pos))
+        pos = match.end()
+    tokens.append(('end', '', pos))
+    return tokens
+
+
+class _Parser:
+    """递归下降解析器"""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.index = 0
+
+    def peek(self, offset=0):
+        return self.tokens[min(self.index + offset, len(self.tokens) - 1)]
+
+    def advance(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def expect(self, value):
+        kind, text, pos = self.advance()
+        if text != value:
+            raise ExpressionSyntaxError(f"期望 {value!r}，实际为 {text or '结尾'!r} (位置 {pos})")
+
+    def at_op(self, *values):
+        kind, text, _ = self.peek()
+        return kind == 'op' and text in values
+
+    def parse(self):
+        node = self.parse_conditional()
+        kind, text, pos = self.peek()
+        if kind != 'end':
+            raise ExpressionSyntaxError(f"多余的内容 {text!r} (位置 {pos})")
+        return node
+
+    def parse_conditional(self):
+        node = self.parse_binary(1)
+        if self.at_op('?'):
+            self.advance()
+            if_true = self.parse_conditional()
+            self.expect(':')
+            if_false = self.parse_conditional()
+            node = Conditional(node, if_true, if_false)
+        return node
+
+    def parse_binary(self, min_level):
+        if min_level > BINARY_PRECEDENCE['/']:
+            return self.parse_unary()
+        node = self.parse_binary(min_level + 1)
+        ops = [op for op, level in BINARY_PRECEDENCE.items() if level == min_level]
+        while self.at_op(*ops):
+            op = self.advance()[1]
+            right = self.parse_binary(min_level + 1)
+            node = BinaryOp(op, node, right)
+            if min_level == 3:  # 比较运算不可连写
+                break
+        return node
+
+    def parse_unary(self):
+        if self.at_op('-', '+', '!'):
+            op = self.advance()[1]
+            operand = self.parse_unary()
+            if op == '+':
+                return operand
+            if op == '-' and isinstance(operand, Number) and not isinstance(operand.value, str):
+                return Number(-operand.value)
+            return UnaryOp(op, operand)
+        return self.parse_power()
+
+    def parse_power(self):
+        node = self.parse_primary()
+        if self.at_op('^'):
+            self.advance()
+            node = BinaryOp('^', node, self.parse_unary())
+        return node
+
+    def parse_primary(self):
+        kind, text, pos = self.advance()
+        if kind == 'number':
+            value = float(text)
+            return Number(int(value) if value.is_integer() and not any(c in text for c in '.eE') else value)
+        if kind == 'string':
+            return String(text[1:-1])
+        if kind == 'name':
+            if self.at_op('('):
+                self.advance()
+                return self.parse_call(text)
+            return Field(text)
+        if kind == 'op' and text == '(':
+            node = self.parse_conditional()
+            self.expect(')')
+            return node
+        raise ExpressionSyntaxError(f"意外的记号 {text or '结尾'!r} (位置 {pos})")
+
+    def parse_call(self, name):
+        args, kwargs = [], []
+        if self.at_op(')'):
+            self.advance()
+            return Call(name, args, kwargs)
+
+        while True:
+            kind, text, _ = self.peek()
+            next_kind, next_text, _ = self.peek(1)
+            if kind == 'name' and next_kind == 'op' and next_text == '=':
+                self.advance()
+                self.advance()
+                kwargs.append((text, self.parse_conditional()))
+            else:
+                if kwargs:
+                    raise ExpressionSyntaxError(f"{name}: 位置参数不能出现在关键字参数之后")
+                args.append(self.parse_conditional())
+
+            if self.at_op(','):
+                self.advance()
+                continue
+            self.expect(')')
+            return Call(name, args, kwargs)
+
+
+def parse_expression(text):
+    """解析 FASTEXPR 表达式为语法树"""
+    if not text or not text.strip():
+        raise ExpressionSyntaxError("表达式为空")
+    return _Parser(text).parse()
+
+
+def walk(node):
+    """先序遍历语法树中的所有节点"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(current.children()))
+
+
+def collect_fields(node):
+    """表达式引用的所有字段名（含分组名）"""
+    return {n.name for n in walk(node) if isinstance(n, Field)}
+
+
+def collect_operators(node):
+    """表达式使用的所有算子名"""
+    return {n.name for n in walk(node) if isinstance(n, Call)}
+
+
+def tree_depth(node):
+    """语法树深度"""
+    children = node.children()
+    return 1 + (max(tree_depth(child) for child in children) if children else 0)
+
+
+def normalize_expression(text):
+    """规范化表达式文本（去除多余空格和括号），用于去重"""
+    return parse_expression(text).to_expression()
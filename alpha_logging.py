@@ -0,0 +1,92 @@
+"""运行日志模块 - 分级的 JSONL 事件日志与精简的控制台输出
+
+模拟热路径上的日志只把记录放入队列（QueueHandler），
+格式化和写入由后台线程（QueueListener）完成，不阻塞模拟线程。
+默认控制台每个事件一行；verbose 模式下输出请求/响应等调试信息，
+JSONL 文件同时保存结构化字段，便于之后用脚本分析。
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime
+
+LOG_FILE = "alpha_events.jsonl"
+LOGGER_NAME = "alpha"
+
+_listener = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON，event 与 fields 来自 log_event"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'event': getattr(record, 'event', None),
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(verbose=False, log_file=LOG_FILE):
+    """配置日志（重复调用时只调整级别），返回根日志器"""
+    global _listener
+
+    logger = logging.getLogger(LOGGER_NAME)
+    level = logging.DEBUG if verbose else logging.INFO
+    logger.setLevel(level)
+
+    if _listener is not None:
+        for handler in _listener.handlers:
+            handler.setLevel(level)
+        return logger
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    console.setLevel(level)
+
+    handlers = [console]
+    try:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(JsonLineFormatter())
+        file_handler.setLevel(level)
+        handlers.append(file_handler)
+    except OSError as e:
+        print(f"⚠️ 无法写入日志文件 {log_file}: {str(e)}")
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return logger
+
+
+def shutdown_logging():
+    """写完队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name):
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def log_event(logger, event, message, level=logging.INFO, **fields):
+    """记录一个结构化事件：控制台显示 message，JSONL 中额外保存 event 与 fields"""
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={'event': event, 'fields': fields})
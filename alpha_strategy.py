@@ -1,7 +1,46 @@
 """Alpha 策略生成模块"""
 
+from template_engine import AlphaTemplate, TemplateEngine
+
+# 多因子组合模板：ordered=True 表示字段顺序影响结果
+MULTI_FACTOR_TEMPLATES = [
+    # 1. 回归中性化
+    AlphaTemplate(
+        "regression_neut(vector_neut({f1}, {f2}), abs(ts_mean(returns, 252)/ts_std_dev(returns, 252)))",
+        ordered=True),
+    # 多重回归
+    AlphaTemplate("regression_neut(regression_neut({f1}, {f2}), ts_std_dev(returns, 30))", ordered=True),
+
+    # 2. 条件组合
+    # 条件选择
+    AlphaTemplate("if_else(rank({f1}) > 0.5, {f2}, -1 * {f2})", ordered=True),
+    # 分组组合
+    AlphaTemplate("group_neutralize({f1} * {f2}, bucket(rank(cap), range='0.1,1,0.1'))"),
+
+    # 3. 复杂信号
+    # 信号强度
+    AlphaTemplate(
+        "power(rank(group_neutralize(-ts_decay_exp_window(ts_sum(if_else({f1}-group_mean({f1},1,industry)-0.02>0,1,0)"
+        "*ts_corr({f2},cap,5),3),50),industry)),2)",
+        ordered=True),
+    # 市场状态
+    AlphaTemplate("trade_when(ts_rank(ts_std_dev(returns,10),252)<0.9, {f1} * {f2}, -1)"),
+]
+
 
 class AlphaStrategy:
+    def __init__(self, multi_factor_budget=500, sampling='stratified', field_priority=None, seed=None):
+        """
+        Args:
+            multi_factor_budget: 多因子模式最多生成的表达式数量
+            sampling: 多因子组合采样方式 random / stratified / priority
+            field_priority: {字段名: 优先级分数}，priority 采样时优先组合高分字段
+        """
+        self.multi_factor_budget = multi_factor_budget
+        self.sampling = sampling
+        self.field_priority = field_priority
+        self.seed = seed
+
     def get_simulation_data(self, datafields, mode=1):
         """根据模式生成策略列表"""
 
@@ -69,40 +108,21 @@ class AlphaStrategy:
 
         return strategies
 
-    def generate_multi_factor_strategy(self, datafields):
-        """生成多因子组合策略"""
-
-        strategies = []
-        n = len(datafields)
-
-        for i in range(0, n-1, 2):
-            field1 = datafields[i]
-            field2 = datafields[i+1]
-
-            # 1. 回归中性化
-            strategies.extend([
-                f"regression_neut(vector_neut({field1}, {field2}), abs(ts_mean(returns, 252)/ts_std_dev(returns, 252)))",
-
-                # 多重回归
-                f"regression_neut(regression_neut({field1}, {field2}), ts_std_dev(returns, 30))"
-            ])
+    def generate_multi_factor_strategy(self, datafields, templates=None):
+        """生成多因子组合策略
 
-            # 2. 条件组合
-            strategies.extend([
-                # 条件选择
-                f"if_else(rank({field1}) > 0.5, {field2}, -1 * {field2})",
+        在所有字段两两组合（而不只是相邻字段）上按模板惰性枚举，
+        候选数超过预算时按 self.sampling 采样。
+        """
 
-                # 分组组合
-                f"group_neutralize({field1} * {field2}, bucket(rank(cap), range='0.1,1,0.1'))"
-            ])
+        engine = TemplateEngine(
+            templates or MULTI_FACTOR_TEMPLATES, datafields,
+            field_priority=self.field_priority, seed=self.seed
+        )
+        total = engine.total_candidates()
+        strategies = list(engine.generate(self.multi_factor_budget, self.sampling))
 
-            # 3. 复杂信号
-            strategies.extend([
-                # 信号强度
-                f"power(rank(group_neutralize(-ts_decay_exp_window(ts_sum(if_else({field1}-group_mean({field1},1,industry)-0.02>0,1,0)*ts_corr({field2},cap,5),3),50),industry)),2)",
-
-                # 市场状态
-                f"trade_when(ts_rank(ts_std_dev(returns,10),252)<0.9, {field1} * {field2}, -1)"
-            ])
+        if len(strategies) < total:
+            print(f"多因子组合共 {total} 个，按 {self.sampling} 采样 {len(strategies)} 个")
 
         return strategies
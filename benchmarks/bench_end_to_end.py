@@ -0,0 +1,153 @@
+"""端到端吞吐基准：用本地模拟 Brain API 运行真实的客户端代码，比较各执行模式
+
+模式：
+    sequential   顺序模拟（simulate_alphas 的默认路径，含固定等待）
+    concurrent   线程池并发模拟（进化搜索 / 爬山使用的路径）
+    submission   调度器并发提交
+    datafields   数据字段分页获取（不使用字段目录缓存）
+
+每个模式在独立子进程和临时目录中运行，分别统计吞吐（次/小时）、p50/p99 延迟和峰值内存。
+
+用法: python benchmarks/bench_end_to_end.py [--modes sequential,concurrent] [--count 24] [--workers 8]
+                                         [--sim-median 2] [--rate-limit 0.05] [--failure-rate 0.1]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_brain_server import add_config_arguments, config_from_args, start_server  # noqa: E402
+
+MODES = ['sequential', 'concurrent', 'submission', 'datafields']
+RESULT_PREFIX = 'BENCH_RESULT '
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB），不支持的平台返回 0"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def build_alpha_list(brain, count):
+    alpha_list = []
+    for i in range(count):
+        expression = f"rank(ts_mean(mock_field_{i:04d}, {5 + i % 20}))"
+        params = brain.parameter_optimizer.get_optimal_parameters(expression)
+        alpha_list.append(brain._build_simulation_data(expression, params))
+    return alpha_list
+
+
+def run_mode(mode, base_url, args):
+    """在子进程中执行：返回 {'mode', 'count', 'elapsed', 'p50', 'p99', ...}"""
+    from brain_batch_alpha import BrainBatchAlpha
+
+    os.chdir(tempfile.mkdtemp(prefix=f"bench_{mode}_"))
+    with open('brain_credentials.txt', 'w') as f:
+        json.dump(['bench@example.com', 'mock'], f)
+
+    brain = BrainBatchAlpha(enable_resume=False, prescreen_threshold=None, api_base_url=base_url)
+    phase = 'simulation_total'
+
+    if mode == 'sequential':
+        count = args.sequential_count
+        alpha_list = build_alpha_list(brain, count)
+        start = time.monotonic()
+        brain._run_simulations(alpha_list, max_workers=1)
+    elif mode == 'concurrent':
+        count = args.count
+        alpha_list = build_alpha_list(brain, count)
+        start = time.monotonic()
+        brain._run_simulations(alpha_list, max_workers=args.workers)
+    elif mode == 'submission':
+        # 先并发模拟得到 Alpha ID（不计时），再只测提交
+        outcomes = brain._run_simulations(build_alpha_list(brain, args.count), max_workers=args.workers)
+        alpha_ids = [result['alpha_id'] for result in outcomes if result]
+        count = len(alpha_ids)
+        phase = 'submit_total'
+        start = time.monotonic()
+        brain.submit_multiple_alphas(alpha_ids, check_correlation=False, max_concurrent=args.workers)
+    else:
+        count = args.count
+        phase = 'datafields_fetch'
+        start = time.monotonic()
+        for _ in range(count):
+            # 清空字段目录缓存，每次都完整分页请求（测的是分页吞吐，不是缓存命中）
+            brain.field_catalog.entries.clear()
+            with brain.metrics.timer(phase):
+                brain._get_datafields_if_none(dataset_name='fundamental6')
+
+    elapsed = time.monotonic() - start
+    counters = brain.metrics.counters
+    if mode == 'submission':
+        failed = counters.get('submissions_total', 0) - counters.get('submissions_succeeded', 0)
+    else:
+        failed = counters.get('simulations_failed', 0)
+    histogram = brain.metrics.histograms.get(phase)
+    return {
+        'mode': mode,
+        'count': count,
+        'elapsed': elapsed,
+        'per_hour': count / max(elapsed, 1e-9) * 3600,
+        'p50': histogram.percentile(50) if histogram else 0.0,
+        'p99': histogram.percentile(99) if histogram else 0.0,
+        'failed': failed,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端吞吐基准（本地模拟 Brain API）")
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--count', type=int, default=24, help="并发/提交/数据字段模式的任务数")
+    parser.add_argument('--sequential-count', type=int, default=4, help="顺序模式的模拟数（含固定等待，较慢）")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--run-mode', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        result = run_mode(args.run_mode, args.base_url, args)
+        print(RESULT_PREFIX + json.dumps(result), flush=True)
+        return
+
+    server, base_url = start_server(config_from_args(args))
+    print(f"模拟 Brain API: {base_url}")
+
+    results = []
+    for mode in [mode.strip() for mode in args.modes.split(',') if mode.strip()]:
+        if mode not in MODES:
+            print(f"⚠️ 未知模式: {mode}")
+            continue
+        print(f"运行模式 {mode} ...", flush=True)
+        command = [sys.executable, os.path.abspath(__file__), '--run-mode', mode, '--base-url', base_url]
+        command += sys.argv[1:]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        lines = [line for line in completed.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+        if completed.returncode != 0 or not lines:
+            print(f"❌ 模式 {mode} 运行失败:\n{completed.stderr[-2000:]}")
+            continue
+        results.append(json.loads(lines[-1][len(RESULT_PREFIX):]))
+
+    server.shutdown()
+    print(f"\n{'模式':<12}{'任务数':>8}{'耗时':>10}{'次/小时':>12}{'p50':>9}{'p99':>9}{'失败':>6}{'峰值内存':>12}")
+    print("-" * 80)
+    for r in results:
+        print(f"{r['mode']:<12}{r['count']:>8}{r['elapsed']:>9.1f}s{r['per_hour']:>12.0f}"
+              f"{r['p50']:>8.2f}s{r['p99']:>8.2f}s{r['failed']:>6}{r['peak_rss_mb']:>10.1f}MB")
+    print(f"\n服务器请求统计: {server.state.counts}")
+
+
+if __name__ == "__main__":
+    main()
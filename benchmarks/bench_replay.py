@@ -0,0 +1,111 @@
+"""录制回放基准：离线重跑同一次运行，比较不同版本客户端的耗时、请求数和 CPU 时间
+
+运行内容（固定的表达式列表和模拟参数，保证每次请求一致）：获取数据字段 -> 并发模拟 -> 提交合格 Alpha。
+
+用法: python benchmarks/bench_replay.py --cassette run.jsonl.gz --record-mock     # 用本地模拟 API 录制
+      python benchmarks/bench_replay.py --cassette run.jsonl.gz [--time-scale 0.1] [--save current.json]
+                                        [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brain_batch_alpha import BrainBatchAlpha  # noqa: E402
+from http_cassette import summarize_cassette  # noqa: E402
+from mock_brain_server import start_server  # noqa: E402
+
+# 固定模拟参数：参数优化器按后验随机抽样，每次运行的请求体都不同，无法与录制匹配
+BENCH_SETTINGS = {'universe': 'TOP3000', 'neutralization': 'SUBINDUSTRY', 'decay': 6, 'truncation': 0.08}
+
+
+def run_campaign(brain, args):
+    datafields = brain._get_datafields_if_none(dataset_name=args.dataset) or []
+    alpha_list = []
+    for i, field in enumerate(datafields[:args.count]):
+        expression = f"rank(ts_mean({field}, {5 + i % 20}))"
+        expr_type = brain.parameter_optimizer.analyze_expression_type(expression)
+        params = dict(BENCH_SETTINGS, expression_type=expr_type)
+        alpha_list.append(brain._build_simulation_data(expression, params))
+    outcomes = brain._run_simulations(alpha_list, max_workers=args.workers)
+    qualified = [result['alpha_id'] for result in outcomes if result and result.get('passed_all_checks')]
+    if qualified:
+        brain.submit_multiple_alphas(qualified, check_correlation=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制回放基准")
+    parser.add_argument('--cassette', required=True)
+    parser.add_argument('--record-mock', action='store_true', help="先用本地模拟 API 录制 cassette")
+    parser.add_argument('--time-scale', type=float, default=1.0, help="回放等待时间倍数")
+    parser.add_argument('--dataset', default='fundamental6')
+    parser.add_argument('--count', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--save', help="把本次结果保存为 JSON")
+    parser.add_argument('--compare', help="与之前保存的结果对比")
+    args = parser.parse_args()
+
+    cassette = os.path.abspath(args.cassette)
+    save = os.path.abspath(args.save) if args.save else None
+    compare = os.path.abspath(args.compare) if args.compare else None
+    os.chdir(tempfile.mkdtemp(prefix="bench_replay_"))
+    with open('brain_credentials.txt', 'w') as f:
+        json.dump(['bench@example.com', 'replay'], f)
+
+    if args.record_mock:
+        server, base_url = start_server({'sim_median': 1.0, 'retry_after': 0.5})
+        brain = BrainBatchAlpha(enable_resume=False, prescreen_threshold=None, api_base_url=base_url,
+                                record_cassette=cassette)
+        run_campaign(brain, args)
+        brain.cassette.close()
+        server.shutdown()
+        print(f"\n已录制: {cassette}")
+        return
+
+    recorded = summarize_cassette(cassette)
+    brain = BrainBatchAlpha(enable_resume=False, prescreen_threshold=None,
+                            replay_cassette=cassette, replay_time_scale=args.time_scale)
+    wall_start, cpu_start = time.monotonic(), time.process_time()
+    run_campaign(brain, args)
+    report = brain.cassette.report()
+    result = {
+        'wall_seconds': time.monotonic() - wall_start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'requests': report['served'] + report['misses'],
+        'unrecorded_requests': report['misses'],
+        'mismatched_requests': report['mismatches'],
+        'simulations': brain.metrics.counters.get('simulations_total', 0),
+        'time_scale': args.time_scale,
+    }
+
+    print(f"\n录制: {recorded['requests']} 个请求, 时长 {recorded['duration']:.1f} 秒")
+    print(f"回放: {result['requests']} 个请求 (未录制 {result['unrecorded_requests']} 个, "
+          f"请求体不匹配 {result['mismatched_requests']} 个), "
+          f"耗时 {result['wall_seconds']:.1f} 秒, CPU {result['cpu_seconds']:.2f} 秒")
+    if report['missed_requests']:
+        print(f"未录制的请求示例: {report['missed_requests'][:5]}")
+    if report['mismatched_requests']:
+        print(f"⚠️ 回放偏离录制，结果不可信。请求体不匹配示例: {report['mismatched_requests'][:5]}")
+
+    if compare:
+        with open(compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n{'指标':<22}{'基准':>12}{'本次':>12}{'变化':>10}")
+        for key in ('wall_seconds', 'cpu_seconds', 'requests', 'simulations'):
+            before, after = baseline.get(key, 0), result[key]
+            change = f"{(after - before) / before * 100:+.1f}%" if before else 'N/A'
+            print(f"{key:<22}{before:>12.2f}{after:>12.2f}{change:>10}")
+
+    if save:
+        with open(save, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""离线重新评判基准：合成大量模拟结果，测量读取与向量化评判耗时，并与逐条评判对比
+
+用法: python benchmarks/bench_requalify.py [--rows 300000] [--seed 7]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qualification_rules import (DEFAULT_THRESHOLDS, extract_metrics,  # noqa: E402
+                                 qualification_score, requalify)
+from result_store import ResultStore  # noqa: E402
+
+
+def synthetic_result(rng, i):
+    limit = 0.8
+    subuniverse = rng.gauss(1.0, 0.5)
+    checks = [{'name': 'LOW_SUB_UNIVERSE_SHARPE', 'value': subuniverse, 'limit': limit,
+               'result': 'PASS' if subuniverse >= limit else 'FAIL'}]
+    if rng.random() < 0.05:
+        checks.append({'name': 'CONCENTRATED_WEIGHT', 'result': 'FAIL'})
+    return {
+        'alpha_id': f"A{i:07d}",
+        'expression': f"rank(field_{i % 500})",
+        'expression_type': rng.choice(['momentum', 'volume', 'fundamental']),
+        'parameters': {'universe': 'TOP3000', 'neutralization': 'SECTOR', 'decay': rng.randint(0, 20),
+                       'truncation': 0.08},
+        'metrics': {'sharpe': rng.gauss(1.0, 0.5), 'fitness': rng.gauss(0.7, 0.4),
+                    'turnover': rng.uniform(0.0, 1.2), 'margin': rng.gauss(0.02, 0.01), 'checks': checks},
+        'passed_all_checks': False,
+        'timestamp': '2025-01-01 00:00:00',
+    }
+
+
+def scalar_qualified(result, thresholds):
+    """与 check_alpha_qualification 相同的逐条判定"""
+    m = extract_metrics(result['metrics'])
+    return (m['sharpe'] >= thresholds['sharpe'] and m['fitness'] >= thresholds['fitness'] and
+            thresholds['turnover_min'] <= m['turnover'] <= thresholds['turnover_max'] and
+            m['margin'] >= thresholds['margin'] and
+            m['subuniverse_sharpe'] >= m['required_subuniverse_sharpe'] and
+            all(c['result'] == 'PASS' for c in result['metrics']['checks']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线重新评判基准")
+    parser.add_argument('--rows', type=int, default=300000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    path = os.path.join(tempfile.mkdtemp(), 'alpha_results.jsonl')
+    store = ResultStore(path)
+    results = [synthetic_result(rng, i) for i in range(args.rows)]
+    for result in results:
+        store.append(result)
+
+    thresholds = dict(DEFAULT_THRESHOLDS, sharpe=1.25, fitness=0.8)
+
+    start = time.perf_counter()
+    frame = store.load_frame()
+    loaded = time.perf_counter()
+    ranked = requalify(frame, thresholds)
+    evaluated = time.perf_counter()
+
+    start_scalar = time.perf_counter()
+    expected = [scalar_qualified(r, thresholds) for r in results]
+    scores = [qualification_score(extract_metrics(r['metrics']), q, thresholds)
+              for r, q in zip(results, expected)]
+    scalar = time.perf_counter() - start_scalar
+
+    ordered = ranked.sort_index()
+    assert ordered['qualified'].tolist() == expected, "向量化评判与逐条评判不一致"
+    assert max(abs(a - b) for a, b in zip(ordered['score'], scores)) < 1e-9, "得分不一致"
+
+    print(f"结果条数: {args.rows}")
+    print(f"读取 JSONL:      {loaded - start:.2f} 秒")
+    print(f"向量化评判+排序: {evaluated - loaded:.3f} 秒")
+    print(f"逐条评判+评分:   {scalar:.3f} 秒")
+    print(f"合格数量: {int(ranked['qualified'].sum())}，结果一致")
+
+
+if __name__ == "__main__":
+    main()
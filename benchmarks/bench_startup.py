@@ -0,0 +1,101 @@
+"""启动基准：测量导入耗时与内存、以及从启动到出现模式选择菜单的时间
+
+每次都启动新的解释器；菜单测试使用只含认证响应的录制文件回放，不访问网络。
+
+用法: python benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT_MARKER = "请选择模式".encode('utf-8')
+HEAVY_MODULES = ['pandas', 'numpy', 'cProfile', 'tracemalloc']
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+except ImportError:
+    peak_mb = 0.0
+print(json.dumps({'seconds': elapsed, 'peak_rss_mb': peak_mb,
+                  'loaded': [name for name in %r if name in sys.modules]}))
+"""
+
+
+def measure_import():
+    completed = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT % HEAVY_MODULES],
+                               cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def peak_rss_of(pid):
+    """Linux 下读取子进程的峰值常驻内存 (VmHWM)，其他平台返回 0"""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def measure_first_prompt(work_dir, timeout=60):
+    """启动 main.py 直到输出模式选择提示，返回 (秒数, 峰值内存 MB)"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, 'main.py'), '--replay', 'auth.jsonl'],
+                               cwd=work_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+    output = b''
+    try:
+        while PROMPT_MARKER not in output:
+            chunk = os.read(process.stdout.fileno(), 65536)
+            if not chunk or time.perf_counter() - start > timeout:
+                raise RuntimeError(f"未出现模式选择提示:\n{output.decode('utf-8', 'replace')[-1000:]}")
+            output += chunk
+        elapsed = time.perf_counter() - start
+        return elapsed, peak_rss_of(process.pid)
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    with open(os.path.join(work_dir, 'brain_credentials.txt'), 'w') as f:
+        json.dump(['bench@example.com', 'startup'], f)
+    with open(os.path.join(work_dir, 'auth.jsonl'), 'w') as f:
+        f.write(json.dumps({'cassette_version': 1}) + "\n")
+        f.write(json.dumps({'method': 'POST', 'path': '/authentication', 'body_hash': None, 'status': 201,
+                            'headers': {}, 'body': '{}', 'offset': 0.0, 'elapsed': 0.0}) + "\n")
+
+    imports = [measure_import() for _ in range(args.repeat)]
+    prompts = [measure_first_prompt(work_dir) for _ in range(args.repeat)]
+
+    import_seconds = [entry['seconds'] for entry in imports]
+    prompt_seconds = [seconds for seconds, _ in prompts]
+    print(f"导入 main（{args.repeat} 次）: 中位数 {statistics.median(import_seconds) * 1000:.0f} ms, "
+          f"最小 {min(import_seconds) * 1000:.0f} ms, 峰值内存 {imports[-1]['peak_rss_mb']:.1f} MB")
+    print(f"   导入后已加载的重量级模块: {', '.join(imports[-1]['loaded']) or '无'}")
+    print(f"启动到模式选择菜单: 中位数 {statistics.median(prompt_seconds) * 1000:.0f} ms, "
+          f"最小 {min(prompt_seconds) * 1000:.0f} ms, 峰值内存 {max(rss for _, rss in prompts):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""时间序列内核微基准：O(n) 内核 vs 逐窗口重算的朴素实现
+
+用法: python benchmarks/bench_ts_kernels.py [--days 1000] [--stocks 500] [--window 252]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ts_kernels  # noqa: E402
+
+
+def _naive_window_apply(x, d, func, nan_handling, min_valid=1):
+    """逐窗口调用 func 的参考实现"""
+    out = np.full(x.shape, np.nan)
+    for t in range(d - 1, x.shape[0]):
+        window = x[t - d + 1:t + 1]
+        for col in range(x.shape[1]):
+            values = window[:, col]
+            if nan_handling == 'OFF' and np.isnan(values).any():
+                continue
+            values = values[~np.isnan(values)]
+            if len(values) >= min_valid:
+                out[t, col] = func(values)
+    return out
+
+
+def naive_ts_sum(x, d, nan_handling='ON'):
+    return _naive_window_apply(x, d, np.sum, nan_handling)
+
+
+def naive_ts_mean(x, d, nan_handling='ON'):
+    return _naive_window_apply(x, d, np.mean, nan_handling)
+
+
+def naive_ts_std_dev(x, d, nan_handling='ON'):
+    return _naive_window_apply(x, d, lambda v: np.std(v, ddof=1), nan_handling, min_valid=2)
+
+
+def naive_ts_decay_exp_window(x, d, factor=0.5, nan_handling='ON'):
+    out = np.full(x.shape, np.nan)
+    weights = factor ** np.arange(d)[::-1]
+    for t in range(d - 1, x.shape[0]):
+        window = x[t - d + 1:t + 1]
+        for col in range(x.shape[1]):
+            values = window[:, col]
+            mask = ~np.isnan(values)
+            if nan_handling == 'OFF' and not mask.all():
+                continue
+            if mask.any():
+                out[t, col] = np.sum(values[mask] * weights[mask]) / np.sum(weights[mask])
+    return out
+
+
+def naive_ts_rank(x, d, nan_handling='ON'):
+    out = np.full(x.shape, np.nan)
+    for t in range(d - 1, x.shape[0]):
+        window = x[t - d + 1:t + 1]
+        for col in range(x.shape[1]):
+            values = window[:, col]
+            current = values[-1]
+            if np.isnan(current) or (nan_handling == 'OFF' and np.isnan(values).any()):
+                continue
+            values = values[~np.isnan(values)]
+            if len(values) < 2:
+                continue
+            less = np.sum(values < current)
+            equal = np.sum(values == current)
+            out[t, col] = (less + 0.5 * (equal - 1)) / (len(values) - 1)
+    return out
+
+
+def naive_ts_corr(x, y, d, nan_handling='ON'):
+    out = np.full(x.shape, np.nan)
+    for t in range(d - 1, x.shape[0]):
+        for col in range(x.shape[1]):
+            xs = x[t - d + 1:t + 1, col]
+            ys = y[t - d + 1:t + 1, col]
+            mask = ~(np.isnan(xs) | np.isnan(ys))
+            if nan_handling == 'OFF' and not mask.all():
+                continue
+            if mask.sum() >= 2:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    out[t, col] = np.corrcoef(xs[mask], ys[mask])[0, 1]
+    return out
+
+
+def _make_panel(days, stocks, nan_ratio, seed):
+    rng = np.random.default_rng(seed)
+    panel = rng.standard_normal((days, stocks)).cumsum(axis=0)
+    panel[rng.random(panel.shape) < nan_ratio] = np.nan
+    # 制造一些重复值，检验 ts_rank 的并列处理
+    panel[::7] = np.round(panel[::7], 1)
+    return panel
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="时间序列内核微基准")
+    parser.add_argument('--days', type=int, default=600)
+    parser.add_argument('--stocks', type=int, default=50)
+    parser.add_argument('--window', type=int, default=252)
+    parser.add_argument('--nan-ratio', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    x = _make_panel(args.days, args.stocks, args.nan_ratio, args.seed)
+    y = _make_panel(args.days, args.stocks, args.nan_ratio, args.seed + 1)
+    d = args.window
+
+    cases = [
+        ('ts_sum', lambda m: ts_kernels.ts_sum(x, d, m), lambda m: naive_ts_sum(x, d, m)),
+        ('ts_mean', lambda m: ts_kernels.ts_mean(x, d, m), lambda m: naive_ts_mean(x, d, m)),
+        ('ts_std_dev', lambda m: ts_kernels.ts_std_dev(x, d, m), lambda m: naive_ts_std_dev(x, d, m)),
+        ('ts_corr', lambda m: ts_kernels.ts_corr(x, y, d, m), lambda m: naive_ts_corr(x, y, d, m)),
+        ('ts_decay_exp_window',
+         lambda m: ts_kernels.ts_decay_exp_window(x, d, 0.5, m),
+         lambda m: naive_ts_decay_exp_window(x, d, 0.5, m)),
+        ('ts_rank', lambda m: ts_kernels.ts_rank(x, d, nan_handling=m), lambda m: naive_ts_rank(x, d, m)),
+    ]
+
+    print(f"面板: {args.days} 天 × {args.stocks} 只股票, 窗口 {d}, NaN 比例 {args.nan_ratio}")
+    print(f"{'算子':<22}{'nanHandling':<13}{'内核(s)':>10}{'朴素(s)':>10}{'加速':>9}{'最大误差':>12}")
+    print("-" * 76)
+
+    all_ok = True
+    for name, fast, naive in cases:
+        for mode in ts_kernels.NAN_HANDLING_OPTIONS:
+            fast_result, fast_time = _timed(fast, mode)
+            naive_result, naive_time = _timed(naive, mode)
+
+            same_nan = np.array_equal(np.isnan(fast_result), np.isnan(naive_result))
+            both = ~np.isnan(fast_result) & ~np.isnan(naive_result)
+            max_err = float(np.max(np.abs(fast_result[both] - naive_result[both]))) if both.any() else 0.0
+            ok = same_nan and max_err < 1e-6
+            all_ok &= ok
+
+            print(f"{name:<22}{mode:<13}{fast_time:>10.4f}{naive_time:>10.4f}"
+                  f"{naive_time / max(fast_time, 1e-9):>8.1f}x{max_err:>12.2e}{'' if ok else '  ❌'}")
+
+    print("\n✅ 结果与朴素实现一致" if all_ok else "\n❌ 存在不一致的结果")
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
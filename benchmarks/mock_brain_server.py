@@ -0,0 +1,401 @@
+"""本地模拟 Brain API 服务器：在不消耗平台配额的情况下端到端测试模拟/提交流程
+
+实现客户端用到的接口：
+    POST /authentication
+    POST /simulations                    单个（dict）或多个（list）模拟，返回 Location
+    GET  /simulations/{id}               进行中带 Retry-After，完成后返回 alpha / children
+    DELETE /simulations/{id}             取消进行中的模拟
+    GET  /alphas/{id}                    IS 指标与检查项
+    GET  /alphas/{id}/check              提交前检查
+    GET  /alphas/{id}/recordsets/pnl     日 PnL
+    POST/GET /alphas/{id}/submit         异步提交
+    GET  /users/self/alphas              已提交 Alpha 分页列表
+    GET  /data-fields                    数据字段分页
+
+每个请求的延迟与模拟耗时服从对数正态分布，可配置 429 限流比例、503 错误比例、模拟失败比例、
+永远不会完成的模拟比例和提交拒绝比例。
+
+用法: python benchmarks/mock_brain_server.py [--port 8765] [--sim-median 2] [--rate-limit 0.05] [--failure-rate 0.1]
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_CONFIG = {
+    'latency_median': 0.02,   # 每个请求的响应延迟中位数（秒）
+    'latency_sigma': 0.5,
+    'sim_median': 2.0,        # 单个模拟的计算耗时中位数（秒）
+    'sim_sigma': 0.6,
+    'submit_median': 1.0,     # 提交处理耗时中位数（秒）
+    'retry_after': 0.5,       # 进行中时返回的 Retry-After（秒）
+    'rate_limit': 0.0,        # 返回 429 的请求比例（认证请求除外）
+    'server_error_rate': 0.0, # 返回 503 的请求比例（认证请求除外）
+    'failure_rate': 0.0,      # 模拟以 ERROR 结束的比例
+    'stuck_rate': 0.0,        # 模拟永远不会完成（只能取消）的比例
+    'pass_rate': 0.2,         # 模拟结果满足提交条件的比例
+    'reject_rate': 0.1,       # 提交被拒绝 (403) 的比例
+    'datafields': 120,        # 每个数据集的字段数量（其中约 90% 为 MATRIX）
+    'pnl_days': 750,
+    'seed': 0,
+}
+
+SIMULATION_PATH = re.compile(r'^/simulations/([\w-]+)$')
+ALPHA_PATH = re.compile(r'^/alphas/(\w+)(/check|/submit|/recordsets/pnl)?$')
+
+
+def lognormal(rng, median, sigma):
+    return median * math.exp(rng.gauss(0.0, sigma)) if median > 0 else 0.0
+
+
+class MockBrainState:
+    """模拟平台的内存状态（线程安全）"""
+
+    def __init__(self, config=None, clock=time.monotonic):
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.clock = clock
+        self.rng = random.Random(self.config['seed'])
+        self.lock = threading.Lock()
+        self.simulations = {}   # {id: {'ready_at', 'status', 'alpha' 或 'children'}}
+        self.alphas = {}        # {alpha_id: IS 指标}
+        self.submissions = {}   # {alpha_id: (完成时间, 状态码)}
+        self.submitted = []
+        self.counts = {}        # {接口: 请求次数}
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def request_delay(self):
+        with self.lock:
+            return lognormal(self.rng, self.config['latency_median'], self.config['latency_sigma'])
+
+    def rate_limited(self):
+        with self.lock:
+            return self.rng.random() < self.config['rate_limit']
+
+    def server_error(self):
+        with self.lock:
+            return self.rng.random() < self.config['server_error_rate']
+
+    def _new_alpha(self):
+        """生成一个 Alpha 的 IS 指标；约 pass_rate 的比例满足默认提交条件"""
+        rng = self.rng
+        alpha_id = uuid.uuid4().hex[:7].upper()
+        good = rng.random() < self.config['pass_rate']
+        sharpe = rng.uniform(1.3, 2.5) if good else rng.gauss(0.6, 0.5)
+        fitness = sharpe * rng.uniform(0.6, 0.9) if good else sharpe * rng.uniform(0.3, 0.8)
+        turnover = rng.uniform(0.05, 0.5) if good else rng.uniform(0.005, 0.9)
+        margin = rng.uniform(0.0005, 0.003) if good else rng.uniform(-0.001, 0.002)
+        sub_sharpe = sharpe * rng.uniform(0.6, 1.0)
+        limit = round(0.75 * sharpe, 2)
+
+        def check(name, value, limit, passed):
+            return {'name': name, 'result': 'PASS' if passed else 'FAIL', 'value': round(value, 4), 'limit': limit}
+
+        self.alphas[alpha_id] = {
+            'sharpe': round(sharpe, 2),
+            'fitness': round(fitness, 2),
+            'turnover': round(turnover, 4),
+            'margin': round(margin, 6),
+            'checks': [
+                check('LOW_SHARPE', sharpe, 1.25, sharpe >= 1.25),
+                check('LOW_FITNESS', fitness, 1.0, fitness >= 1.0),
+                check('LOW_TURNOVER', turnover, 0.01, turnover >= 0.01),
+                check('HIGH_TURNOVER', turnover, 0.7, turnover <= 0.7),
+                check('LOW_SUB_UNIVERSE_SHARPE', sub_sharpe, limit, sub_sharpe >= limit),
+            ],
+        }
+        return alpha_id
+
+    def create_simulation(self, payload):
+        """返回新模拟的 ID；list 请求为多模拟，每个子模拟独立计时"""
+        with self.lock:
+            now = self.clock()
+            items = payload if isinstance(payload, list) else [payload]
+            child_ids = []
+            for _ in items:
+                child_id = uuid.uuid4().hex
+                failed = self.rng.random() < self.config['failure_rate']
+                stuck = self.rng.random() < self.config['stuck_rate']
+                self.simulations[child_id] = {
+                    'ready_at': math.inf if stuck else
+                    now + lognormal(self.rng, self.config['sim_median'], self.config['sim_sigma']),
+                    'status': 'ERROR' if failed else 'COMPLETE',
+                    'alpha': None,
+                }
+                child_ids.append(child_id)
+            if not isinstance(payload, list):
+                return child_ids[0]
+
+            parent_id = uuid.uuid4().hex
+            self.simulations[parent_id] = {
+                'ready_at': max(self.simulations[child]['ready_at'] for child in child_ids),
+                'status': 'COMPLETE',
+                'children': child_ids,
+            }
+            return parent_id
+
+    def simulation_progress(self, sim_id):
+        """-> (剩余秒数, 响应内容)；未知 ID 返回 None"""
+        with self.lock:
+            sim = self.simulations.get(sim_id)
+            if sim is None:
+                return None
+            remaining = sim['ready_at'] - self.clock()
+            if remaining > 0:
+                return remaining, {'id': sim_id, 'status': 'RUNNING',
+                                   'progress': round(max(0.0, 1 - remaining / self.config['sim_median']), 2)}
+            if 'children' in sim:
+                return 0, {'id': sim_id, 'status': sim['status'], 'children': sim['children']}
+            if sim['status'] == 'ERROR':
+                return 0, {'id': sim_id, 'status': 'ERROR', 'message': 'Simulation failed (mock)'}
+            if sim['alpha'] is None:
+                sim['alpha'] = self._new_alpha()
+            return 0, {'id': sim_id, 'status': 'COMPLETE', 'alpha': sim['alpha']}
+
+    def cancel_simulation(self, sim_id):
+        """-> 状态码：204 已取消，404 未知 ID，409 已完成"""
+        with self.lock:
+            sim = self.simulations.get(sim_id)
+            if sim is None:
+                return 404
+            if sim['ready_at'] <= self.clock():
+                return 409
+            del self.simulations[sim_id]
+            return 204
+
+    def alpha(self, alpha_id):
+        with self.lock:
+            metrics = self.alphas.get(alpha_id)
+            return None if metrics is None else {'id': alpha_id, 'is': metrics}
+
+    def start_submission(self, alpha_id):
+        """-> 状态码：201 开始处理，403 被拒绝，404 未知 ID"""
+        with self.lock:
+            if alpha_id not in self.alphas:
+                return 404
+            if alpha_id in self.submitted:
+                return 403
+            code = 403 if self.rng.random() < self.config['reject_rate'] else 200
+            self.submissions[alpha_id] = (
+                self.clock() + lognormal(self.rng, self.config['submit_median'], 0.5), code)
+            return 201
+
+    def submission_status(self, alpha_id):
+        """-> (剩余秒数, 状态码)"""
+        with self.lock:
+            if alpha_id not in self.submissions:
+                return 0, 404
+            ready_at, code = self.submissions[alpha_id]
+            remaining = ready_at - self.clock()
+            if remaining <= 0 and code == 200 and alpha_id not in self.submitted:
+                self.submitted.append(alpha_id)
+            return max(remaining, 0), code
+
+    def pnl_records(self, alpha_id):
+        rng = random.Random(alpha_id)
+        start = date(2021, 1, 1)
+        pnl, records = 0.0, []
+        for day in range(self.config['pnl_days']):
+            pnl += rng.gauss(50, 1000)
+            records.append([(start + timedelta(days=day)).isoformat(), round(pnl, 2)])
+        return {'schema': {'properties': [{'name': 'date'}, {'name': 'pnl'}]}, 'records': records}
+
+    def datafields(self, dataset_id, limit, offset):
+        total = self.config['datafields']
+        results = [
+            {'id': f"{dataset_id}_field_{i:04d}", 'type': 'VECTOR' if i % 10 == 9 else 'MATRIX'}
+            for i in range(offset, min(offset + limit, total))
+        ]
+        return {'count': total, 'results': results}
+
+
+class MockBrainHandler(BaseHTTPRequestHandler):
+    """按路径分派到 MockBrainState"""
+
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def _prepare(self, endpoint):
+        """记录请求、模拟网络延迟；命中限流或注入的服务器错误时直接返回 429 / 503"""
+        self.state.count(endpoint)
+        time.sleep(self.state.request_delay())
+        if endpoint != 'authentication' and self.state.rate_limited():
+            self.state.count('rate_limited')
+            self._send(429, {'detail': 'Rate limited (mock)'},
+                       {'Retry-After': f"{self.state.config['retry_after']:.2f}"})
+            return False
+        if endpoint != 'authentication' and self.state.server_error():
+            self.state.count('server_error')
+            self._send(503, {'detail': 'Service unavailable (mock)'})
+            return False
+        return True
+
+    def _retry_after(self, remaining):
+        # 保留两位小数后仍大于 0，客户端以 0 表示已完成
+        return {'Retry-After': f"{max(min(remaining, self.state.config['retry_after']), 0.01):.2f}"}
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        payload = self._read_json()
+
+        if path in ('/authentication', '/auth', '/login'):
+            if not self._prepare('authentication'):
+                return
+            if not self.headers.get('Authorization'):
+                return self._send(401, {'detail': 'Missing credentials'})
+            return self._send(201, {'user': {'id': 'MOCK'}, 'token': {'expiry': 14400}})
+
+        if path == '/simulations':
+            if not self._prepare('simulations'):
+                return
+            if not payload or (isinstance(payload, list) and len(payload) > 10):
+                return self._send(400, {'detail': 'Invalid simulation payload'})
+            sim_id = self.state.create_simulation(payload)
+            host = self.headers.get('Host')
+            return self._send(201, None, {'Location': f"http://{host}/simulations/{sim_id}"})
+
+        match = ALPHA_PATH.match(path)
+        if match and match.group(2) == '/submit':
+            if not self._prepare('submit'):
+                return
+            code = self.state.start_submission(match.group(1))
+            return self._send(code, None if code == 201 else {'detail': 'Submission rejected (mock)'})
+
+        self._send(404, {'detail': 'Not found'})
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        match = SIMULATION_PATH.match(path)
+        if match:
+            if not self._prepare('simulation_progress'):
+                return
+            progress = self.state.simulation_progress(match.group(1))
+            if progress is None:
+                return self._send(404, {'detail': 'Unknown simulation'})
+            remaining, body = progress
+            return self._send(200, body, self._retry_after(remaining) if remaining > 0 else None)
+
+        match = ALPHA_PATH.match(path)
+        if match:
+            alpha_id, suffix = match.groups()
+            if not self._prepare({'/check': 'check', '/submit': 'submit_status',
+                                  '/recordsets/pnl': 'pnl'}.get(suffix, 'alpha')):
+                return
+            alpha = self.state.alpha(alpha_id)
+            if alpha is None:
+                return self._send(404, {'detail': 'Unknown alpha'})
+            if suffix == '/submit':
+                remaining, code = self.state.submission_status(alpha_id)
+                if remaining > 0:
+                    return self._send(200, None, self._retry_after(remaining))
+                return self._send(code, {'id': alpha_id} if code == 200 else {'detail': 'Rejected (mock)'})
+            if suffix == '/recordsets/pnl':
+                return self._send(200, self.state.pnl_records(alpha_id))
+            return self._send(200, alpha)
+
+        if path == '/users/self/alphas':
+            if not self._prepare('user_alphas'):
+                return
+            limit, offset = int(query.get('limit', 100)), int(query.get('offset', 0))
+            with self.state.lock:
+                submitted = list(self.state.submitted)
+            page = [{'id': alpha_id, 'stage': 'OS'} for alpha_id in submitted[offset:offset + limit]]
+            return self._send(200, {'count': len(submitted), 'results': page})
+
+        if path == '/data-fields':
+            if not self._prepare('data_fields'):
+                return
+            body = self.state.datafields(query.get('dataset.id', 'dataset'),
+                                         int(query.get('limit', 50)), int(query.get('offset', 0)))
+            return self._send(200, body)
+
+        self._send(404, {'detail': 'Not found'})
+
+    def do_DELETE(self):
+        match = SIMULATION_PATH.match(urlparse(self.path).path)
+        if not match:
+            return self._send(404, {'detail': 'Not found'})
+        if not self._prepare('simulation_cancel'):
+            return
+        code = self.state.cancel_simulation(match.group(1))
+        self._send(code, None if code == 204 else {'detail': 'Cannot cancel simulation (mock)'})
+
+
+def start_server(config=None, host='127.0.0.1', port=0):
+    """在后台线程启动服务器，返回 (server, 基础 URL)；port 为 0 时自动选择端口"""
+    server = ThreadingHTTPServer((host, port), MockBrainHandler)
+    server.daemon_threads = True
+    server.state = MockBrainState(config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_config_arguments(parser):
+    """把 DEFAULT_CONFIG 中的各项加为命令行参数（--sim-median 等）"""
+    for key, value in DEFAULT_CONFIG.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=type(value), default=value)
+
+
+def config_from_args(args):
+    return {key: getattr(args, key) for key in DEFAULT_CONFIG}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 Brain API 服务器")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), MockBrainHandler)
+    server.daemon_threads = True
+    server.state = MockBrainState(config_from_args(args))
+    print(f"模拟 Brain API 已启动: http://{args.host}:{server.server_address[1]} (Ctrl+C 退出)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n请求统计: {server.state.counts}")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
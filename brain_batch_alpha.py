@@ -1,27 +1,116 @@
 """WorldQuant Brain API 批量处理模块 - 智能参数配置+断点续传优化版本"""
 
 import hashlib
+import heapq
 import json
+import logging
 import os
 import random
 import re
+import shutil
 import signal
 import sys
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from os.path import expanduser
-from time import sleep
+from time import monotonic, sleep
 
-import pandas as pd
 import requests
 from requests.auth import HTTPBasicAuth
 
+from alpha_logging import get_logger, log_event, setup_logging
 from alpha_strategy import AlphaStrategy
-from dataset_config import get_api_settings, get_dataset_config
+from dataset_config import (SCREENING_THRESHOLDS, get_api_settings,
+                            get_dataset_config, get_screening_settings)
+from datafield_catalog import DataFieldCatalog, catalog_key
+from evolution import EvolutionaryPopulation, ExpressionMutator
+from expression_validator import REJECT_LABELS, REJECT_REASONS, ExpressionValidator
+from http_cassette import RecordingAdapter, ReplayAdapter, mount
+from near_miss import NearMissClimber
+from parameter_bandit import (ThompsonParameterSampler, result_reward,
+                              snap_to_arm, truncation_arms)
+from profiling import PROFILE_DIR, PhaseProfiler
+from qualification_rules import (THRESHOLDS_FILE, extract_metrics,
+                                 load_thresholds, qualification_score)
+from result_aggregates import RunningAggregates
+from result_store import ResultStore, iter_json_array
+from run_metrics import RunMetrics
+from simulation_cost import SimulationCostModel
+from simulation_journal import SimulationJournal
+from submission_checks import CHECK_FAIL, CheckCache, SubmissionCheckRunner
+from submission_scheduler import (FAILED, FINAL_STATUSES, REJECTED, SUBMITTED,
+                                  SubmissionScheduler, rank_alpha_ids)
+
+
+logger = get_logger(__name__)
+
+# 模拟截止时间：观测到足够多的完成耗时后取 p99 的倍数，否则使用默认值
+SIMULATION_DEADLINE_DEFAULT = 1800      # 秒
+SIMULATION_DEADLINE_MIN = 120           # 秒
+SIMULATION_DEADLINE_PERCENTILE = 99
+SIMULATION_DEADLINE_FACTOR = 3
+SIMULATION_DEADLINE_MIN_SAMPLES = 20
+SIMULATION_MAX_ATTEMPTS = 3             # 暂时性失败（含超时）后重新排队，最多模拟的次数
+RETRY_BACKOFF_BASE = 30                 # 秒；第 n 次重试前等待 base × 2^(n-1)，加随机抖动
+RETRY_BACKOFF_MAX = 600                 # 秒
+REAUTH_MIN_INTERVAL = 60                # 秒；并发请求同时遇到 401 时只重新认证一次
+# 回放时带入临时工作目录的只读输入（影响模拟与合格判断）
+REPLAY_INPUTS = (THRESHOLDS_FILE, 'local_data')
+
+
+def enter_replay_sandbox():
+    """回放模式：切换到临时工作目录，返回该目录
+
+    断点续传、模拟日志、结果存储、字段目录、耗时模型等本地状态都写在临时目录，
+    离线回放不会修改真实运行的文件，也不会去取回真实的进行中模拟。
+    只读输入（REPLAY_INPUTS）链接或复制过去，保证回放时的判断与录制时一致。
+    """
+    source = os.getcwd()
+    sandbox = tempfile.mkdtemp(prefix="brain_replay_")
+    for name in REPLAY_INPUTS:
+        path = os.path.join(source, name)
+        if not os.path.exists(path):
+            continue
+        target = os.path.join(sandbox, name)
+        try:
+            os.symlink(path, target, target_is_directory=os.path.isdir(path))
+        except OSError:
+            # 没有创建符号链接权限时（如 Windows）直接复制
+            if os.path.isdir(path):
+                shutil.copytree(path, target)
+            else:
+                shutil.copy2(path, target)
+    os.chdir(sandbox)
+    return sandbox
+
+
+class TransientSimulationError(Exception):
+    """暂时性失败（网络错误、408、429、5xx、响应无法解析、缺少指标数据等），重试可能成功"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SimulationTimeout(TransientSimulationError):
+    """模拟超过截止时间仍未完成（已尝试通过 API 取消）"""
 
 
 class ResumeManager:
     """智能断点续传管理器"""
 
+    # 多级筛选阶段：未通过第一阶段 / 通过第一阶段待生产模拟 / 生产配置模拟完成
+    STAGE_SCREENED_OUT = 'screened_out'
+    STAGE_SCREENED = 'screened'
+    STAGE_PRODUCTION = 'production'
+    # 多次暂时性失败（网络、429、5xx、超时等）后放弃，下次运行重新模拟
+    STAGE_TRANSIENT_FAILED = 'transient_failed'
+    # 本地预检拒绝（与参数无关，按表达式记录），任何参数配置都不再模拟
+    STAGE_PREFLIGHT_REJECTED = 'preflight_rejected'
+
     def __init__(self, resume_file="alpha_resume.json"):
         """初始化断点续传管理器"""
         self.resume_file = resume_file
@@ -81,18 +170,37 @@ class ResumeManager:
         return hashlib.md5(content.encode('utf-8')).hexdigest()
 
     def is_expression_tested(self, expression, parameters=None):
-        """检查表达式是否已经测试过"""
+        """检查表达式是否已经测试过（通过筛选、等待生产模拟的和暂时性失败的不算；预检拒绝的算）"""
+        rejected = self.tested_expressions.get(self.get_expression_hash(expression))
+        if rejected is not None and rejected.get('stage') == self.STAGE_PREFLIGHT_REJECTED:
+            return True
         expr_hash = self.get_expression_hash(expression, parameters)
-        return expr_hash in self.tested_expressions
+        record = self.tested_expressions.get(expr_hash)
+        return record is not None and record.get('stage') not in (self.STAGE_SCREENED,
+                                                                  self.STAGE_TRANSIENT_FAILED)
+
+    def get_pending_promotions(self):
+        """已通过第一阶段、尚未完成生产配置模拟的表达式 {表达式: 生产配置参数}"""
+        return {
+            record['expression']: record['parameters']
+            for record in self.tested_expressions.values()
+            if record.get('stage') == self.STAGE_SCREENED
+        }
+
+    def mark_expression_tested(self, expression, parameters=None, result=None, stage=None):
+        """标记表达式为已测试
 
-    def mark_expression_tested(self, expression, parameters=None, result=None):
-        """标记表达式为已测试"""
+        Args:
+            parameters: 生产配置参数（多级筛选时也以生产配置为键）
+            stage: 所处阶段，默认为生产配置模拟完成
+        """
         expr_hash = self.get_expression_hash(expression, parameters)
         self.tested_expressions[expr_hash] = {
             'expression': expression,
             'parameters': parameters or {},
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'result': result or {}
+            'result': result or {},
+            'stage': stage or self.STAGE_PRODUCTION
         }
         self.current_session_tested.add(expr_hash)
 
@@ -100,6 +208,22 @@ class ResumeManager:
         if len(self.current_session_tested) % 10 == 0:
             self._save_tested_expressions()
 
+    def mark_transient_failure(self, expression, parameters, error, attempts):
+        """记录暂时性失败：不算已测试，下次运行重新模拟；已通过第一阶段的记录保持待生产模拟"""
+        expr_hash = self.get_expression_hash(expression, parameters)
+        record = self.tested_expressions.get(expr_hash)
+        if record is not None and record.get('stage') == self.STAGE_SCREENED:
+            return
+        previous = record.get('result', {}).get('attempts', 0) if record else 0
+        self.mark_expression_tested(expression, parameters,
+                                    {'error': error, 'attempts': previous + attempts},
+                                    self.STAGE_TRANSIENT_FAILED)
+
+    def mark_preflight_rejected(self, expression, reason, message):
+        """记录本地预检拒绝：以不含参数的表达式为键，之后生成的任何参数配置都直接跳过"""
+        self.mark_expression_tested(expression, None, {'error': message, 'reason': reason},
+                                    self.STAGE_PREFLIGHT_REJECTED)
+
     def get_resume_stats(self):
         """获取断点续传统计信息"""
         return {
@@ -149,10 +273,19 @@ class ResumeManager:
 
 
 class SmartParameterOptimizer:
-    """智能模拟参数配置器"""
+    """智能模拟参数配置器 - 在类型规则范围内用 Thompson 采样学习最优参数"""
+
+    def __init__(self, learning=True, rng=None, thresholds=None):
+        """初始化参数配置器
 
-    def __init__(self):
-        """初始化参数配置器"""
+        Args:
+            learning: 是否根据历史结果学习参数；False 时在规则范围内均匀随机
+            thresholds: 合格阈值，未合格结果按它计算部分奖励（默认 DEFAULT_THRESHOLDS）
+        """
+
+        self.learning = learning
+        self.thresholds = thresholds
+        self.sampler = ThompsonParameterSampler(rng=rng)
 
         # 可选参数范围定义
         self.universe_options = ['TOP3000', 'TOP1000', 'TOP500', 'TOP200', 'TOPSP500']
@@ -246,14 +379,21 @@ class SmartParameterOptimizer:
         # Universe参数约束：如果指定了数据集Universe，则强制使用
         if dataset_universe:
             universe = dataset_universe
-        else:
+        elif self.learning:
             # 如果没有数据集约束，则使用智能配置
+            universe = self.sampler.choose(expr_type, 'universe', rules['universe'])
+        else:
             universe = random.choice(rules['universe'])
 
-        # 其他参数仍然使用智能配置
-        neutralization = random.choice(rules['neutralization'])
-        decay = random.randint(rules['decay'][0], rules['decay'][1])
-        truncation = round(random.uniform(rules['truncation'][0], rules['truncation'][1]), 3)
+        if self.learning:
+            # 其他参数按历史结果的后验抽样
+            neutralization = self.sampler.choose(expr_type, 'neutralization', rules['neutralization'])
+            decay = self.sampler.choose(expr_type, 'decay', self._decay_arms(rules))
+            truncation = self.sampler.choose(expr_type, 'truncation', truncation_arms(*rules['truncation']))
+        else:
+            neutralization = random.choice(rules['neutralization'])
+            decay = random.randint(rules['decay'][0], rules['decay'][1])
+            truncation = round(random.uniform(rules['truncation'][0], rules['truncation'][1]), 3)
 
         return {
             'universe': universe,
@@ -263,6 +403,91 @@ class SmartParameterOptimizer:
             'expression_type': expr_type
         }
 
+    @staticmethod
+    def _decay_arms(rules):
+        return list(range(rules['decay'][0], rules['decay'][1] + 1))
+
+    def observe(self, expression, parameters, result):
+        """用一次模拟结果在线更新参数后验，返回是否计入学习"""
+
+        reward = result_reward(result, self.thresholds)
+        if reward is None or not parameters:
+            return False
+
+        expr_type = self.analyze_expression_type(expression)
+        rules = self.optimization_rules.get(expr_type, self.optimization_rules['default'])
+        dimensions = {
+            'universe': rules['universe'],
+            'neutralization': rules['neutralization'],
+            'decay': self._decay_arms(rules),
+            'truncation': truncation_arms(*rules['truncation']),
+        }
+
+        for dimension, arms in dimensions.items():
+            value = parameters.get(dimension)
+            arm = value if value in arms else snap_to_arm(value, arms)
+            # 超出规则范围的历史取值不计入该维度
+            if arm is None or (arm != value and dimension in ('universe', 'neutralization')):
+                continue
+            self.sampler.update(expr_type, dimension, arm, reward)
+
+        self.sampler.record_observation(expr_type)
+        return True
+
+    def warm_start(self, tested_expressions=None, details_file="alpha_details.json", aggregates=None):
+        """用断点续传记录和已合格Alpha详情预热参数后验
+
+        没有断点续传记录（未启用或已清空）时，改用增量统计 aggregates 中
+        universe / neutralization 各取值的合格次数作为先验。
+        """
+
+        learned = 0
+        seen_alpha_ids = set()
+        for record in (tested_expressions or {}).values():
+            result = record.get('result') or {}
+            if result.get('alpha_id'):
+                seen_alpha_ids.add(result['alpha_id'])
+            # 多级筛选记录以生产配置为键，实际模拟参数保存在结果中
+            parameters = result.get('parameters') or record.get('parameters', {})
+            if self.observe(record.get('expression', ''), parameters, result):
+                learned += 1
+
+        # alpha_details.json 只保存合格 Alpha，跳过已在续传记录中的部分
+        if os.path.exists(details_file):
+            try:
+                for item in iter_json_array(details_file):
+                    if item.get('alpha_id') in seen_alpha_ids:
+                        continue
+                    result = {'metrics': item.get('metrics', {}), 'passed_all_checks': True}
+                    if self.observe(item.get('expression', ''), item.get('parameters', {}), result):
+                        learned += 1
+            except Exception as e:
+                print(f"⚠️ 读取Alpha详情失败: {str(e)}")
+
+        if not tested_expressions and aggregates is not None and aggregates.rows:
+            seeded = self._seed_from_aggregates(aggregates)
+            if seeded:
+                print(f"参数学习: 已从增量统计中载入 {seeded} 条模拟结果的先验")
+
+        if learned:
+            print(f"参数学习: 已从历史结果中学习 {learned} 条记录")
+        return learned
+
+    def _seed_from_aggregates(self, aggregates):
+        """按各类型规则内的候选取值查询边际统计，返回计入的模拟次数"""
+        seeded = 0
+        for expr_type, rules in self.optimization_rules.items():
+            for dimension in ('universe', 'neutralization'):
+                for arm in rules[dimension]:
+                    summary = aggregates.marginal(expr_type, dimension, arm)
+                    if not summary['count']:
+                        continue
+                    successes = summary['pass_rate'] * summary['count']
+                    self.sampler.seed(expr_type, dimension, arm, successes, summary['count'] - successes)
+                    if dimension == 'universe':
+                        seeded += summary['count']
+        return seeded
+
 
 class BrainBatchAlpha:
     # 尝试不同的API基础URL
@@ -272,17 +497,131 @@ class BrainBatchAlpha:
         'https://brain.worldquant.com/api'
     ]
 
-    def __init__(self, credentials_file='brain_credentials.txt', enable_resume=True):
-        """初始化 API 客户端"""
-
+    def __init__(self, credentials_file='brain_credentials.txt', enable_resume=True,
+                 prescreen_threshold=0.7, verbose=False, api_base_url=None,
+                 record_cassette=None, replay_cassette=None, replay_time_scale=1.0, profile=None):
+        """初始化 API 客户端
+
+        Args:
+            prescreen_threshold: 模拟前本地相关性预筛选阈值，None 表示关闭
+            verbose: 输出每次模拟的请求/响应和指标详情（默认每个结果一行）
+            api_base_url: 指定 API 地址（如本地模拟服务器），不再尝试默认地址列表
+            record_cassette: 把全部 API 请求/响应录制到该文件（不含认证信息）
+            replay_cassette: 从录制文件回放 API 响应，不访问网络；本地状态写入临时目录（见 enter_replay_sandbox）
+            replay_time_scale: 回放时的等待时间倍数，1 为原始耗时
+            profile: 按阶段性能剖析，'full'（cProfile + tracemalloc）或 'sample'（低开销采样）
+        """
+
+        profile_dir = PROFILE_DIR
+        if replay_cassette:
+            replay_cassette = os.path.abspath(replay_cassette)
+            credentials_file = os.path.abspath(expanduser(credentials_file))
+            profile_dir = os.path.abspath(PROFILE_DIR)   # 剖析报告仍写在原目录
+            sandbox = enter_replay_sandbox()
+        setup_logging(verbose)
+        if api_base_url:
+            self.API_BASE_URLS = [api_base_url.rstrip('/')]
+        self.metrics = RunMetrics()
+        self.stop_event = threading.Event()   # 设置后不再开始新的模拟，进行中的模拟完成后返回
+        self.profiler = PhaseProfiler(profile, profile_dir)
         self.session = requests.Session()
-        self.parameter_optimizer = SmartParameterOptimizer()
+        self.cassette = None
+        if replay_cassette:
+            self.cassette = mount(self.session, ReplayAdapter(replay_cassette, replay_time_scale))
+            print(f"📼 回放 API 录制: {replay_cassette} (时间倍数 {replay_time_scale})")
+            print(f"📂 回放期间的断点续传、结果和日志文件写入临时目录: {sandbox}")
+        elif record_cassette:
+            self.cassette = mount(self.session, RecordingAdapter(record_cassette))
+            print(f"📼 录制 API 请求到: {record_cassette}")
+        self.thresholds = load_thresholds()
+        self.parameter_optimizer = SmartParameterOptimizer(thresholds=self.thresholds)
         self.resume_manager = ResumeManager() if enable_resume else None
+        self.prescreen_threshold = prescreen_threshold
+        self.result_store = ResultStore()
+        self.journal = SimulationJournal()
+        self.field_catalog = DataFieldCatalog()
+        # 模拟前预检；获取数据字段后加入字段目录，之前只检查算子签名与类型
+        self.validator = ExpressionValidator()
+        self.cost_model = SimulationCostModel()
+        self._inflight_collected = False
+        # 每个模拟结果都立即落盘（单次模拟耗时远大于写入统计文件）
+        self.aggregates = RunningAggregates(save_every=1, thresholds=self.thresholds)
+        self._pnl_store = None   # 首次用到时创建，见 pnl_store 属性
+        if self.aggregates.rows == 0 and self.result_store.exists():
+            print(f"重建增量统计: {self.aggregates.rebuild(self.result_store)} 条模拟结果")
+        self.parameter_optimizer.warm_start(
+            self.resume_manager.tested_expressions if self.resume_manager else None,
+            aggregates=self.aggregates
+        )
         self.API_BASE_URL = None  # 将在认证时确定
+        self._auth_url = None     # 认证成功的端点，会话过期时用于重新认证
+        self._auth_lock = threading.Lock()
+        self._authenticated_at = 0.0
         self._setup_authentication(credentials_file)
 
 
 
+    def set_thresholds(self, thresholds):
+        """更新合格阈值（守护模式热加载），同步到参数学习等使用阈值的组件"""
+        self.thresholds = thresholds
+        self.parameter_optimizer.thresholds = thresholds
+        if thresholds != self.aggregates.thresholds:
+            # 统计中的得分按旧阈值计算，阈值变化后从结果存储重建
+            self.aggregates.thresholds = thresholds
+            if self.result_store.exists():
+                print(f"重建增量统计: {self.aggregates.rebuild(self.result_store)} 条模拟结果")
+
+    def _reauthenticate(self):
+        """会话过期（401）时重新认证，返回是否成功
+
+        并发请求会同时遇到 401：最近 REAUTH_MIN_INTERVAL 秒内已重新认证过时直接返回 True。
+        """
+        with self._auth_lock:
+            if monotonic() - self._authenticated_at < REAUTH_MIN_INTERVAL:
+                return True
+            if not self._auth_url:
+                return False
+            try:
+                response = self.session.post(self._auth_url, timeout=10)
+            except requests.RequestException as e:
+                log_event(logger, 'reauthentication_failed', f"⚠️ 重新认证出错: {str(e)}",
+                          level=logging.WARNING)
+                return False
+            if response.status_code not in (200, 201):
+                log_event(logger, 'reauthentication_failed',
+                          f"⚠️ 重新认证失败 (状态码: {response.status_code})",
+                          level=logging.WARNING, status_code=response.status_code)
+                return False
+            self._authenticated_at = monotonic()
+            self.metrics.increment('reauthentications')
+            log_event(logger, 'reauthenticated', "🔑 会话已过期，重新认证成功")
+            return True
+
+    def _authentication_lost(self):
+        """重新认证后仍为 401：凭据失效，停止运行；本次记为暂时性失败，下次运行重新模拟"""
+        self.request_stop()
+        return TransientSimulationError("认证失效，重新认证后请求仍被拒绝 (401)")
+
+    def request_stop(self):
+        """请求优雅停止：不再开始新的模拟，等待进行中的模拟完成并保存结果"""
+        if not self.stop_event.is_set():
+            log_event(logger, 'stop_requested', "⏹️ 收到停止请求，等待进行中的模拟完成后退出...")
+        self.stop_event.set()
+
+    def close(self):
+        """退出前关闭打开的文件：模拟日志、API 录制文件（随会话关闭）和性能剖析报告"""
+        self.journal.close()
+        self.session.close()
+        self.profiler.close()
+
+    @property
+    def pnl_store(self):
+        """PnL 缓存（依赖 numpy，首次用到时才导入，不拖慢启动）"""
+        if self._pnl_store is None:
+            from pnl_store import PnLStore
+            self._pnl_store = PnLStore()
+        return self._pnl_store
+
     def _setup_authentication(self, credentials_file):
         """设置认证 - 尝试多个API端点"""
 
@@ -318,6 +657,8 @@ class BrainBatchAlpha:
                         if response.status_code in [200, 201]:
                             print("认证成功!")
                             self.API_BASE_URL = base_url
+                            self._auth_url = full_url
+                            self._authenticated_at = monotonic()
                             return
                         elif response.status_code == 400:
                             print(f"  400错误: {response.text[:200]}")
@@ -341,11 +682,20 @@ class BrainBatchAlpha:
             # 不抛出异常，使用默认URL继续
             self.API_BASE_URL = self.API_BASE_URLS[0]
 
-    def simulate_alphas(self, datafields=None, strategy_mode=1, dataset_name=None):
-        """模拟 Alpha 列表 - 支持断点续传"""
+    def simulate_alphas(self, datafields=None, strategy_mode=1, dataset_name=None, screening=False):
+        """模拟 Alpha 列表 - 支持断点续传
+
+        Args:
+            screening: 启用多级筛选，先用数据集的低成本配置模拟，
+                       第一阶段 Sharpe/Fitness 达标的候选才用生产配置模拟
+        """
+
+        if strategy_mode == 3:
+            return self.evolve_alphas(dataset_name, datafields=datafields)
 
         try:
-            datafields = self._get_datafields_if_none(datafields, dataset_name)
+            with self.profiler.phase('datafields'):
+                datafields = self._get_datafields_if_none(datafields, dataset_name)
             if not datafields:
                 return []
 
@@ -356,7 +706,8 @@ class BrainBatchAlpha:
             # 断点续传：过滤已测试的表达式
             original_count = len(alpha_list)
             if self.resume_manager:
-                alpha_list, skipped_count = self.resume_manager.filter_untested_alphas(alpha_list)
+                with self.profiler.phase('resume_filter'):
+                    alpha_list, skipped_count = self.resume_manager.filter_untested_alphas(alpha_list)
 
                 if skipped_count > 0:
                     print(f"\n断点续传统计:")
@@ -368,34 +719,28 @@ class BrainBatchAlpha:
                         print("所有Alpha表达式都已测试完成！")
                         return []
 
-            print(f"\n开始模拟 {len(alpha_list)} 个 Alpha 表达式...")
+            # 本地相关性预筛选：剔除近似重复的候选
+            if self.prescreen_threshold is not None and dataset_name:
+                with self.profiler.phase('prescreen'):
+                    alpha_list = self._prescreen_alpha_list(alpha_list, dataset_name)
+                if not alpha_list:
+                    return []
 
-            results = []
             try:
-                for i, alpha in enumerate(alpha_list, 1):
-                    # 显示进度（考虑跳过的数量）
-                    current_index = (original_count - len(alpha_list)) + i
-                    print(f"\n[{current_index}/{original_count}] 正在模拟 Alpha...")
-
-                    result = self._simulate_single_alpha(alpha)
-
-                    # 标记为已测试（无论成功失败）
-                    if self.resume_manager:
-                        expression = alpha.get('regular', '')
-                        parameters = alpha.get('settings', {})
-                        self.resume_manager.mark_expression_tested(
-                            expression, parameters, result
-                        )
-
-                    if result and result.get('passed_all_checks'):
-                        results.append(result)
-                        self._save_alpha_id(result['alpha_id'], result)
-
-                    if i < len(alpha_list):
-                        sleep(5)
+                if screening:
+                    alpha_list = self._run_screening_stage(alpha_list, dataset_name)
+                    original_count = len(alpha_list)
+
+                print(f"\n开始模拟 {len(alpha_list)} 个 Alpha 表达式...")
+                with self.profiler.phase('simulation'):
+                    outcomes = self._run_simulations(
+                        alpha_list,
+                        progress_offset=original_count - len(alpha_list),
+                        progress_total=original_count
+                    )
 
             except KeyboardInterrupt:
-                print(f"\n用户中断，已测试 {i} 个Alpha表达式")
+                print("\n用户中断，正在保存进度")
                 if self.resume_manager:
                     self.resume_manager._signal_handler(signal.SIGINT, None)
                 raise
@@ -403,8 +748,9 @@ class BrainBatchAlpha:
             # 正常结束，保存断点续传状态
             if self.resume_manager:
                 self.resume_manager.finalize_session()
+            self.report_metrics()
 
-            return results
+            return [result for result in outcomes if result and result.get('passed_all_checks')]
 
         except KeyboardInterrupt:
             raise
@@ -412,6 +758,521 @@ class BrainBatchAlpha:
             print(f"模拟过程出错: {str(e)}")
             return []
 
+    def _run_simulations(self, alpha_list, max_workers=1, progress_offset=0, progress_total=None,
+                         on_result=None):
+        """模拟一批 Alpha 并记录结果，返回与 alpha_list 对齐的结果列表
+
+        max_workers 为 1 时顺序模拟；大于 1 时并发提交，结果在主线程中按完成顺序记录。
+        on_result(下标, 结果) 在每个结果记录后调用。每个结果在控制台输出一行进度。
+        暂时性失败（含超时）按指数退避重新排队，超过最大次数后记为暂时性失败（下次运行重试）。
+        请求停止后不再开始新的模拟，尚未开始的保持为 None（未记录，下次重新生成）；
+        等待重试的已移出进行中模拟日志，同样记为暂时性失败。
+        """
+
+        # 先取回上次运行中已被平台接受、尚未记录结果的模拟，再开始新的模拟
+        self.collect_inflight_simulations()
+
+        outcomes = [None] * len(alpha_list)
+        total = progress_total or len(alpha_list)
+        accepted = self._preflight(alpha_list)
+        # 短作业优先：已提交的模拟先取回结果，其余按预测的平台耗时从短到长排队
+        costs = {i: 0.0 if '_progress_url' in alpha_list[i] else
+                 self.cost_model.predict(alpha_list[i].get('regular', ''), alpha_list[i].get('settings'))
+                 for i in accepted}
+        accepted.sort(key=costs.get)
+        retry_queue = []         # [(可重试的时间, 下标)] 最小堆
+        transient_errors = {}    # {下标: 放弃重试时的失败原因}
+        retry_errors = {}        # {下标: 重新排队前最近一次失败原因}
+
+        def finish(i, done):
+            with self.metrics.timer('persistence'), self.profiler.phase('persistence'):
+                self._record_simulation_result(alpha_list[i], outcomes[i], transient_errors.get(i))
+            # 结果已落盘，从进行中模拟日志移除
+            if '_progress_url' in alpha_list[i]:
+                self.journal.done(alpha_list[i]['_progress_url'])
+            self._log_progress(progress_offset + done, total, alpha_list[i], outcomes[i])
+            self.metrics.export_prometheus()
+            if on_result:
+                on_result(i, outcomes[i])
+
+        def handle_transient(i, error):
+            """-> 是否已重新排队；否则记下失败原因，之后按暂时性失败记录"""
+            delay = self._schedule_retry(alpha_list[i], error)
+            if delay is None:
+                transient_errors[i] = str(error)
+                return False
+            retry_errors[i] = str(error)
+            heapq.heappush(retry_queue, (monotonic() + delay, i))
+            return True
+
+        def abandon_retry(i, done):
+            """停止运行时放弃等待中的重试，按暂时性失败记录（下次运行重试）"""
+            self.metrics.increment('simulations_abandoned')
+            transient_errors[i] = retry_errors[i]
+            finish(i, done)
+
+        def pop_ready_retries():
+            ready = []
+            while retry_queue and retry_queue[0][0] <= monotonic():
+                ready.append(heapq.heappop(retry_queue)[1])
+            return ready
+
+        if max_workers <= 1:
+            queue = deque(accepted)
+            done = 0
+            while (queue or retry_queue) and not self.stop_event.is_set():
+                queue.extend(pop_ready_retries())
+                if not queue:
+                    # 只剩等待退避的重试
+                    self.stop_event.wait(max(retry_queue[0][0] - monotonic(), 0))
+                    continue
+                i = queue.popleft()
+                try:
+                    outcomes[i] = self._simulate_and_measure(alpha_list[i])
+                except TransientSimulationError as e:
+                    if handle_transient(i, e):
+                        continue
+                done += 1
+                finish(i, done)
+
+                if queue or retry_queue:
+                    self.metrics.sleep(5, sleep=self.stop_event.wait)
+
+            while retry_queue:
+                done += 1
+                abandon_retry(heapq.heappop(retry_queue)[1], done)
+            return outcomes
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._simulate_and_measure, alpha_list[i]): i for i in accepted}
+            done = 0
+            while futures or retry_queue:
+                if self.stop_event.is_set():
+                    # 取消尚未开始的模拟和等待中的重试，已开始的继续等待并记录
+                    for pending in futures:
+                        pending.cancel()
+                    while retry_queue:
+                        done += 1
+                        abandon_retry(heapq.heappop(retry_queue)[1], done)
+                    if not futures:
+                        break
+                for i in pop_ready_retries():
+                    futures[executor.submit(self._simulate_and_measure, alpha_list[i])] = i
+                if not futures:
+                    self.stop_event.wait(max(retry_queue[0][0] - monotonic(), 0))
+                    continue
+
+                timeout = max(retry_queue[0][0] - monotonic(), 0) if retry_queue else None
+                finished, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = futures.pop(future)
+                    if future.cancelled():
+                        if i in retry_errors:
+                            done += 1
+                            abandon_retry(i, done)
+                        continue
+                    try:
+                        outcomes[i] = future.result()
+                    except TransientSimulationError as e:
+                        if handle_transient(i, e):
+                            continue
+                    done += 1
+                    finish(i, done)
+
+        return outcomes
+
+    def _preflight(self, alpha_list):
+        """模拟前本地预检（算子签名、参数、字段目录），返回通过的下标
+
+        被拒绝的不模拟；启用断点续传时记入续传记录，之后的运行在去重时直接跳过。
+        """
+
+        accepted, rejected = [], {}
+        for i, alpha in enumerate(alpha_list):
+            expression = alpha.get('regular', '')
+            rejection = None if '_progress_url' in alpha else self.validator.validate(expression)
+            if rejection is None:
+                accepted.append(i)
+                continue
+            reason, message = rejection
+            rejected[reason] = rejected.get(reason, 0) + 1
+            self.metrics.increment(f'preflight_{reason}')
+            log_event(logger, 'preflight_rejected', f"🛂 预检拒绝: {message} | {expression}",
+                      level=logging.DEBUG, expression=expression, reason=reason, detail=message)
+            if self.resume_manager:
+                self.resume_manager.mark_preflight_rejected(expression, reason, message)
+
+        self.metrics.increment('preflight_passed', len(accepted))
+        if rejected:
+            summary = ", ".join(f"{REJECT_LABELS[reason]} {count}" for reason, count in rejected.items())
+            log_event(logger, 'preflight_summary',
+                      f"🛂 预检拒绝 {sum(rejected.values())}/{len(alpha_list)} 个表达式（{summary}），不提交模拟",
+                      rejected=rejected, total=len(alpha_list))
+        return accepted
+
+    def _schedule_retry(self, alpha, error):
+        """暂时性失败后的重试等待秒数（指数退避，不少于 Retry-After）；超过最大次数时返回 None"""
+
+        # 不再等待原来的模拟结果，重试时重新提交
+        if '_progress_url' in alpha:
+            self.journal.done(alpha.pop('_progress_url'))
+
+        attempt = alpha.get('_attempts', 1)
+        expression = alpha.get('regular', '')
+        if attempt >= SIMULATION_MAX_ATTEMPTS:
+            self.metrics.increment('simulations_abandoned')
+            log_event(logger, 'simulation_abandoned',
+                      f"⚠️ {attempt} 次暂时性失败，本次运行放弃（下次运行重试）: {expression} ({error})",
+                      level=logging.WARNING, expression=expression, attempts=attempt, error=str(error))
+            return None
+
+        alpha['_attempts'] = attempt + 1
+        delay = min(RETRY_BACKOFF_BASE * 2 ** (attempt - 1), RETRY_BACKOFF_MAX)
+        delay = max(delay * random.uniform(0.8, 1.2), error.retry_after or 0)
+        self.metrics.increment('simulations_requeued')
+        log_event(logger, 'simulation_requeued',
+                  f"🔁 暂时性失败（{error}），{delay:.0f} 秒后第 {attempt + 1} 次模拟: {expression}",
+                  expression=expression, attempt=attempt + 1, delay=round(delay, 1), error=str(error))
+        return delay
+
+    def collect_inflight_simulations(self, max_workers=3):
+        """继续轮询上次运行中已提交、尚未取回结果的模拟（见 simulation_journal.py），记录其结果
+
+        每个进程只执行一次，之后返回空列表。返回取回的结果列表。
+        """
+
+        if self._inflight_collected:
+            return []
+        self._inflight_collected = True
+        pending = self.journal.pending()
+        if not pending:
+            return []
+
+        log_event(logger, 'inflight_reattach', f"🔗 找回 {len(pending)} 个上次未完成的模拟，先取回结果再开始新的模拟",
+                  count=len(pending))
+        alpha_list = [dict(alpha, _progress_url=location) for location, alpha in pending]
+        outcomes = self._run_simulations(alpha_list, max_workers=min(max_workers, len(alpha_list)))
+        log_event(logger, 'inflight_collected',
+                  f"🔗 已取回 {sum(1 for result in outcomes if result)}/{len(pending)} 个未完成模拟的结果",
+                  collected=sum(1 for result in outcomes if result), total=len(pending))
+        return [result for result in outcomes if result]
+
+    def _simulate_and_measure(self, alpha):
+        """模拟单个 Alpha 并记录总耗时与计数"""
+
+        try:
+            with self.metrics.timer('simulation_total'):
+                result = self._simulate_single_alpha(alpha)
+        except TransientSimulationError:
+            self.metrics.increment('simulations_transient_failures')
+            raise
+        self.metrics.increment('simulations_total')
+        if result is None:
+            self.metrics.increment('simulations_failed')
+        elif result.get('passed_all_checks'):
+            self.metrics.increment('qualified_total')
+        return result
+
+    def report_metrics(self):
+        """导出 Prometheus 指标文件并打印各阶段耗时汇总表"""
+
+        self.metrics.export_prometheus()
+        print("\n⏱️ 运行指标汇总 (详见 alpha_metrics.prom):")
+        print(self.metrics.summary_table())
+        self.cost_model.save()
+        print(self.cost_model.summary())
+        counters = self.metrics.counters
+        rejected = {reason: counters.get(f'preflight_{reason}', 0) for reason in REJECT_REASONS}
+        if any(rejected.values()):
+            details = ", ".join(f"{REJECT_LABELS[reason]} {count}" for reason, count in rejected.items() if count)
+            print(f"🛂 预检: 通过 {counters.get('preflight_passed', 0)}, "
+                  f"拒绝 {sum(rejected.values())} ({details})")
+        if isinstance(self.cassette, ReplayAdapter):
+            report = self.cassette.report()
+            print(f"📼 回放: {report['served']} 个请求, 未录制 {report['misses']} 个, "
+                  f"请求体不匹配 {report['mismatches']} 个")
+
+    @staticmethod
+    def _log_progress(position, total, alpha, result):
+        """每个模拟结果一行进度：序号、是否合格、Alpha ID、主要指标、表达式"""
+
+        expression = alpha.get('regular', '')
+        if not result:
+            log_event(logger, 'simulation_failed', f"[{position}/{total}] ⚠️ 模拟失败 {expression}",
+                      expression=expression)
+            return
+
+        metrics = extract_metrics(result.get('metrics', {}))
+        passed = bool(result.get('passed_all_checks'))
+        log_event(
+            logger, 'simulation_done',
+            f"[{position}/{total}] {'✅' if passed else '❌'} {result.get('alpha_id')} "
+            f"Sharpe={metrics['sharpe']:.2f} Fitness={metrics['fitness']:.2f} "
+            f"Turnover={metrics['turnover']:.2f} {expression}",
+            alpha_id=result.get('alpha_id'), expression=expression, passed=passed,
+            settings=alpha.get('settings', {}), **metrics
+        )
+
+    def _run_screening_stage(self, alpha_list, dataset_name):
+        """多级筛选第一阶段：低成本配置模拟，返回需要生产配置模拟的候选"""
+
+        overrides = get_screening_settings(dataset_name)
+        if not overrides:
+            print(f"数据集 {dataset_name} 不支持多级筛选，直接使用生产配置模拟")
+            return alpha_list
+
+        # 已通过第一阶段的候选（上次中断时）按记录的生产配置直接进入生产模拟
+        pending = self.resume_manager.get_pending_promotions() if self.resume_manager else {}
+        promoted, to_screen = [], []
+        for alpha in alpha_list:
+            expression = alpha.get('regular', '')
+            if expression in pending:
+                promoted.append(dict(alpha, settings=pending.pop(expression)))
+            else:
+                to_screen.append(alpha)
+
+        if promoted:
+            print(f"断点续传: {len(promoted)} 个候选已通过第一阶段，直接进入生产配置模拟")
+
+        screening_list = []
+        for alpha in to_screen:
+            screening_alpha = dict(alpha, settings=dict(alpha['settings'], **overrides))
+            screening_alpha['_production_settings'] = alpha['settings']
+            screening_list.append(screening_alpha)
+
+        if screening_list:
+            print(f"\n多级筛选第一阶段: {len(screening_list)} 个候选, 参数覆盖 {overrides}")
+            print(f"晋级标准: Sharpe >= {SCREENING_THRESHOLDS['min_sharpe']}, "
+                  f"Fitness >= {SCREENING_THRESHOLDS['min_fitness']}")
+            outcomes = self._run_simulations(screening_list)
+            promoted += [
+                alpha for alpha, result in zip(to_screen, outcomes)
+                if self._passes_screening(result)
+            ]
+
+        print(f"\n多级筛选: {len(promoted)}/{len(alpha_list)} 个候选进入生产配置模拟")
+        return promoted
+
+    @staticmethod
+    def _passes_screening(result):
+        """第一阶段结果是否达到晋级标准"""
+
+        if not result:
+            return False
+        metrics = extract_metrics(result.get('metrics', {}))
+        return (metrics['sharpe'] >= SCREENING_THRESHOLDS['min_sharpe'] and
+                metrics['fitness'] >= SCREENING_THRESHOLDS['min_fitness'])
+
+    def _record_simulation_result(self, alpha, result, transient_error=None):
+        """记录单个模拟结果：断点续传标记 + 保存合格 Alpha
+
+        transient_error 不为空时表示多次暂时性失败后放弃：单独记录，不算已测试。
+        """
+
+        if transient_error is not None:
+            if self.resume_manager:
+                self.resume_manager.mark_transient_failure(
+                    alpha.get('regular', ''), alpha.get('_production_settings', alpha.get('settings', {})),
+                    transient_error, alpha.get('_attempts', 1)
+                )
+            return
+
+        # 第一阶段筛选结果：以生产配置为键记录阶段，不保存 Alpha
+        if '_production_settings' in alpha:
+            if self.resume_manager:
+                stage = (ResumeManager.STAGE_SCREENED if self._passes_screening(result)
+                         else ResumeManager.STAGE_SCREENED_OUT)
+                self.resume_manager.mark_expression_tested(
+                    alpha.get('regular', ''), alpha['_production_settings'], result, stage
+                )
+            self.result_store.append(result, stage='screening')
+            self.parameter_optimizer.observe(alpha.get('regular', ''), alpha.get('settings', {}), result)
+            return
+
+        # 标记为已测试（成功或永久性失败）
+        if self.resume_manager:
+            expression = alpha.get('regular', '')
+            parameters = alpha.get('settings', {})
+            self.resume_manager.mark_expression_tested(
+                expression, parameters, result
+            )
+
+        # 保存全部模拟指标，供离线重新评判；同时更新增量统计
+        row = self.result_store.append(result)
+        if row:
+            self.aggregates.update(row)
+
+        # 在线更新参数学习
+        self.parameter_optimizer.observe(alpha.get('regular', ''), alpha.get('settings', {}), result)
+
+        if result and result.get('passed_all_checks'):
+            self._save_alpha_id(result['alpha_id'], result)
+
+    def evolve_alphas(self, dataset_name, generations=5, population_size=20, max_workers=3,
+                      datafields=None):
+        """进化搜索模式：以模拟结果为适应度，逐代变异和交叉表达式
+
+        种群状态保存在 alpha_population.json，中断后再次运行会从上次的代数继续。
+        """
+
+        try:
+            datafields = self._get_datafields_if_none(datafields, dataset_name)
+            if not datafields:
+                return []
+
+            dataset_config = get_dataset_config(dataset_name)
+            dataset_universe = dataset_config['universe'] if dataset_config else None
+
+            population = EvolutionaryPopulation(dataset_name)
+            mutator = ExpressionMutator(datafields, population.random)
+
+            # 初始种群：从基础策略和多因子策略中随机抽样
+            if not population.individuals:
+                strategy_generator = AlphaStrategy()
+                seeds = (strategy_generator.get_simulation_data(datafields, 1) +
+                         strategy_generator.get_simulation_data(datafields, 2))
+                population.random.shuffle(seeds)
+                for expression in seeds:
+                    if len(population.individuals) >= population_size:
+                        break
+                    population.add(expression)
+                population.save()
+
+            qualified = []
+            for _ in range(generations):
+                if self.stop_event.is_set():
+                    break
+                pending = population.pending()
+                if pending:
+                    print(f"\n🧬 第 {population.generation} 代: 模拟 {len(pending)} 个个体")
+                    alpha_list = []
+                    for individual in pending:
+                        optimal_params = self.parameter_optimizer.get_optimal_parameters(
+                            individual['expression'], dataset_universe)
+                        alpha_list.append(self._build_simulation_data(individual['expression'], optimal_params))
+
+                    def on_result(i, result):
+                        self._assign_fitness(pending[i], result)
+                        if result and result.get('passed_all_checks'):
+                            qualified.append(result)
+                        population.save()
+
+                    self._run_simulations(alpha_list, max_workers=max_workers, on_result=on_result)
+                    if self.stop_event.is_set():
+                        break
+
+                ranked = population.evaluated()
+                if ranked:
+                    print(f"\n🧬 第 {population.generation} 代最优适应度: {ranked[0]['fitness']:.3f}")
+                    print(f"   表达式: {ranked[0]['expression']}")
+                    print(f"   合格个体: {sum(1 for ind in ranked if ind['passed'])} 个")
+
+                created = population.next_generation(mutator, population_size)
+                population.save()
+                if created == 0:
+                    print("无法产生新的个体，进化结束")
+                    break
+
+            if self.resume_manager:
+                self.resume_manager.finalize_session()
+            self.report_metrics()
+
+            print(f"\n进化搜索完成，本次获得 {len(qualified)} 个合格Alpha")
+            return qualified
+
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            print(f"进化搜索出错: {str(e)}")
+            return []
+
+    def hill_climb_near_misses(self, max_rounds=3, budget=6, min_score=0.85, max_workers=1):
+        """对近似合格的表达式微调 decay / truncation / neutralization 重新模拟
+
+        每轮从断点续传记录中重新挑选近似合格的表达式（已合格或用完 budget 次的不再尝试），
+        为其安排未测试过的相邻参数组合。
+        """
+
+        if not self.resume_manager:
+            print("参数微调依赖断点续传记录，请启用断点续传")
+            return []
+
+        climber = NearMissClimber(self.resume_manager, budget=budget, min_score=min_score,
+                                  thresholds=self.thresholds)
+        qualified = []
+        try:
+            for round_index in range(1, max_rounds + 1):
+                if self.stop_event.is_set():
+                    break
+                plan = climber.build_round()
+                if not plan:
+                    print("没有可继续微调的近似合格表达式")
+                    break
+
+                print(f"\n🔧 第 {round_index} 轮参数微调: {len(set(e for e, _, _ in plan))} 个表达式, "
+                      f"{len(plan)} 个参数组合")
+                alpha_list = []
+                for expression, settings, score in plan:
+                    alpha = {'type': 'REGULAR', 'settings': settings, 'regular': expression}
+                    alpha['_expression_type'] = self.parameter_optimizer.analyze_expression_type(expression)
+                    alpha_list.append(alpha)
+
+                outcomes = self._run_simulations(alpha_list, max_workers=max_workers)
+                qualified += [result for result in outcomes if result and result.get('passed_all_checks')]
+
+        except KeyboardInterrupt:
+            print("\n用户中断，正在保存进度")
+            self.resume_manager._signal_handler(signal.SIGINT, None)
+            raise
+        except Exception as e:
+            print(f"参数微调出错: {str(e)}")
+
+        self.resume_manager.finalize_session()
+        self.report_metrics()
+        print(f"\n参数微调完成，本次获得 {len(qualified)} 个合格Alpha")
+        return qualified
+
+    def _assign_fitness(self, individual, result):
+        """按提交标准计算个体适应度，模拟失败记为 0"""
+
+        if not result:
+            individual['fitness'] = 0.0
+            return
+
+        metrics = extract_metrics(result.get('metrics', {}))
+        passed = bool(result.get('passed_all_checks'))
+        individual['fitness'] = qualification_score(metrics, passed, thresholds=self.thresholds)
+        individual['passed'] = passed
+        individual['alpha_id'] = result.get('alpha_id')
+
+    def _prescreen_alpha_list(self, alpha_list, dataset_name):
+        """在本地数据上剔除彼此或与已合格 Alpha 高度相关的候选"""
+
+        # numpy 相关模块只在启用预筛选时导入
+        from correlation_filter import CorrelationPreScreen, load_existing_expressions
+        from local_evaluator import load_local_panel
+
+        panel = load_local_panel(dataset_name)
+        if panel is None:
+            print(f"未找到本地数据 local_data/{dataset_name}.npz，跳过相关性预筛选")
+            return alpha_list
+
+        try:
+            print(f"\n相关性预筛选 (阈值 {self.prescreen_threshold})...")
+            screen = CorrelationPreScreen(panel, threshold=self.prescreen_threshold)
+            filtered, stats = screen.filter_alpha_list(alpha_list, load_existing_expressions())
+
+            print(f"   候选数量: {stats['total']} 个")
+            print(f"   与其他候选重复: {stats['duplicate_of_candidates']} 个")
+            print(f"   与已合格Alpha重复: {stats['duplicate_of_existing']} 个")
+            print(f"   无法本地计算(保留): {stats['unscreened']} 个")
+            print(f"   保留待模拟: {stats['kept']} 个")
+            return filtered
+
+        except Exception as e:
+            print(f"相关性预筛选出错，跳过: {str(e)}")
+            return alpha_list
+
     def clear_resume_data(self):
         """清除断点续传数据"""
         if self.resume_manager:
@@ -427,20 +1288,22 @@ class BrainBatchAlpha:
         return {'total_tested': 0, 'session_tested': 0}
 
     def _simulate_single_alpha(self, alpha):
-        """模拟单个 Alpha"""
+        """模拟单个 Alpha；alpha 带 _progress_url 时（上次运行已提交）直接轮询结果"""
 
         try:
             expression = alpha.get('regular', 'Unknown')
-            settings = alpha.get('settings', {})
+            if '_progress_url' in alpha:
+                # 上次运行提交的模拟：从现在开始计时的耗时偏短，不计入完成耗时统计和耗时模型
+                return self._collect_simulation(alpha, alpha['_progress_url'], full_timing=False)
 
-            print(f"表达式: {expression}")
-            print(f"参数配置: Universe={settings.get('universe', 'N/A')}, "
-                  f"Neutralization={settings.get('neutralization', 'N/A')}, "
-                  f"Decay={settings.get('decay', 'N/A')}, "
-                  f"Truncation={settings.get('truncation', 'N/A')}")
+            settings = alpha.get('settings', {})
 
-            if '_expression_type' in alpha:
-                print(f"策略类型: {alpha['_expression_type']}")
+            log_event(logger, 'simulation_start',
+                      f"表达式: {expression} | Universe={settings.get('universe', 'N/A')}, "
+                      f"Neutralization={settings.get('neutralization', 'N/A')}, "
+                      f"Decay={settings.get('decay', 'N/A')}, Truncation={settings.get('truncation', 'N/A')}, "
+                      f"策略类型: {alpha.get('_expression_type', 'N/A')}",
+                      level=logging.DEBUG, expression=expression, settings=settings)
 
             # 发送模拟请求
             simulation_url = f"{self.API_BASE_URL}/simulations"
@@ -448,248 +1311,360 @@ class BrainBatchAlpha:
             # 准备发送给API的数据（移除内部字段）
             api_data = {k: v for k, v in alpha.items() if not k.startswith('_')}
 
-            print(f"模拟请求调试:")
-            print(f"   URL: {simulation_url}")
-            print(f"   请求方法: POST")
-            print(f"   请求头: {dict(self.session.headers)}")
-            print(f"   请求数据: {json.dumps(api_data, indent=2, ensure_ascii=False)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"模拟请求调试:\n   URL: {simulation_url}\n   请求方法: POST\n"
+                             f"   请求数据: {json.dumps(api_data, indent=2, ensure_ascii=False)}")
 
-            sim_resp = self.session.post(simulation_url, json=api_data)
+            for attempt in range(2):
+                with self.metrics.timer('simulation_post'):
+                    sim_resp = self.session.post(simulation_url, json=api_data)
 
-            print(f"模拟响应:")
-            print(f"   状态码: {sim_resp.status_code}")
-            print(f"   响应头: {dict(sim_resp.headers)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"模拟响应:\n   状态码: {sim_resp.status_code}\n"
+                                 f"   响应头: {dict(sim_resp.headers)}\n"
+                                 f"   响应内容: {sim_resp.text[:1000]}")
 
-            if sim_resp.text:
-                print(f"   响应内容: {sim_resp.text[:1000]}")
+                # 401：会话过期，重新认证后再提交一次
+                if sim_resp.status_code != 401 or attempt or not self._reauthenticate():
+                    break
 
             if sim_resp.status_code != 201:
-                print(f"模拟请求失败 (状态码: {sim_resp.status_code})")
+                log_event(logger, 'simulation_rejected',
+                          f"模拟请求失败 (状态码: {sim_resp.status_code}): {sim_resp.text[:300]}",
+                          level=logging.WARNING, expression=expression, status_code=sim_resp.status_code)
 
-                # 尝试解析错误信息
-                try:
-                    error_data = sim_resp.json()
-                    print(f"   错误详情: {json.dumps(error_data, indent=2, ensure_ascii=False)}")
-                except:
-                    print(f"   原始错误: {sim_resp.text}")
+                if sim_resp.status_code == 401:
+                    raise self._authentication_lost()
 
-                # 如果是400错误，提供详细的调试信息
-                if sim_resp.status_code == 400:
-                    print("\n400错误分析:")
-                    print("可能的原因:")
-                    print("1. 请求数据格式错误")
-                    print("2. 必需字段缺失")
-                    print("3. 字段值格式不正确")
-                    print("4. API端点不正确")
-                    print("\n建议:")
-                    print("1. 检查alpha表达式语法")
-                    print("2. 验证所有settings字段")
-                    print("3. 确认API认证状态")
+                # 408、429、5xx：暂时性失败
+                if self._is_transient_status(sim_resp.status_code):
+                    raise TransientSimulationError(f"模拟请求状态码 {sim_resp.status_code}",
+                                                   retry_after=self._retry_after(sim_resp))
 
+                # 400：表达式语法或参数校验错误；403、404 等：权限或地址错误。重试也不会成功
+                if sim_resp.status_code == 400:
+                    logger.debug("400错误分析: 可能是请求数据格式错误、必需字段缺失、字段值格式不正确或API端点不正确；"
+                                 "建议检查alpha表达式语法、验证所有settings字段、确认API认证状态")
                 return None
 
-            try:
-                sim_progress_url = sim_resp.headers['Location']
-                start_time = datetime.now()
-                total_wait = 0
-
-                while True:
-                    sim_progress_resp = self.session.get(sim_progress_url)
-                    retry_after_sec = float(sim_progress_resp.headers.get("Retry-After", 0))
-
-                    if retry_after_sec == 0:  # simulation done!
-                        alpha_id = sim_progress_resp.json()['alpha']
-                        print(f"获得 Alpha ID: {alpha_id}")
-
-                        # 等待一下让指标计算完成
-                        sleep(3)
-
-                        # 获取 Alpha 详情
-                        alpha_url = f"{self.API_BASE_URL}/alphas/{alpha_id}"
-                        alpha_detail = self.session.get(alpha_url)
-                        alpha_data = alpha_detail.json()
-
-                        # 检查是否有 is 字段
-                        if 'is' not in alpha_data:
-                            print("无法获取指标数据")
-                            return None
-
-                        is_qualified = self.check_alpha_qualification(alpha_data)
-
-                        return {
-                            'expression': alpha.get('regular'),
-                            'alpha_id': alpha_id,
-                            'passed_all_checks': is_qualified,
-                            'metrics': alpha_data.get('is', {}),
-                            'parameters': alpha.get('settings', {}),
-                            'expression_type': alpha.get('_expression_type', 'unknown'),
-                            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        }
-
-                    # 更新等待时间和进度
-                    total_wait += retry_after_sec
-                    elapsed = (datetime.now() - start_time).total_seconds()
-                    progress = min(95, (elapsed / 30) * 100)  # 假设通常需要 30 秒完成
-
-                    print(f"等待模拟结果... ({elapsed:.1f} 秒 | 进度约 {progress:.0f}%)")
-                    sleep(retry_after_sec)
-
-            except KeyError:
-                print("无法获取模拟进度 URL")
-                return None
+            if 'Location' not in sim_resp.headers:
+                raise TransientSimulationError("无法获取模拟进度 URL")
+
+            # 模拟已被接受：先写入日志，进程中断后下次启动可以继续取回结果
+            sim_progress_url = sim_resp.headers['Location']
+            self.journal.posted(sim_progress_url, alpha)
+            alpha['_progress_url'] = sim_progress_url
+            return self._collect_simulation(alpha, sim_progress_url)
 
+        except TransientSimulationError:
+            raise
+        except (requests.RequestException, ValueError) as e:
+            # 网络错误或响应无法解析
+            raise TransientSimulationError(f"{type(e).__name__}: {str(e)[:200]}") from e
         except Exception as e:
-            print(f"Alpha 模拟失败: {str(e)}")
+            log_event(logger, 'simulation_error', f"Alpha 模拟失败: {str(e)}",
+                      level=logging.WARNING, expression=alpha.get('regular'))
             return None
 
-    def check_alpha_qualification(self, alpha_data):
-        """检查 Alpha 是否满足所有提交条件"""
+    @staticmethod
+    def _is_transient_status(status_code):
+        """408、429 和 5xx 是暂时性错误；其他 4xx 重试也不会成功"""
+        return status_code in (408, 429) or status_code >= 500
 
+    @staticmethod
+    def _retry_after(response):
+        """响应头中的 Retry-After 秒数，没有或无法解析时为 0"""
         try:
-            # 从 'is' 字段获取指标
-            is_data = alpha_data.get('is', {})
-            if not is_data:
-                print("无法获取指标数据")
-                return False
+            return float(response.headers.get('Retry-After', 0) or 0)
+        except ValueError:
+            return 0.0
 
-            # 获取指标值
-            sharpe = float(is_data.get('sharpe', 0))
-            fitness = float(is_data.get('fitness', 0))
-            turnover = float(is_data.get('turnover', 0))
-            ic_mean = float(is_data.get('margin', 0))  # margin 对应 IC Mean
-
-            # 获取子宇宙 Sharpe
-            sub_universe_check = next(
-                (
-                    check for check in is_data.get('checks', [])
-                    if check['name'] == 'LOW_SUB_UNIVERSE_SHARPE'
-                ),
-                {}
-            )
-            subuniverse_sharpe = float(sub_universe_check.get('value', 0))
-            required_subuniverse_sharpe = float(sub_universe_check.get('limit', 0))
+    def _simulation_deadline(self):
+        """单个模拟的截止秒数：已观测到足够多的完成耗时时取 p99 的倍数，否则为默认值"""
 
-            # 打印指标
-            print("\nAlpha 指标详情:")
-            print(f"  Sharpe: {sharpe:.3f} (>1.5)")
-            print(f"  Fitness: {fitness:.3f} (>1.0)")
-            print(f"  Turnover: {turnover:.3f} (0.1-0.9)")
-            print(f"  IC Mean: {ic_mean:.3f} (>0.02)")
-            print(f"  子宇宙 Sharpe: {subuniverse_sharpe:.3f} (>{required_subuniverse_sharpe:.3f})")
+        completion, count = self.metrics.percentile('simulation_completion', SIMULATION_DEADLINE_PERCENTILE)
+        if count < SIMULATION_DEADLINE_MIN_SAMPLES:
+            return SIMULATION_DEADLINE_DEFAULT
+        return max(SIMULATION_DEADLINE_MIN, completion * SIMULATION_DEADLINE_FACTOR)
 
-            print("\n指标评估结果:")
+    def _cancel_simulation(self, alpha, sim_progress_url, elapsed, deadline):
+        """通过 API 取消超时的模拟（DELETE 进度 URL），记录超时与取消计数"""
 
-            # 检查每个指标并输出结果
-            is_qualified = True
+        self.metrics.increment('simulations_timed_out')
+        try:
+            response = self.session.delete(sim_progress_url)
+            cancelled = response.status_code in (200, 202, 204)
+        except Exception as e:
+            logger.debug(f"取消模拟请求失败: {str(e)}")
+            cancelled = False
+        self.metrics.increment('simulations_cancelled' if cancelled else 'cancel_failed')
+
+        expression = alpha.get('regular', '')
+        log_event(logger, 'simulation_timeout',
+                  f"⏰ 模拟 {elapsed:.0f} 秒未完成（截止 {deadline:.0f} 秒），"
+                  f"{'已取消' if cancelled else '取消失败'}: {expression}",
+                  level=logging.WARNING, expression=expression, elapsed=round(elapsed, 1),
+                  deadline=round(deadline, 1), cancelled=cancelled)
+
+    def _collect_simulation(self, alpha, sim_progress_url, full_timing=True):
+        """轮询模拟进度直到完成，获取 Alpha 详情并判断是否合格
+
+        超过截止时间仍未完成时取消模拟并抛出 SimulationTimeout；轮询时遇到 408/429/5xx 继续等待，
+        401 时重新认证；模拟以 ERROR 结束或进度请求返回其他 4xx 时返回 None（永久性失败），
+        其他无法取得结果的情况抛出 TransientSimulationError。
+        """
+
+        deadline = self._simulation_deadline()
+        start_time = datetime.now()
+        total_wait = 0
+        polls = 0
+        reauthenticated = False
+
+        while True:
+            sim_progress_resp = self.session.get(sim_progress_url)
+            retry_after_sec = self._retry_after(sim_progress_resp)
+            polls += 1
+            self.metrics.increment('polls_total')
+
+            status_code = sim_progress_resp.status_code
+            if self._is_transient_status(status_code):
+                # 平台暂时不可用，模拟仍在进行：继续轮询（受截止时间约束）
+                self.metrics.increment('poll_errors')
+                retry_after_sec = retry_after_sec or 5
+            elif status_code == 401:
+                # 会话过期：重新认证后继续轮询
+                if reauthenticated or not self._reauthenticate():
+                    raise self._authentication_lost()
+                reauthenticated = True
+                retry_after_sec = retry_after_sec or 1
+            elif status_code >= 400:
+                # 403、404 等：模拟不存在或无权访问，重试也不会成功
+                log_event(logger, 'simulation_error', f"模拟进度请求失败 (状态码: {status_code})",
+                          level=logging.WARNING, expression=alpha.get('regular'), status_code=status_code)
+                return None
+            elif retry_after_sec == 0:  # simulation done!
+                progress_data = sim_progress_resp.json()
+                alpha_id = progress_data.get('alpha')
+                if not alpha_id:
+                    if progress_data.get('status') in ('ERROR', 'FAIL'):
+                        log_event(logger, 'simulation_error',
+                                  f"模拟失败: {progress_data.get('message', progress_data.get('status'))}",
+                                  level=logging.WARNING, expression=alpha.get('regular'))
+                        return None
+                    raise TransientSimulationError(f"模拟结果缺少 Alpha ID: {str(progress_data)[:200]}")
+                logger.debug(f"获得 Alpha ID: {alpha_id} (轮询 {polls} 次)")
+                completion = (datetime.now() - start_time).total_seconds()
+                if full_timing:
+                    # 截止时间按这里的百分位计算，只记录从提交开始计时的完整耗时
+                    self.metrics.observe('simulation_completion', completion)
+                    self.cost_model.observe(alpha.get('regular', ''), alpha.get('settings'), completion)
+
+                # 等待一下让指标计算完成
+                self.metrics.sleep(3)
+
+                # 获取 Alpha 详情
+                alpha_url = f"{self.API_BASE_URL}/alphas/{alpha_id}"
+                with self.metrics.timer('detail_fetch'):
+                    alpha_detail = self.session.get(alpha_url)
+                    alpha_data = alpha_detail.json()
+
+                # 检查是否有 is 字段（指标尚未计算完成或请求出错）
+                if 'is' not in alpha_data:
+                    if alpha_detail.status_code == 401:
+                        self._reauthenticate()   # 重新排队时使用新的会话
+                    log_event(logger, 'metrics_missing', f"无法获取指标数据: {alpha_id}",
+                              level=logging.WARNING, alpha_id=alpha_id, status_code=alpha_detail.status_code)
+                    raise TransientSimulationError(f"Alpha {alpha_id} 缺少指标数据",
+                                                   retry_after=self._retry_after(alpha_detail))
+
+                with self.metrics.timer('qualification'):
+                    is_qualified = self.check_alpha_qualification(alpha_data)
+
+                return {
+                    'expression': alpha.get('regular'),
+                    'alpha_id': alpha_id,
+                    'passed_all_checks': is_qualified,
+                    'metrics': alpha_data.get('is', {}),
+                    'parameters': alpha.get('settings', {}),
+                    'expression_type': alpha.get('_expression_type', 'unknown'),
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
 
-            if sharpe < 1.5:
-                print("Sharpe ratio 不达标")
-                is_qualified = False
-            else:
-                print("Sharpe ratio 达标")
+            # 更新等待时间和进度
+            total_wait += retry_after_sec
+            elapsed = (datetime.now() - start_time).total_seconds()
+            progress = min(95, (elapsed / 30) * 100)  # 假设通常需要 30 秒完成
 
-            if fitness < 1.0:
-                print("Fitness 不达标")
-                is_qualified = False
-            else:
-                print("Fitness 达标")
+            if elapsed >= deadline:
+                self._cancel_simulation(alpha, sim_progress_url, elapsed, deadline)
+                raise SimulationTimeout(f"模拟超过截止时间 {deadline:.0f} 秒")
 
-            if turnover < 0.1 or turnover > 0.9:
-                print("Turnover 不在合理范围")
-                is_qualified = False
-            else:
-                print("Turnover 达标")
+            logger.debug(f"等待模拟结果... ({elapsed:.1f} 秒 | 进度约 {progress:.0f}%)")
+            sleep(min(retry_after_sec, deadline - elapsed))
 
-            if ic_mean < 0.02:
-                print("IC Mean 不达标")
-                is_qualified = False
-            else:
-                print("IC Mean 达标")
+    def check_alpha_qualification(self, alpha_data):
+        """检查 Alpha 是否满足所有提交条件"""
 
-            if subuniverse_sharpe < required_subuniverse_sharpe:
-                print(f"子宇宙 Sharpe 不达标 ({subuniverse_sharpe:.3f} < {required_subuniverse_sharpe:.3f})")
-                is_qualified = False
-            else:
-                print(f"子宇宙 Sharpe 达标 ({subuniverse_sharpe:.3f} > {required_subuniverse_sharpe:.3f})")
+        try:
+            # 从 'is' 字段获取指标
+            is_data = alpha_data.get('is', {})
+            if not is_data:
+                logger.warning("无法获取指标数据")
+                return False
+
+            # 获取指标值
+            metrics = extract_metrics(is_data)
+            thresholds = self.thresholds
+            sharpe = metrics['sharpe']
+            fitness = metrics['fitness']
+            turnover = metrics['turnover']
+            ic_mean = metrics['margin']  # margin 对应 IC Mean
+            subuniverse_sharpe = metrics['subuniverse_sharpe']
+            required_subuniverse_sharpe = metrics['required_subuniverse_sharpe']
+
+            # 检查每个指标，(名称, 是否达标)
+            results = [
+                ("Sharpe ratio", sharpe >= thresholds['sharpe']),
+                ("Fitness", fitness >= thresholds['fitness']),
+                ("Turnover", thresholds['turnover_min'] <= turnover <= thresholds['turnover_max']),
+                ("IC Mean", ic_mean >= thresholds['margin']),
+            ]
+            if thresholds['subuniverse']:
+                results.append(("子宇宙 Sharpe", subuniverse_sharpe >= required_subuniverse_sharpe))
 
-            print("\n检查项结果:")
             checks = is_data.get('checks', [])
             for check in checks:
-                name = check.get('name')
-                result = check.get('result')
-                value = check.get('value', 'N/A')
-                limit = check.get('limit', 'N/A')
-
-                if result == 'PASS':
-                    print(f"{name}: {value} (限制: {limit}) - 通过")
-                elif result == 'FAIL':
-                    print(f"{name}: {value} (限制: {limit}) - 失败")
-                    is_qualified = False
-                elif result == 'PENDING':
-                    print(f"{name}: 检查尚未完成")
-                    is_qualified = False
-
-            print("\n最终评判:")
-            if is_qualified:
-                print("Alpha 满足所有条件，可以提交!")
-            else:
-                print("Alpha 未达到提交标准")
+                # 子宇宙 Sharpe 已在上面按配置评判
+                enforced = (thresholds['subuniverse'] if check.get('name') == 'LOW_SUB_UNIVERSE_SHARPE'
+                            else thresholds['platform_checks'])
+                if enforced and check.get('result') in ('FAIL', 'PENDING'):
+                    results.append((check.get('name'), False))
+
+            is_qualified = all(passed for _, passed in results)
+
+            # 详细报告只在 verbose 模式下生成
+            if logger.isEnabledFor(logging.DEBUG):
+                lines = [
+                    "Alpha 指标详情:",
+                    f"  Sharpe: {sharpe:.3f} (>{thresholds['sharpe']})",
+                    f"  Fitness: {fitness:.3f} (>{thresholds['fitness']})",
+                    f"  Turnover: {turnover:.3f} ({thresholds['turnover_min']}-{thresholds['turnover_max']})",
+                    f"  IC Mean: {ic_mean:.3f} (>{thresholds['margin']})",
+                    f"  子宇宙 Sharpe: {subuniverse_sharpe:.3f} (>{required_subuniverse_sharpe:.3f})",
+                    "指标评估结果:",
+                ]
+                lines += [f"  {name} {'达标' if passed else '不达标'}" for name, passed in results]
+                lines.append("检查项结果:")
+                for check in checks:
+                    status = {'PASS': '通过', 'FAIL': '失败', 'PENDING': '检查尚未完成'}.get(check.get('result'),
+                                                                                     check.get('result'))
+                    lines.append(f"  {check.get('name')}: {check.get('value', 'N/A')} "
+                                 f"(限制: {check.get('limit', 'N/A')}) - {status}")
+                lines.append("Alpha 满足所有条件，可以提交!" if is_qualified else "Alpha 未达到提交标准")
+                logger.debug("\n".join(lines))
 
             return is_qualified
 
         except Exception as e:
-            print(f"检查 Alpha 资格时出错: {str(e)}")
+            logger.warning(f"检查 Alpha 资格时出错: {str(e)}")
             return False
 
     def submit_alpha(self, alpha_id):
-        """提交单个 Alpha"""
-
-        submit_url = f"{self.API_BASE_URL}/alphas/{alpha_id}/submit"
-
-        for attempt in range(5):
-            print(f"第 {attempt + 1} 次尝试提交 Alpha {alpha_id}")
-
-            # POST 请求
-            res = self.session.post(submit_url)
-            if res.status_code == 201:
-                print("POST: 成功，等待提交完成...")
-            elif res.status_code in [400, 403]:
-                print(f"提交被拒绝 ({res.status_code})")
-                return False
-            else:
-                sleep(3)
-                continue
+        """提交单个 Alpha（与批量提交使用同一个调度器），返回是否提交成功"""
+        successful, _ = self.submit_multiple_alphas([alpha_id], check_correlation=False, max_concurrent=1)
+        return alpha_id in successful
+
+    def submit_multiple_alphas(self, alpha_ids, check_correlation=True, target=None, max_concurrent=3):
+        """批量提交 Alpha：按顺序调度，最多 max_concurrent 个同时提交
+
+        默认先在本地跳过自相关过高的候选；target 为需要成功提交的数量，
+        达到后不再发起新的提交。每个结果记录到结果存储中。
+        """
+        candidates = self.filter_self_correlated(alpha_ids) if check_correlation else list(alpha_ids)
+        kept = set(candidates)
+        failed = [alpha_id for alpha_id in alpha_ids if alpha_id not in kept]
+
+        def on_outcome(alpha_id, status):
+            self.result_store.append_submission(alpha_id, status)
+            if status == SUBMITTED:
+                self.pnl_store.mark_submitted([alpha_id])
+
+        scheduler = SubmissionScheduler(self.session, self.API_BASE_URL, max_concurrent=max_concurrent,
+                                        metrics=self.metrics)
+        outcomes = scheduler.run(candidates, target=target, on_outcome=on_outcome)
+        self.report_metrics()
+
+        successful = [alpha_id for alpha_id in candidates if outcomes.get(alpha_id) == SUBMITTED]
+        failed += [alpha_id for alpha_id in candidates if outcomes.get(alpha_id) in (REJECTED, FAILED)]
+        return successful, failed
 
-            # 检查提交状态
+    def rank_saved_alphas(self, alpha_ids):
+        """去掉已有最终提交结果或提交前检查未通过的 ID，其余按模拟指标从高到低排序"""
+        finished = {
+            alpha_id for alpha_id, status in self.result_store.submission_outcomes().items()
+            if status in FINAL_STATUSES
+        }
+        check_cache = CheckCache()
+        finished.update(alpha_id for alpha_id in alpha_ids if check_cache.status(alpha_id) == CHECK_FAIL)
+        unique_ids = list(dict.fromkeys(alpha_id for alpha_id in alpha_ids if alpha_id not in finished))
+        return rank_alpha_ids(unique_ids, self.result_store, thresholds=self.thresholds)
+
+    def check_saved_alphas(self, alpha_ids, max_workers=5):
+        """并发执行提交前检查（结果缓存在 submission_checks.json），返回可提交的 ID"""
+        runner = SubmissionCheckRunner(self.session, self.API_BASE_URL, max_workers=max_workers)
+        return runner.run(alpha_ids)
+
+    def fetch_submitted_alpha_ids(self, page_size=100):
+        """从平台获取已提交（OS 阶段）的 Alpha ID，失败时使用本地记录"""
+        submitted = set(self.pnl_store.submitted_ids())
+        url = f"{self.API_BASE_URL}/users/self/alphas"
+        offset = 0
+        try:
             while True:
-                res = self.session.get(submit_url)
-                retry = float(res.headers.get('Retry-After', 0))
-
-                if retry == 0:
-                    if res.status_code == 200:
-                        print("提交成功!")
-                        return True
-                    return False
-
-                sleep(retry)
-
-        return False
-
-    def submit_multiple_alphas(self, alpha_ids):
-        """批量提交 Alpha"""
-        successful = []
-        failed = []
+                response = self.session.get(url, params={
+                    'stage': 'OS', 'limit': page_size, 'offset': offset, 'order': '-dateSubmitted'
+                })
+                if response.status_code != 200:
+                    print(f"⚠️ 获取已提交 Alpha 列表失败: {response.status_code}，使用本地记录")
+                    break
+                data = response.json()
+                results = data.get('results', [])
+                submitted.update(item['id'] for item in results if item.get('id'))
+                offset += len(results)
+                if not results or offset >= data.get('count', 0):
+                    break
+        except Exception as e:
+            print(f"⚠️ 获取已提交 Alpha 列表出错: {str(e)}，使用本地记录")
+        return sorted(submitted)
+
+    def filter_self_correlated(self, alpha_ids, threshold=None):
+        """按日 PnL 相关性在本地剔除与已提交 Alpha 自相关过高的候选，保持原顺序
+
+        日 PnL 在这里按需获取（已缓存的不再请求），不占用模拟结果记录路径。
+        没有 PnL 数据的候选保留，交给平台判断。threshold 默认为 SELF_CORRELATION_THRESHOLD。
+        """
+        if threshold is None:
+            from pnl_store import SELF_CORRELATION_THRESHOLD
+            threshold = SELF_CORRELATION_THRESHOLD
+        try:
+            submitted = self.fetch_submitted_alpha_ids()
+            submitted_set = set(submitted)
+            alpha_ids = [alpha_id for alpha_id in alpha_ids if alpha_id not in submitted_set]
+            for alpha_id in list(alpha_ids) + submitted:
+                self.pnl_store.fetch(self.session, self.API_BASE_URL, alpha_id)
 
-        for alpha_id in alpha_ids:
-            if self.submit_alpha(alpha_id):
-                successful.append(alpha_id)
-            else:
-                failed.append(alpha_id)
+            passed, rejected, missing = self.pnl_store.self_correlation(alpha_ids, submitted, threshold)
+            print(f"\n自相关检查 (阈值 {threshold}, 已提交 {len(submitted)} 个):")
+            print(f"   通过: {len(passed)} 个, 跳过: {len(rejected)} 个, 无 PnL 数据: {len(missing)} 个")
+            for alpha_id, corr in rejected.items():
+                print(f"   跳过 {alpha_id}: 最大自相关 {corr:.3f}")
 
-            if alpha_id != alpha_ids[-1]:
-                sleep(10)
+            kept = set(passed) | set(missing)
+            return [alpha_id for alpha_id in alpha_ids if alpha_id in kept]
 
-        return successful, failed
+        except Exception as e:
+            print(f"自相关检查出错，跳过检查: {str(e)}")
+            return list(alpha_ids)
 
     def _get_datafields_if_none(self, datafields=None, dataset_name=None):
         """获取数据字段列表"""
@@ -715,6 +1690,15 @@ class BrainBatchAlpha:
                 'universe': config['universe']
             }
 
+            # 字段目录缓存未过期时不再分页请求
+            key = catalog_key(config['id'], search_scope['region'], search_scope['delay'], config['universe'])
+            catalog = self.field_catalog.get(key)
+            if catalog is not None:
+                self.validator.add_fields(catalog)
+                matrix_fields = [name for name, field_type in catalog.items() if field_type == 'MATRIX']
+                print(f"使用缓存的数据字段目录: {len(matrix_fields)} 个数据字段")
+                return matrix_fields or None
+
             url_template = (
                 f"{self.API_BASE_URL}/data-fields?"
                 f"instrumentType={search_scope['instrumentType']}"
@@ -741,11 +1725,10 @@ class BrainBatchAlpha:
                     continue
                 all_fields.extend(resp.json()['results'])
 
-            # 过滤矩阵类型字段
-            matrix_fields = [
-                field['id'] for field in all_fields
-                if field.get('type') == 'MATRIX'
-            ]
+            # 缓存完整字段目录（含类型，供表达式预检），过滤矩阵类型字段
+            catalog = self.field_catalog.put(key, all_fields)
+            self.validator.add_fields(catalog)
+            matrix_fields = [name for name, field_type in catalog.items() if field_type == 'MATRIX']
 
             if not matrix_fields:
                 print("未找到可用的数据字段")
@@ -765,7 +1748,8 @@ class BrainBatchAlpha:
             strategy_generator = AlphaStrategy()
 
             # 生成策略列表
-            strategies = strategy_generator.get_simulation_data(datafields, strategy_mode)
+            with self.profiler.phase('generation'):
+                strategies = strategy_generator.get_simulation_data(datafields, strategy_mode)
 
             print(f"生成了 {len(strategies)} 个Alpha表达式")
             print("开始智能参数配置...")
@@ -783,41 +1767,22 @@ class BrainBatchAlpha:
             alpha_list = []
             parameter_stats = {}
 
-            for i, strategy in enumerate(strategies, 1):
-                # 获取智能参数配置，传递数据集Universe约束
-                optimal_params = self.parameter_optimizer.get_optimal_parameters(strategy, dataset_universe)
-
-                # 统计参数使用情况
-                expr_type = optimal_params['expression_type']
-                parameter_stats[expr_type] = parameter_stats.get(expr_type, 0) + 1
-
-                # 构建模拟数据 - 修复格式问题
-                simulation_data = {
-                    'type': 'REGULAR',
-                    'settings': {
-                        'instrumentType': 'EQUITY',
-                        'region': 'USA',
-                        'universe': optimal_params['universe'],
-                        'delay': 1,
-                        'decay': optimal_params['decay'],
-                        'neutralization': optimal_params['neutralization'],
-                        'truncation': optimal_params['truncation'],
-                        'pasteurization': 'ON',
-                        'unitHandling': 'VERIFY',
-                        'nanHandling': 'ON',
-                        'language': 'FASTEXPR',
-                        'visualization': False
-                    },
-                    'regular': strategy
-                }
+            with self.profiler.phase('parameter_assignment'):
+                for i, strategy in enumerate(strategies, 1):
+                    # 获取智能参数配置，传递数据集Universe约束
+                    optimal_params = self.parameter_optimizer.get_optimal_parameters(strategy, dataset_universe)
+
+                    # 统计参数使用情况
+                    expr_type = optimal_params['expression_type']
+                    parameter_stats[expr_type] = parameter_stats.get(expr_type, 0) + 1
 
-                # 添加表达式类型作为额外信息（不发送给API）
-                simulation_data['_expression_type'] = expr_type
-                alpha_list.append(simulation_data)
+                    # 构建模拟数据
+                    simulation_data = self._build_simulation_data(strategy, optimal_params)
+                    alpha_list.append(simulation_data)
 
-                # 显示配置进度
-                if i % 10 == 0 or i == len(strategies):
-                    print(f"已配置 {i}/{len(strategies)} 个Alpha参数")
+                    # 显示配置进度
+                    if i % 10 == 0 or i == len(strategies):
+                        print(f"已配置 {i}/{len(strategies)} 个Alpha参数")
 
             # 显示参数配置统计
             print("\n智能参数配置统计:")
@@ -832,6 +1797,32 @@ class BrainBatchAlpha:
             print(f"生成 Alpha 列表失败: {str(e)}")
             return []
 
+    def _build_simulation_data(self, expression, optimal_params):
+        """按参数配置构建发送给模拟接口的数据"""
+
+        simulation_data = {
+            'type': 'REGULAR',
+            'settings': {
+                'instrumentType': 'EQUITY',
+                'region': 'USA',
+                'universe': optimal_params['universe'],
+                'delay': 1,
+                'decay': optimal_params['decay'],
+                'neutralization': optimal_params['neutralization'],
+                'truncation': optimal_params['truncation'],
+                'pasteurization': 'ON',
+                'unitHandling': 'VERIFY',
+                'nanHandling': 'ON',
+                'language': 'FASTEXPR',
+                'visualization': False
+            },
+            'regular': expression
+        }
+
+        # 添加表达式类型作为额外信息（不发送给API）
+        simulation_data['_expression_type'] = optimal_params['expression_type']
+        return simulation_data
+
     def _save_alpha_id(self, alpha_id, result_data):
         """保存 Alpha ID 和相关信息"""
         try:
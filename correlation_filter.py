@@ -0,0 +1,193 @@
+"""模拟前相关性预筛选模块 - 聚类近似重复的候选 Alpha，每类只保留得分最高者
+
+流程:
+1. 在本地面板数据上计算每个候选表达式的信号，并做每日截面排名
+2. 按得分（本地近似 Sharpe）从高到低贪心聚类：
+   与已保留候选或已合格 Alpha 的相关系数超过阈值的候选被剔除
+3. 相关系数矩阵按块计算，内存占用与块大小成正比
+"""
+
+import os
+
+import numpy as np
+
+from local_evaluator import (LocalEvaluator, UnsupportedExpressionError,
+                             cross_sectional_rank)
+from alpha_expression import ExpressionSyntaxError
+from result_store import iter_json_array
+
+
+def blocked_max_correlation(candidates, reference, block_size=256, absolute=True):
+    """每个候选与参考集合的最大相关系数（分块计算）
+
+    candidates (m, L) 与 reference (n, L) 的每一行都应是去均值后的单位向量，
+    内积即为相关系数；内存占用为 block_size × block_size。
+    """
+    result = np.full(len(candidates), 0.0 if absolute else -1.0, dtype=np.float32)
+    if len(candidates) == 0 or len(reference) == 0:
+        return result
+    for start in range(0, len(candidates), block_size):
+        block = candidates[start:start + block_size]
+        for ref_start in range(0, len(reference), block_size):
+            corr = block @ reference[ref_start:ref_start + block_size].T
+            corr = (np.abs(corr) if absolute else corr).max(axis=1)
+            result[start:start + len(block)] = np.maximum(result[start:start + len(block)], corr)
+    return result
+
+
+def load_existing_expressions(details_file="alpha_details.json"):
+    """读取已合格 Alpha 的表达式列表"""
+    if not os.path.exists(details_file):
+        return []
+
+    try:
+        return [item['expression'] for item in iter_json_array(details_file) if item.get('expression')]
+    except Exception as e:
+        print(f"⚠️ 读取已合格 Alpha 失败: {str(e)}")
+        return []
+
+
+class CorrelationPreScreen:
+    """基于本地信号相关性的候选预筛选器"""
+
+    def __init__(self, panel, threshold=0.7, block_size=256, sample_days=64, nan_handling='ON'):
+        """
+        Args:
+            panel: 本地面板数据 {字段名: (T, N) 数组}
+            threshold: 相关系数阈值，超过即视为近似重复
+            block_size: 分块矩阵乘法的块大小
+            sample_days: 参与相关性计算的采样天数（取最近的时间段等间隔采样）
+        """
+        self.panel = panel
+        self.threshold = threshold
+        self.block_size = block_size
+        self.sample_days = sample_days
+        self.evaluator = LocalEvaluator(panel, nan_handling)
+
+    def _sample_rows(self, n_rows):
+        lookback = min(n_rows, self.sample_days * 4)
+        rows = np.linspace(n_rows - lookback, n_rows - 1, min(self.sample_days, lookback))
+        return np.unique(rows.astype(int))
+
+    def _signal_vector(self, signal, rows):
+        """截面排名后去均值并展平为单位向量"""
+        ranks = cross_sectional_rank(signal[rows])
+        valid = ~np.isnan(ranks)
+        counts = np.maximum(valid.sum(axis=1, keepdims=True), 1)
+        ranks = np.where(valid, ranks - np.nansum(ranks, axis=1, keepdims=True) / counts, 0.0)
+        vector = ranks.ravel().astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _local_sharpe(self, signal):
+        """以截面排名为权重、次日收益为回报的年化 Sharpe"""
+        returns = self.panel.get('returns')
+        if returns is None:
+            return 0.0
+        weights = cross_sectional_rank(signal) - 0.5
+        weights /= np.nansum(np.abs(weights), axis=1, keepdims=True)
+        pnl = np.nansum(weights[:-1] * returns[1:], axis=1)
+        std = pnl.std()
+        return float(pnl.mean() / std * np.sqrt(252)) if std > 0 else 0.0
+
+    def build_signals(self, expressions):
+        """计算表达式信号矩阵
+
+        Returns:
+            (信号矩阵 (m, L), 得分数组, 可计算的表达式下标, 失败的表达式下标)
+        """
+        n_rows = next(v.shape[0] for v in self.panel.values() if np.ndim(v) == 2)
+        rows = self._sample_rows(n_rows)
+        vectors, scores, ok, failed = [], [], [], []
+        signal_cache = {}
+
+        for i, expression in enumerate(expressions):
+            try:
+                if expression not in signal_cache:
+                    signal = self.evaluator.evaluate_expression(expression)
+                    signal_cache[expression] = (self._signal_vector(signal, rows), self._local_sharpe(signal))
+                    self.evaluator.clear_cache()
+                vector, score = signal_cache[expression]
+            except (UnsupportedExpressionError, ExpressionSyntaxError):
+                failed.append(i)
+                continue
+            vectors.append(vector)
+            scores.append(score)
+            ok.append(i)
+
+        width = len(rows) * next(v.shape[1] for v in self.panel.values() if np.ndim(v) == 2)
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, width), dtype=np.float32)
+        return matrix, np.array(scores), ok, failed
+
+    def blocked_max_correlation(self, candidates, reference):
+        """每个候选与参考集合的最大相关系数（分块计算）"""
+        return blocked_max_correlation(candidates, reference, self.block_size)
+
+    def cluster(self, signals, scores, existing=None):
+        """按得分贪心聚类
+
+        Returns:
+            (保留的下标列表, {被剔除下标: 代表下标，-1 表示与已合格 Alpha 重复})
+        """
+        existing_corr = self.blocked_max_correlation(
+            signals, existing if existing is not None else np.zeros((0, signals.shape[1]), np.float32))
+        order = np.argsort(-scores, kind='stable')
+
+        kept = []
+        kept_vectors = np.zeros((0, signals.shape[1]), dtype=np.float32)
+        assignment = {}
+
+        for start in range(0, len(order), self.block_size):
+            block_idx = order[start:start + self.block_size]
+            block = signals[block_idx]
+            prev_corr = np.abs(block @ kept_vectors.T) if len(kept_vectors) else np.zeros((len(block), 0))
+            inner_corr = np.abs(block @ block.T)
+            block_kept = []
+
+            for j, idx in enumerate(block_idx):
+                if existing_corr[idx] > self.threshold:
+                    assignment[int(idx)] = -1
+                    continue
+
+                best_corr, best_rep = 0.0, None
+                if prev_corr.shape[1]:
+                    k = int(np.argmax(prev_corr[j]))
+                    best_corr, best_rep = prev_corr[j, k], kept[k]
+                for b in block_kept:
+                    if inner_corr[j, b] > best_corr:
+                        best_corr, best_rep = inner_corr[j, b], int(block_idx[b])
+
+                if best_corr > self.threshold:
+                    assignment[int(idx)] = best_rep
+                else:
+                    block_kept.append(j)
+
+            kept.extend(int(block_idx[b]) for b in block_kept)
+            kept_vectors = np.vstack([kept_vectors, block[block_kept]])
+
+        return kept, assignment
+
+    def filter_alpha_list(self, alpha_list, existing_expressions=None):
+        """过滤候选 Alpha 列表，返回 (保留列表, 统计信息)
+
+        无法在本地计算的候选直接保留，交由平台模拟。
+        """
+        expressions = [alpha.get('regular', '') for alpha in alpha_list]
+        signals, scores, ok, failed = self.build_signals(expressions)
+
+        existing = None
+        if existing_expressions:
+            existing, _, _, _ = self.build_signals(existing_expressions)
+
+        kept, assignment = self.cluster(signals, scores, existing)
+        keep_positions = set(failed) | {ok[i] for i in kept}
+        filtered = [alpha for i, alpha in enumerate(alpha_list) if i in keep_positions]
+
+        stats = {
+            'total': len(alpha_list),
+            'kept': len(filtered),
+            'unscreened': len(failed),
+            'duplicate_of_candidates': sum(1 for rep in assignment.values() if rep >= 0),
+            'duplicate_of_existing': sum(1 for rep in assignment.values() if rep < 0),
+        }
+        return filtered, stats
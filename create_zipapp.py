@@ -4,6 +4,78 @@ import shutil
 import subprocess
 import sys
 
+REQUIREMENTS = {'requests': '2.31.0', 'pandas': '2.0.0', 'numpy': '1.24.0'}
+
+BOOTSTRAP = """
+import os
+import sys
+
+REQUIREMENTS = __REQUIREMENTS__
+DEPS_CACHE = os.path.join(os.path.expanduser('~'), '.alpha_tool_deps')
+
+
+def _cache_key():
+    requirements = ','.join(f"{name}>={version}" for name, version in sorted(REQUIREMENTS.items()))
+    return f"{sys.executable}|{sys.version}|{requirements}"
+
+
+def _version_tuple(version):
+    parts = []
+    for part in version.split('.')[:3]:
+        digits = ''
+        for ch in part:
+            if not ch.isdigit():
+                break
+            digits += ch
+        parts.append(int(digits or 0))
+    return tuple(parts)
+
+
+def install_deps(force=False):
+    \"\"\"检查依赖；上次检查通过且解释器未变时直接返回\"\"\"
+    if not force:
+        try:
+            with open(DEPS_CACHE, 'r', encoding='utf-8') as f:
+                if f.read() == _cache_key():
+                    return
+        except OSError:
+            pass
+
+    from importlib import metadata
+
+    missing = []
+    for name, minimum in REQUIREMENTS.items():
+        try:
+            if _version_tuple(metadata.version(name)) >= _version_tuple(minimum):
+                continue
+        except metadata.PackageNotFoundError:
+            pass
+        missing.append(f"{name}>={minimum}")
+
+    if missing:
+        import subprocess
+        subprocess.check_call([sys.executable, '-m', 'pip', 'install', *missing])
+
+    try:
+        with open(DEPS_CACHE, 'w', encoding='utf-8') as f:
+            f.write(_cache_key())
+    except OSError:
+        pass
+
+
+if __name__ == '__main__':
+    # 安装依赖
+    install_deps()
+
+    # 导入主程序；缓存过期（依赖被卸载）时重新检查一次
+    try:
+        from main import main
+    except ImportError:
+        install_deps(force=True)
+        from main import main
+    main()
+"""
+
 
 def create_zipapp():
     # 创建临时目录
@@ -18,6 +90,30 @@ def create_zipapp():
         "brain_batch_alpha.py",
         "alpha_strategy.py",
         "dataset_config.py",
+        "alpha_expression.py",
+        "ts_kernels.py",
+        "local_evaluator.py",
+        "correlation_filter.py",
+        "template_engine.py",
+        "qualification_rules.py",
+        "evolution.py",
+        "parameter_bandit.py",
+        "near_miss.py",
+        "alpha_logging.py",
+        "run_metrics.py",
+        "result_store.py",
+        "result_aggregates.py",
+        "pnl_store.py",
+        "submission_scheduler.py",
+        "submission_checks.py",
+        "requalify.py",
+        "http_cassette.py",
+        "profiling.py",
+        "daemon.py",
+        "simulation_journal.py",
+        "expression_validator.py",
+        "datafield_catalog.py",
+        "simulation_cost.py",
     ]
 
     for file in source_files:
@@ -37,45 +133,21 @@ def create_zipapp():
 
     # 创建 requirements.txt
     with open(os.path.join(build_dir, "requirements.txt"), "w") as f:
-        f.write("requests>=2.31.0\npandas>=2.0.0\n")
+        f.write("".join(f"{name}>={version}\n" for name, version in REQUIREMENTS.items()))
 
-    # 创建 __main__.py
+    # 创建 __main__.py：依赖检查结果按解释器缓存在用户目录，检查通过后每次启动只读一个小文件
     with open(os.path.join(build_dir, "__main__.py"), "w") as f:
-        f.write("""
-import sys
-import os
-
-
-def install_deps():
-    import subprocess
-    import pkg_resources
-
-    required = {'requests>=2.31.0', 'pandas>=2.0.0'}
-    installed = {f"{pkg.key}=={pkg.version}" for pkg in pkg_resources.working_set}
-    missing = required - installed
-
-    if missing:
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', *missing])
-
-
-if __name__ == '__main__':
-    # 安装依赖
-    install_deps()
-
-    # 导入主程序
-    from main import main
-    main()
-""")
+        f.write(BOOTSTRAP.replace("__REQUIREMENTS__", repr(REQUIREMENTS)))
 
     # 创建可执行文件
     output = "Alpha_Tool.pyz"
     if os.path.exists(output):
         os.remove(output)
 
+    # 目录中已有 __main__.py，不能再指定 main 参数
     zipapp.create_archive(
         build_dir,
         output,
-        main="__main__:main",
         compressed=True
     )
 
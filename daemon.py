@@ -0,0 +1,164 @@
+"""守护模式 - 无人值守地循环模拟配置中的数据集与策略
+
+每一轮按 daemon_config.json 依次运行 (数据集, 策略)；某个数据集的候选全部测试过
+（断点续传过滤后为空）时，改用进化搜索产生新的候选。配置文件和
+qualification_thresholds.json 在每个任务开始前检查修改时间，修改后立即生效。
+
+第一次收到 SIGTERM / SIGINT 时不再开始新的模拟，等待进行中的模拟完成并保存后退出；
+再次收到信号时立即保存断点续传记录并退出。
+"""
+
+import json
+import os
+import signal
+
+from alpha_logging import get_logger, log_event
+from dataset_config import get_dataset_config
+from qualification_rules import THRESHOLDS_FILE, load_thresholds
+
+DAEMON_CONFIG_FILE = "daemon_config.json"
+DEFAULT_DAEMON_CONFIG = {
+    'datasets': ['fundamental6'],
+    'strategies': [1, 2],            # 1 基础策略, 2 多因子组合, 3 进化搜索
+    'screening': False,              # 策略 1/2 是否启用多级筛选
+    'evolution_generations': 3,      # 候选耗尽时进化搜索的代数
+    'hill_climb_rounds': 1,          # 每轮结束时对近似合格 Alpha 参数微调的轮数，0 为关闭
+    'submit_per_cycle': 0,           # 每轮结束时提交的合格 Alpha 数量，0 为不提交
+    'idle_sleep': 300,               # 一轮没有任何新模拟时的等待秒数
+}
+
+logger = get_logger(__name__)
+
+
+def load_daemon_config(path=DAEMON_CONFIG_FILE):
+    """读取并校验守护模式配置，返回 (配置, 错误信息)；文件不存在时使用默认配置"""
+    config = dict(DEFAULT_DAEMON_CONFIG)
+    if not os.path.exists(path):
+        return config, None
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    except Exception as e:
+        return None, f"读取 {path} 失败: {str(e)}"
+
+    unknown = [name for name in config['datasets'] if not get_dataset_config(name)]
+    if unknown:
+        return None, f"未知的数据集: {unknown}"
+    invalid = [mode for mode in config['strategies'] if mode not in (1, 2, 3)]
+    if invalid or not config['strategies'] or not config['datasets']:
+        return None, f"策略或数据集列表无效: strategies={config['strategies']}, datasets={config['datasets']}"
+    return config, None
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class AlphaDaemon:
+    """循环运行模拟任务的守护进程"""
+
+    def __init__(self, brain, config_path=DAEMON_CONFIG_FILE, on_cycle_end=None):
+        """
+        Args:
+            brain: BrainBatchAlpha 实例
+            on_cycle_end(brain, config): 每轮结束时调用（例如提交合格 Alpha）
+        """
+        self.brain = brain
+        self.config_path = config_path
+        self.on_cycle_end = on_cycle_end
+        self.config, error = load_daemon_config(config_path)
+        if error:
+            print(f"⚠️ {error}，使用默认配置")
+            self.config = dict(DEFAULT_DAEMON_CONFIG)
+        self._mtimes = {config_path: _mtime(config_path), THRESHOLDS_FILE: _mtime(THRESHOLDS_FILE)}
+        self.cycle = 0
+
+    def install_signal_handlers(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._handle_signal)
+
+    def _handle_signal(self, signum, frame):
+        if self.brain.stop_event.is_set():
+            # 第二次信号：立即退出
+            if self.brain.resume_manager:
+                self.brain.resume_manager._signal_handler(signum, frame)
+            raise SystemExit(1)
+        self.brain.request_stop()
+
+    def reload_if_changed(self):
+        """配置或阈值文件修改后重新加载；新配置无效时保留原配置"""
+        mtime = _mtime(self.config_path)
+        if mtime != self._mtimes[self.config_path]:
+            self._mtimes[self.config_path] = mtime
+            config, error = load_daemon_config(self.config_path)
+            if error:
+                log_event(logger, 'daemon_config_invalid', f"⚠️ {error}，继续使用原配置")
+            else:
+                self.config = config
+                log_event(logger, 'daemon_config_reloaded', f"🔁 已重新加载 {self.config_path}", config=config)
+
+        mtime = _mtime(THRESHOLDS_FILE)
+        if mtime != self._mtimes[THRESHOLDS_FILE]:
+            self._mtimes[THRESHOLDS_FILE] = mtime
+            self.brain.set_thresholds(load_thresholds())
+            log_event(logger, 'thresholds_reloaded', f"🔁 已重新加载 {THRESHOLDS_FILE}",
+                      thresholds=self.brain.thresholds)
+
+    def _simulations_done(self):
+        return self.brain.metrics.counters.get('simulations_total', 0)
+
+    def run_cycle(self):
+        """运行一轮全部 (数据集, 策略)，返回本轮新完成的模拟数"""
+        self.reload_if_changed()
+        start = self._simulations_done()
+        for dataset_name in list(self.config['datasets']):
+            dataset_start = self._simulations_done()
+            for strategy_mode in list(self.config['strategies']):
+                if self.brain.stop_event.is_set():
+                    return self._simulations_done() - start
+                self.reload_if_changed()
+                log_event(logger, 'daemon_task', f"\n🛰️ 第 {self.cycle} 轮: 数据集 {dataset_name}, 策略 {strategy_mode}",
+                          cycle=self.cycle, dataset=dataset_name, strategy=strategy_mode)
+                self.brain.simulate_alphas(None, strategy_mode, dataset_name,
+                                           screening=self.config['screening'] and strategy_mode != 3)
+
+            # 该数据集的候选已全部测试过：用进化搜索产生新的候选
+            if self._simulations_done() == dataset_start and not self.brain.stop_event.is_set():
+                log_event(logger, 'daemon_refill', f"🧬 {dataset_name} 的候选已全部测试，进化搜索产生新候选",
+                          dataset=dataset_name)
+                self.brain.evolve_alphas(dataset_name, generations=self.config['evolution_generations'])
+
+        if self.config['hill_climb_rounds'] > 0 and not self.brain.stop_event.is_set():
+            self.brain.hill_climb_near_misses(max_rounds=self.config['hill_climb_rounds'])
+        return self._simulations_done() - start
+
+    def run(self, max_cycles=None):
+        """循环运行直到收到停止信号（或完成 max_cycles 轮）"""
+        self.install_signal_handlers()
+        print(f"🛰️ 守护模式启动: 数据集 {self.config['datasets']}, 策略 {self.config['strategies']} "
+              f"(配置文件 {self.config_path}，修改后自动生效；SIGTERM/Ctrl+C 优雅退出)")
+
+        while not self.brain.stop_event.is_set():
+            if max_cycles is not None and self.cycle >= max_cycles:
+                break
+            self.cycle += 1
+            simulated = self.run_cycle()
+
+            if self.on_cycle_end and not self.brain.stop_event.is_set():
+                self.on_cycle_end(self.brain, self.config)
+            log_event(logger, 'daemon_cycle_done', f"🛰️ 第 {self.cycle} 轮完成: {simulated} 次模拟",
+                      cycle=self.cycle, simulations=simulated)
+
+            if simulated == 0 and not self.brain.stop_event.is_set():
+                print(f"本轮没有新的模拟，{self.config['idle_sleep']} 秒后重试")
+                self.brain.stop_event.wait(self.config['idle_sleep'])
+
+        if self.brain.resume_manager:
+            self.brain.resume_manager.finalize_session()
+        self.brain.report_metrics()
+        self.brain.close()
+        print("🛰️ 守护模式已退出，进度已保存")
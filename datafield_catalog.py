@@ -0,0 +1,60 @@
+"""数据字段目录缓存 - 按 (地区, 延迟, 股票池, 数据集) 保存字段 ID 与类型
+
+获取一个数据集的全部字段需要分页请求数据字段接口，结果带时间戳保存在
+datafield_catalog.json，过期前直接使用缓存；字段类型（MATRIX / VECTOR / GROUP）
+同时供表达式预检使用。
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+CATALOG_FILE = "datafield_catalog.json"
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def catalog_key(dataset_id, region='USA', delay=1, universe='TOP3000'):
+    return f"{region}/{delay}/{universe}/{dataset_id}"
+
+
+class DataFieldCatalog:
+    """带时间戳的数据字段目录缓存"""
+
+    def __init__(self, path=CATALOG_FILE, max_age_hours=24 * 7):
+        self.path = path
+        self.max_age = timedelta(hours=max_age_hours)
+        self.entries = self._load()   # {键: {'fields': {字段: 类型}, 'fetched_at'}}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ 加载数据字段目录失败: {str(e)}")
+            return {}
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"⚠️ 保存数据字段目录失败: {str(e)}")
+
+    def get(self, key, now=None):
+        """未过期的字段目录 {字段: 类型}，没有时返回 None"""
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+        fetched_at = datetime.strptime(entry['fetched_at'], TIME_FORMAT)
+        if (now or datetime.now()) - fetched_at >= self.max_age:
+            return None
+        return entry['fields']
+
+    def put(self, key, fields):
+        """保存数据字段接口返回的字段列表 [{'id', 'type'}]，返回 {字段: 类型}"""
+        catalog = {field['id']: field.get('type', 'MATRIX') for field in fields if field.get('id')}
+        self.entries[key] = {'fields': catalog, 'fetched_at': datetime.now().strftime(TIME_FORMAT)}
+        self.save()
+        return catalog
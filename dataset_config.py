@@ -1,10 +1,17 @@
 """数据集配置管理模块"""
 
+# 多级筛选第一阶段的晋级标准（第一阶段 Sharpe/Fitness 同时达到才进入生产配置模拟）
+SCREENING_THRESHOLDS = {
+    'min_sharpe': 1.0,
+    'min_fitness': 0.6,
+}
+
 DATASET_CONFIGS = {
     'fundamental6': {
         'id': 'fundamental6',
         'universe': 'TOP3000',
         'description': '基础财务数据',
+        'screening': {'universe': 'TOP1000'},
         'api_settings': {
             'instrumentType': 'EQUITY',
             'region': 'USA',
@@ -27,6 +34,7 @@ DATASET_CONFIGS = {
         'id': 'analyst4',
         'universe': 'TOP1000',
         'description': '分析师预测数据',
+        'screening': {'universe': 'TOP500'},
         'api_settings': {
             'instrumentType': 'EQUITY',
             'region': 'USA',
@@ -48,6 +56,7 @@ DATASET_CONFIGS = {
         'id': 'pv1',
         'universe': 'TOP1000',
         'description': '股市成交量数据',
+        'screening': {'universe': 'TOP500'},
         'api_settings': {
             'instrumentType': 'EQUITY',
             'region': 'USA',
@@ -108,3 +117,12 @@ def get_api_settings(dataset_name):
         settings['universe'] = config['universe']
         return settings
     return None
+
+
+def get_screening_settings(dataset_name):
+    """获取指定数据集多级筛选第一阶段的参数覆盖（如更小的 Universe），不支持时返回 None"""
+
+    config = DATASET_CONFIGS.get(dataset_name)
+    if config and config.get('screening'):
+        return dict(config['screening'])
+    return None
@@ -0,0 +1,262 @@
+"""进化搜索模块 - 以模拟结果为适应度，对表达式语法树做变异和交叉
+
+种群状态按数据集保存在 alpha_population.json，中断后可以继续进化。
+"""
+
+import copy
+import json
+import os
+import random
+from datetime import datetime
+
+from alpha_expression import (BinaryOp, Call, ExpressionSyntaxError, Field,
+                              Number, parse_expression, walk)
+
+POPULATION_FILE = "alpha_population.json"
+
+# 常用窗口长度，变异时在相邻档位之间移动
+WINDOW_CHOICES = [3, 5, 10, 20, 30, 50, 60, 120, 252]
+
+# 参数签名相同、可以互换的算子族
+OPERATOR_FAMILIES = [
+    ['ts_mean', 'ts_sum', 'ts_std_dev', 'ts_rank', 'ts_zscore', 'ts_delta', 'ts_decay_linear'],
+    ['rank', 'zscore', 'scale'],
+    ['group_rank', 'group_neutralize', 'group_zscore'],
+    ['abs', 'sign', 'log'],
+]
+BINARY_FAMILIES = [['+', '-'], ['*', '/'], ['<', '>']]
+GROUP_FIELDS = ['market', 'sector', 'industry', 'subindustry']
+
+# 只有这些算子的第二个数值参数是窗口长度
+WINDOW_OPERATORS = {
+    'ts_mean', 'ts_sum', 'ts_std_dev', 'ts_rank', 'ts_zscore', 'ts_delta', 'ts_decay_linear',
+    'ts_corr', 'ts_decay_exp_window', 'delay', 'ts_delay', 'delta'
+}
+
+
+def _replace_child(parent, old, new):
+    """在父节点中把子节点 old 替换为 new"""
+    if isinstance(parent, Call):
+        parent.args = [new if arg is old else arg for arg in parent.args]
+        parent.kwargs = [(k, new if v is old else v) for k, v in parent.kwargs]
+    else:
+        for attr in ('operand', 'left', 'right', 'condition', 'if_true', 'if_false'):
+            if getattr(parent, attr, None) is old:
+                setattr(parent, attr, new)
+
+
+def _parent_map(root):
+    """{id(子节点): 父节点}"""
+    parents = {}
+    for node in walk(root):
+        for child in node.children():
+            parents[id(child)] = node
+    return parents
+
+
+class ExpressionMutator:
+    """语法树变异与交叉"""
+
+    def __init__(self, fields, rng=None):
+        self.fields = list(fields)
+        self.random = rng or random.Random()
+
+    def _window_nodes(self, tree):
+        nodes = []
+        for node in walk(tree):
+            if isinstance(node, Call) and node.name in WINDOW_OPERATORS:
+                numbers = [arg for arg in node.args[1:] if isinstance(arg, Number)]
+                if numbers and isinstance(numbers[0].value, int) and numbers[0].value > 0:
+                    nodes.append(numbers[0])
+        return nodes
+
+    def mutate_window(self, tree):
+        """把某个窗口长度移到相邻档位"""
+        candidates = self._window_nodes(tree)
+        if not candidates:
+            return False
+        node = self.random.choice(candidates)
+        position = min(range(len(WINDOW_CHOICES)), key=lambda i: abs(WINDOW_CHOICES[i] - node.value))
+        step = self.random.choice([-1, 1])
+        position = max(0, min(len(WINDOW_CHOICES) - 1, position + step))
+        if WINDOW_CHOICES[position] == node.value:
+            position = max(0, min(len(WINDOW_CHOICES) - 1, position - 2 * step))
+        node.value = WINDOW_CHOICES[position]
+        return True
+
+    def mutate_operator(self, tree):
+        """在同族算子之间互换"""
+        candidates = []
+        for node in walk(tree):
+            if isinstance(node, Call):
+                family = next((f for f in OPERATOR_FAMILIES if node.name in f), None)
+                if family:
+                    candidates.append((node, family))
+            elif isinstance(node, BinaryOp):
+                family = next((f for f in BINARY_FAMILIES if node.op in f), None)
+                if family:
+                    candidates.append((node, family))
+        if not candidates:
+            return False
+
+        node, family = self.random.choice(candidates)
+        if isinstance(node, Call):
+            node.name = self.random.choice([name for name in family if name != node.name])
+        else:
+            node.op = self.random.choice([op for op in family if op != node.op])
+        return True
+
+    def mutate_field(self, tree):
+        """替换数据字段或分组字段"""
+        candidates = [node for node in walk(tree) if isinstance(node, Field)]
+        if not candidates:
+            return False
+
+        node = self.random.choice(candidates)
+        pool = GROUP_FIELDS if node.name in GROUP_FIELDS else self.fields
+        choices = [name for name in pool if name != node.name]
+        if not choices:
+            return False
+        node.name = self.random.choice(choices)
+        return True
+
+    def mutate(self, expression):
+        """随机选择一种变异，返回新表达式；无法变异时返回 None"""
+        tree = parse_expression(expression)
+        operators = [self.mutate_window, self.mutate_operator, self.mutate_field]
+        self.random.shuffle(operators)
+        for operator in operators:
+            if operator(tree):
+                return tree.to_expression()
+        return None
+
+    def crossover(self, expression_a, expression_b):
+        """子树交叉：用 B 的随机子树替换 A 的随机子树"""
+        tree_a = parse_expression(expression_a)
+        tree_b = parse_expression(expression_b)
+
+        # 只交换非叶子节点，避免退化为单纯的字段替换
+        subtrees_a = [n for n in walk(tree_a) if n.children() and n is not tree_a]
+        subtrees_b = [n for n in walk(tree_b) if n.children()]
+        if not subtrees_a or not subtrees_b:
+            return None
+
+        target = self.random.choice(subtrees_a)
+        donor = copy.deepcopy(self.random.choice(subtrees_b))
+        _replace_child(_parent_map(tree_a)[id(target)], target, donor)
+        return tree_a.to_expression()
+
+
+class EvolutionaryPopulation:
+    """可持久化的表达式种群"""
+
+    def __init__(self, dataset_name, population_file=POPULATION_FILE, seed=None):
+        self.dataset_name = dataset_name
+        self.population_file = population_file
+        self.random = random.Random(seed)
+        self.generation = 0
+        self.individuals = []   # [{'expression', 'fitness', 'alpha_id', 'passed', 'generation'}]
+        self.seen = set()       # 出现过的表达式，避免重复模拟
+        self.history = []       # 每代最优适应度
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.population_file):
+            return
+        try:
+            with open(self.population_file, 'r', encoding='utf-8') as f:
+                state = json.load(f).get(self.dataset_name)
+            if state:
+                self.generation = state['generation']
+                self.individuals = state['individuals']
+                self.seen = set(state['seen'])
+                self.history = state.get('history', [])
+                print(f"加载进化种群: 第 {self.generation} 代, {len(self.individuals)} 个个体")
+        except Exception as e:
+            print(f"⚠️ 加载进化种群失败: {str(e)}")
+
+    def save(self):
+        """保存种群状态（同一文件中保留其他数据集的种群）"""
+        try:
+            all_states = {}
+            if os.path.exists(self.population_file):
+                with open(self.population_file, 'r', encoding='utf-8') as f:
+                    all_states = json.load(f)
+            all_states[self.dataset_name] = {
+                'generation': self.generation,
+                'individuals': self.individuals,
+                'seen': sorted(self.seen),
+                'history': self.history,
+                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            with open(self.population_file, 'w', encoding='utf-8') as f:
+                json.dump(all_states, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"⚠️ 保存进化种群失败: {str(e)}")
+
+    def add(self, expression):
+        """加入未评估的新个体，重复表达式返回 False"""
+        try:
+            expression = parse_expression(expression).to_expression()
+        except ExpressionSyntaxError:
+            return False
+        if expression in self.seen:
+            return False
+        self.seen.add(expression)
+        self.individuals.append({
+            'expression': expression,
+            'fitness': None,
+            'alpha_id': None,
+            'passed': False,
+            'generation': self.generation
+        })
+        return True
+
+    def pending(self):
+        """尚未评估的个体"""
+        return [ind for ind in self.individuals if ind['fitness'] is None]
+
+    def evaluated(self):
+        """已评估个体，按适应度从高到低排序"""
+        return sorted(
+            (ind for ind in self.individuals if ind['fitness'] is not None),
+            key=lambda ind: ind['fitness'], reverse=True
+        )
+
+    def _tournament(self, ranked, size=3):
+        contenders = self.random.sample(ranked, min(size, len(ranked)))
+        return max(contenders, key=lambda ind: ind['fitness'])
+
+    def next_generation(self, mutator, population_size, elite_count=2, crossover_rate=0.3,
+                        max_attempts_factor=20):
+        """精英保留 + 锦标赛选择，生成下一代待评估个体"""
+        ranked = self.evaluated()
+        if not ranked:
+            return 0
+
+        self.history.append({
+            'generation': self.generation,
+            'best_fitness': ranked[0]['fitness'],
+            'best_expression': ranked[0]['expression'],
+            'passed': sum(1 for ind in ranked if ind['passed'])
+        })
+
+        self.generation += 1
+        self.individuals = ranked[:elite_count]
+        created = 0
+        attempts = 0
+        while created < population_size - elite_count and attempts < population_size * max_attempts_factor:
+            attempts += 1
+            parent = self._tournament(ranked)
+            try:
+                if len(ranked) > 1 and self.random.random() < crossover_rate:
+                    other = self._tournament(ranked)
+                    child = mutator.crossover(parent['expression'], other['expression'])
+                else:
+                    child = mutator.mutate(parent['expression'])
+            except (ExpressionSyntaxError, KeyError):
+                continue
+            if child and self.add(child):
+                created += 1
+
+        return created
@@ -0,0 +1,214 @@
+"""表达式预检模块 - 模拟前在本地检查算子签名、参数个数、参数类型和数据字段
+
+无效表达式（未知算子、未知字段、参数个数不对、把分组字段当数值用等）在进入模拟队列前
+直接拒绝，不再消耗一次 POST 请求换回 400。字段目录来自数据字段接口（见 datafield_catalog.py）
+加上各地区的价量与分组字段；没有字段目录时只检查算子和类型。
+"""
+
+from alpha_expression import (BinaryOp, Call, Conditional, ExpressionSyntaxError,
+                              Field, Number, String, UnaryOp, parse_expression)
+
+# 值类型
+MATRIX = 'MATRIX'
+VECTOR = 'VECTOR'
+GROUP = 'GROUP'
+NUMBER = 'NUMBER'
+STRING = 'STRING'
+
+# 拒绝原因
+SYNTAX = 'syntax'
+UNKNOWN_OPERATOR = 'unknown_operator'
+ARITY = 'arity'
+UNKNOWN_FIELD = 'unknown_field'
+TYPE_MISMATCH = 'type_mismatch'
+REJECT_REASONS = (SYNTAX, UNKNOWN_OPERATOR, ARITY, UNKNOWN_FIELD, TYPE_MISMATCH)
+
+REJECT_LABELS = {
+    SYNTAX: "语法错误",
+    UNKNOWN_OPERATOR: "未知算子",
+    ARITY: "参数个数",
+    UNKNOWN_FIELD: "未知字段",
+    TYPE_MISMATCH: "类型不匹配",
+}
+
+# 分组字段（任何数据集都可用）
+GROUP_FIELDS = {'market', 'sector', 'industry', 'subindustry', 'country', 'exchange'}
+
+# 各地区价量数据集 (pv1) 的字段，任何数据集的表达式都可以引用
+COMMON_FIELDS = {
+    'USA': {
+        'open', 'high', 'low', 'close', 'volume', 'vwap', 'returns', 'adv20',
+        'cap', 'sharesout', 'dividend', 'split',
+    },
+}
+
+
+def _op(params, returns='x', variadic=False, **optional):
+    """算子签名
+
+    Args:
+        params: 必填参数类型，每个字符一个参数：
+                x 数值表达式, d 正整数常量（窗口）, n 数值常量, g 分组, s 字符串, v 向量字段
+        optional: 可选参数 {参数名: 类型}，可按位置或关键字传入
+        variadic: 最后一个必填参数类型可以重复任意次
+    """
+    return {'params': params, 'optional': optional, 'returns': returns, 'variadic': variadic}
+
+
+OPERATOR_SIGNATURES = {
+    # 算术与逐元素
+    'abs': _op('x'), 'log': _op('x'), 'sign': _op('x'), 'sqrt': _op('x'), 'inverse': _op('x'),
+    'reverse': _op('x'), 's_log_1p': _op('x'), 'is_nan': _op('x'), 'not': _op('x'),
+    'add': _op('xx', variadic=True), 'multiply': _op('xx', variadic=True),
+    'subtract': _op('xx'), 'divide': _op('xx'),
+    'and': _op('xx'), 'or': _op('xx'),
+    'power': _op('xx'), 'signed_power': _op('xx'),
+    'max': _op('xx', variadic=True), 'min': _op('xx', variadic=True),
+    'if_else': _op('xxx'), 'trade_when': _op('xxx'),
+    # 横截面
+    'rank': _op('x', rate='n'), 'zscore': _op('x'),
+    'scale': _op('x', scale='n', longscale='n', shortscale='n'),
+    'normalize': _op('x', useStd='n', limit='n'),
+    'quantile': _op('x', driver='s', sigma='n'),
+    'winsorize': _op('x', std='n'),
+    'regression_neut': _op('xx'), 'vector_neut': _op('xx'),
+    'bucket': _op('x', returns='g', range='s', buckets='s'),
+    'densify': _op('g', returns='g'),
+    # 时间序列
+    'delay': _op('xd'), 'ts_delay': _op('xd'), 'delta': _op('xd'), 'ts_delta': _op('xd'),
+    'ts_sum': _op('xd'), 'ts_mean': _op('xd'), 'ts_std_dev': _op('xd'), 'ts_zscore': _op('xd'),
+    'ts_product': _op('xd'), 'ts_av_diff': _op('xd'), 'ts_arg_max': _op('xd'), 'ts_arg_min': _op('xd'),
+    'ts_scale': _op('xd', constant='n'), 'ts_count_nans': _op('xd'), 'ts_backfill': _op('xd'),
+    'ts_decay_linear': _op('xd', dense='n'), 'ts_rank': _op('xd', constant='n'),
+    'ts_quantile': _op('xd', driver='s'), 'ts_step': _op('d'),
+    'ts_decay_exp_window': _op('xd', factor='n'),
+    'ts_corr': _op('xxd'), 'ts_covariance': _op('xxd'),
+    'ts_regression': _op('xxd', lag='n', rettype='n'),
+    'days_from_last_change': _op('x'), 'last_diff_value': _op('xd'), 'hump': _op('x', hump='n'),
+    # 分组
+    'group_rank': _op('xg'), 'group_zscore': _op('xg'), 'group_neutralize': _op('xg'),
+    'group_scale': _op('xg'), 'group_mean': _op('xxg'), 'group_backfill': _op('xgd', std='n'),
+    # 向量字段
+    'vec_avg': _op('v'), 'vec_sum': _op('v'), 'vec_max': _op('v'), 'vec_min': _op('v'),
+    'vec_count': _op('v'), 'vec_stddev': _op('v'),
+}
+
+
+class ExpressionValidationError(ValueError):
+    """表达式预检失败，reason 为 REJECT_REASONS 之一"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class ExpressionValidator:
+    """按算子签名表和字段目录检查表达式
+
+    Args:
+        fields: {字段名: 类型 (MATRIX/VECTOR/GROUP)}；None 表示没有字段目录，不检查未知字段
+        region: 决定可用的价量字段
+    """
+
+    def __init__(self, fields=None, region='USA'):
+        self.fields = None
+        self.region = region
+        self._results = {}   # {表达式: None 或 (原因, 说明)}
+        if fields is not None:
+            self.add_fields(fields)
+
+    def add_fields(self, fields):
+        """加入字段目录（可多次调用，合并多个数据集的字段）"""
+        if self.fields is None:
+            self.fields = {name: MATRIX for name in COMMON_FIELDS.get(self.region, ())}
+            self.fields.update({name: GROUP for name in GROUP_FIELDS})
+        self.fields.update(fields)
+        self._results.clear()
+
+    def validate(self, expression):
+        """-> None 表示通过，否则 (原因, 说明)；结果按表达式缓存"""
+        if expression not in self._results:
+            try:
+                self._check(parse_expression(expression))
+                self._results[expression] = None
+            except ExpressionSyntaxError as e:
+                self._results[expression] = (SYNTAX, str(e))
+            except ExpressionValidationError as e:
+                self._results[expression] = (e.reason, str(e))
+        return self._results[expression]
+
+    def _field_type(self, name):
+        if self.fields is None:
+            return GROUP if name in GROUP_FIELDS else MATRIX
+        if name not in self.fields:
+            raise ExpressionValidationError(UNKNOWN_FIELD, f"未知字段: {name}")
+        return self.fields[name]
+
+    def _check(self, node):
+        """-> 节点的值类型；无效时抛出 ExpressionValidationError"""
+        if isinstance(node, Number):
+            return NUMBER
+        if isinstance(node, String):
+            return STRING
+        if isinstance(node, Field):
+            return self._field_type(node.name)
+        if isinstance(node, UnaryOp):
+            self._expect(node.operand, 'x', f"{node.op} 的操作数")
+            return MATRIX
+        if isinstance(node, BinaryOp):
+            self._expect(node.left, 'x', f"{node.op} 的左操作数")
+            self._expect(node.right, 'x', f"{node.op} 的右操作数")
+            return MATRIX
+        if isinstance(node, Conditional):
+            for part in (node.condition, node.if_true, node.if_false):
+                self._expect(part, 'x', "条件表达式")
+            return MATRIX
+        if isinstance(node, Call):
+            return self._check_call(node)
+        raise ExpressionValidationError(SYNTAX, f"未知节点类型: {type(node).__name__}")
+
+    def _check_call(self, node):
+        signature = OPERATOR_SIGNATURES.get(node.name)
+        if signature is None:
+            raise ExpressionValidationError(UNKNOWN_OPERATOR, f"未知算子: {node.name}")
+
+        params, optional = signature['params'], list(signature['optional'].items())
+        kinds = list(params)
+        if signature['variadic'] and len(node.args) > len(params):
+            kinds += [params[-1]] * (len(node.args) - len(params))
+        kinds += [kind for _, kind in optional[:max(0, len(node.args) - len(kinds))]]
+        if not len(params) <= len(node.args) <= len(kinds):
+            expected = f"{len(params)}" if not optional and not signature['variadic'] else f"至少 {len(params)}"
+            raise ExpressionValidationError(
+                ARITY, f"{node.name} 需要 {expected} 个参数，实际 {len(node.args)} 个: {node.to_expression()}")
+
+        for position, (arg, kind) in enumerate(zip(node.args, kinds), 1):
+            self._expect(arg, kind, f"{node.name} 的第 {position} 个参数")
+        for key, value in node.kwargs:
+            if key not in signature['optional']:
+                raise ExpressionValidationError(ARITY, f"{node.name} 没有参数 {key}: {node.to_expression()}")
+            self._expect(value, signature['optional'][key], f"{node.name} 的参数 {key}")
+        return GROUP if signature['returns'] == 'g' else MATRIX
+
+    def _expect(self, node, kind, where):
+        """检查参数节点是否符合类型 kind"""
+        if kind == 'd':
+            if not (isinstance(node, Number) and float(node.value).is_integer() and node.value > 0):
+                raise ExpressionValidationError(TYPE_MISMATCH, f"{where}应为正整数窗口: {node.to_expression()}")
+            return
+        if kind == 'n':
+            constant = node.operand if isinstance(node, UnaryOp) and node.op == '-' else node
+            if not isinstance(constant, Number):
+                raise ExpressionValidationError(TYPE_MISMATCH, f"{where}应为数值常量: {node.to_expression()}")
+            return
+        if kind == 's':
+            if not isinstance(node, String):
+                raise ExpressionValidationError(TYPE_MISMATCH, f"{where}应为字符串: {node.to_expression()}")
+            return
+
+        value_type = self._check(node)
+        allowed = {'x': (MATRIX, NUMBER), 'g': (GROUP,), 'v': (VECTOR,)}[kind]
+        if value_type not in allowed:
+            expected = {'x': "数值", 'g': "分组", 'v': "向量字段"}[kind]
+            raise ExpressionValidationError(
+                TYPE_MISMATCH, f"{where}应为{expected}，实际为 {value_type}: {node.to_expression()}")
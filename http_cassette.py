@@ -0,0 +1,226 @@
+"""HTTP 录制/回放模块 - 把一次运行的 API 流量保存为 cassette 文件，之后离线回放
+
+录制：RecordingAdapter 挂载在 requests.Session 上，每个请求/响应对（含耗时）
+追加一行 JSON 到 cassette 文件（.gz 结尾时压缩）。只保存路径，不保存主机名；
+不保存 Authorization、Cookie 等请求头，认证接口的响应内容替换为空对象。
+
+回放：ReplayAdapter 按 (方法, 路径, 请求体) 匹配录制的响应，同一个地址的多次请求
+（如轮询模拟进度）按录制顺序依次返回，按原始或缩放后的耗时等待，Retry-After 同样缩放。
+请求体与录制不同时仍返回下一条记录，但计为不匹配：回放的请求序列已偏离录制，结果不可信。
+这样可以离线重跑一次完整的运行，比较不同版本客户端的耗时、请求数和 CPU 时间。
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_VERSION = 1
+# 只保存影响客户端行为的响应头
+KEPT_RESPONSE_HEADERS = ('Content-Type', 'Location', 'Retry-After')
+SCRUBBED_PATHS = ('/authentication', '/auth', '/login')
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _relative(url):
+    """去掉协议和主机名，只保留路径和查询参数"""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else '')
+
+
+def _body_hash(body):
+    if not body:
+        return None
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.md5(body).hexdigest()[:12]
+
+
+def load_cassette(path):
+    """-> (头部信息, 交互记录列表)"""
+    header, interactions = {}, []
+    with _open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if 'cassette_version' in entry:
+                header = entry
+            else:
+                interactions.append(entry)
+    return header, interactions
+
+
+def summarize_cassette(path):
+    """cassette 概要：请求数、按接口计数、录制时长和累计请求耗时"""
+    header, interactions = load_cassette(path)
+    endpoints = {}
+    for entry in interactions:
+        key = f"{entry['method']} {_endpoint(entry['path'])}"
+        endpoints[key] = endpoints.get(key, 0) + 1
+    return {
+        'recorded_at': header.get('recorded_at'),
+        'requests': len(interactions),
+        'duration': max((entry['offset'] + entry['elapsed'] for entry in interactions), default=0.0),
+        'request_time': sum(entry['elapsed'] for entry in interactions),
+        'endpoints': endpoints,
+    }
+
+
+def _endpoint(path):
+    """路径中的 ID 替换为占位符，用于按接口计数"""
+    segments = path.split('?')[0].strip('/').split('/')
+    named = {'simulations', 'alphas', 'users', 'self', 'data-fields', 'check', 'submit',
+             'recordsets', 'pnl', 'authentication', 'auth', 'login'}
+    return '/' + '/'.join(segment if segment in named else '{id}' for segment in segments)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """正常发送请求，同时把请求/响应对追加到 cassette 文件"""
+
+    def __init__(self, path, clock=time.monotonic, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.clock = clock
+        self.started = clock()
+        self._lock = threading.Lock()
+        self._file = _open(path, 'w')
+        self._write({'cassette_version': CASSETTE_VERSION,
+                     'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S')})
+
+    def _write(self, entry):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+            self._file.flush()
+
+    def send(self, request, **kwargs):
+        offset = self.clock() - self.started
+        response = super().send(request, **kwargs)
+        path = _relative(request.url)
+
+        headers = {name: response.headers[name] for name in KEPT_RESPONSE_HEADERS if name in response.headers}
+        if 'Location' in headers:
+            headers['Location'] = _relative(headers['Location'])
+        body = '{}' if path.split('?')[0] in SCRUBBED_PATHS else response.text
+
+        self._write({
+            'method': request.method,
+            'path': path,
+            'body_hash': _body_hash(request.body),
+            'status': response.status_code,
+            'headers': headers,
+            'body': body,
+            'offset': round(offset, 4),
+            'elapsed': round(response.elapsed.total_seconds(), 4),
+        })
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        super().close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """用 cassette 中录制的响应代替真实请求
+
+    Args:
+        time_scale: 等待时间倍数，1 为原始耗时，0 为不等待
+    """
+
+    def __init__(self, path, time_scale=1.0, sleep=time.sleep):
+        super().__init__()
+        self.time_scale = time_scale
+        self.sleep = sleep
+        self.header, interactions = load_cassette(path)
+        self._lock = threading.Lock()
+        self._queues = {}   # {(方法, 路径): deque}，按录制顺序
+        self._last = {}     # {(方法, 路径): 最后一个录制的响应}，录制的响应用完后重复返回
+        for entry in interactions:
+            self._queues.setdefault((entry['method'], entry['path']), deque()).append(entry)
+            self._last[(entry['method'], entry['path'])] = entry
+        self.served = 0
+        self.misses = []
+        self.mismatches = []   # 地址已录制但请求体不同，返回的是其他请求的响应
+
+    def _match(self, method, path, body_hash):
+        """同一地址优先取请求体相同的记录，否则取下一条记录并计为不匹配"""
+        key = (method, path)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                entry = next((entry for entry in queue if entry['body_hash'] == body_hash), None)
+                if entry is None:
+                    entry = queue[0]
+                    self.mismatches.append(f"{method} {path}")
+                queue.remove(entry)
+            else:
+                entry = self._last.get(key)
+            if entry is None:
+                self.misses.append(f"{method} {path}")
+            else:
+                self.served += 1
+            return entry
+
+    def send(self, request, **kwargs):
+        entry = self._match(request.method, _relative(request.url), _body_hash(request.body))
+
+        response = Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+        if entry is None:
+            response.status_code = 404
+            response.reason = 'Not Recorded'
+            response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+            response._content = b'{"detail": "request not found in cassette"}'
+            response.elapsed = timedelta(0)
+            return response
+
+        if self.time_scale > 0 and entry['elapsed'] > 0:
+            self.sleep(entry['elapsed'] * self.time_scale)
+
+        headers = dict(entry['headers'])
+        if 'Location' in headers:
+            parts = urlsplit(request.url)
+            headers['Location'] = f"{parts.scheme}://{parts.netloc}{headers['Location']}"
+        if float(headers.get('Retry-After', 0) or 0) > 0:
+            # 保持大于 0，客户端以 0 表示已完成
+            headers['Retry-After'] = f"{max(float(headers['Retry-After']) * self.time_scale, 0.001):.3f}"
+
+        response.status_code = entry['status']
+        response.reason = 'Replayed'
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = entry['body'].encode('utf-8')
+        response.elapsed = timedelta(seconds=entry['elapsed'] * self.time_scale)
+        return response
+
+    def close(self):
+        pass
+
+    def report(self):
+        return {'served': self.served, 'misses': len(self.misses), 'missed_requests': self.misses[:20],
+                'mismatches': len(self.mismatches), 'mismatched_requests': self.mismatches[:20]}
+
+
+def mount(session, adapter):
+    for prefix in ('http://', 'https://'):
+        session.mount(prefix, adapter)
+    return adapter
@@ -0,0 +1,312 @@
+"""本地 Alpha 信号计算模块 - 在本地面板数据上近似计算表达式
+
+本地面板数据以 npz 文件保存在 local_data/<数据集>.npz，
+每个数组为 (T, N) 面板（时间 × 股票），键名为字段名；
+分组字段（subindustry、industry、sector、market）保存为整数编码。
+
+这里只实现常用算子的近似语义，用于模拟前的本地预筛选，
+遇到不支持的算子或缺失字段时抛出 UnsupportedExpressionError。
+"""
+
+import os
+
+import numpy as np
+
+import ts_kernels
+from alpha_expression import (BinaryOp, Call, Conditional, Field, Number,
+                              String, UnaryOp, parse_expression)
+
+LOCAL_DATA_DIR = "local_data"
+GROUP_FIELDS = ('market', 'sector', 'industry', 'subindustry')
+
+
+class UnsupportedExpressionError(ValueError):
+    """表达式包含本地无法计算的算子或字段"""
+
+
+def load_local_panel(dataset_name, data_dir=LOCAL_DATA_DIR):
+    """加载数据集的本地面板数据，不存在时返回 None"""
+    path = os.path.join(data_dir, f"{dataset_name}.npz")
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path) as archive:
+            return {key: archive[key] for key in archive.files}
+    except Exception as e:
+        print(f"⚠️ 加载本地面板数据失败: {str(e)}")
+        return None
+
+
+def cross_sectional_rank(x):
+    """每日截面百分位排名，结果在 [0, 1]，NaN 保持为 NaN"""
+    x = np.asarray(x, dtype=np.float64)
+    valid = ~np.isnan(x)
+    order = np.argsort(np.where(valid, x, np.inf), axis=1, kind='stable')
+    ranks = np.empty_like(x)
+    np.put_along_axis(ranks, order, np.arange(x.shape[1], dtype=np.float64)[None, :], axis=1)
+    counts = valid.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ranks = np.where(counts > 1, ranks / (counts - 1), 0.5)
+    ranks[~valid] = np.nan
+    return ranks
+
+
+def _group_keys(x, groups):
+    """(日期, 分组) 组合编码，返回 (有效掩码, 组合键, 组合数)"""
+    x = np.asarray(x, dtype=np.float64)
+    groups = np.broadcast_to(np.asarray(groups, dtype=np.float64), x.shape)
+    valid = ~(np.isnan(x) | np.isnan(groups))
+    codes, inverse = np.unique(groups[valid], return_inverse=True)
+    days = np.nonzero(valid)[0]
+    keys = days * max(len(codes), 1) + inverse
+    return valid, keys, x.shape[0] * max(len(codes), 1)
+
+
+def group_mean(x, groups):
+    """分组均值，广播回每只股票"""
+    x = np.asarray(x, dtype=np.float64)
+    valid, keys, n_keys = _group_keys(x, groups)
+    sums = np.bincount(keys, weights=x[valid], minlength=n_keys)
+    counts = np.bincount(keys, minlength=n_keys)
+    out = np.full(x.shape, np.nan)
+    out[valid] = sums[keys] / counts[keys]
+    return out
+
+
+def group_zscore(x, groups):
+    """分组标准化"""
+    x = np.asarray(x, dtype=np.float64)
+    valid, keys, n_keys = _group_keys(x, groups)
+    values = x[valid]
+    counts = np.bincount(keys, minlength=n_keys)
+    means = np.bincount(keys, weights=values, minlength=n_keys)[keys] / counts[keys]
+    var = np.bincount(keys, weights=(values - means) ** 2, minlength=n_keys)[keys] / counts[keys]
+    out = np.full(x.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out[valid] = np.where(var > 0, (values - means) / np.sqrt(var), 0.0)
+    return out
+
+
+def group_rank(x, groups):
+    """分组内百分位排名，结果在 [0, 1]"""
+    x = np.asarray(x, dtype=np.float64)
+    valid, keys, n_keys = _group_keys(x, groups)
+    values = x[valid]
+    order = np.lexsort((values, keys))
+    sorted_keys = keys[order]
+    counts = np.bincount(keys, minlength=n_keys)
+    starts = np.cumsum(counts) - counts
+    position = np.arange(len(order)) - starts[sorted_keys]
+
+    ranks = np.empty(len(order))
+    size = counts[sorted_keys]
+    ranks[order] = np.where(size > 1, position / np.maximum(size - 1, 1), 0.5)
+    out = np.full(x.shape, np.nan)
+    out[valid] = ranks
+    return out
+
+
+def _cross_sectional_residual(y, x):
+    """逐日截面回归 y ~ a + b * x 的残差"""
+    y = np.asarray(y, dtype=np.float64)
+    x = np.broadcast_to(np.asarray(x, dtype=np.float64), y.shape)
+    valid = ~(np.isnan(y) | np.isnan(x))
+    n = valid.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx = np.where(valid, x, 0).sum(axis=1, keepdims=True) / n
+        my = np.where(valid, y, 0).sum(axis=1, keepdims=True) / n
+        dx = np.where(valid, x - mx, 0)
+        dy = np.where(valid, y - my, 0)
+        beta = (dx * dy).sum(axis=1, keepdims=True) / (dx * dx).sum(axis=1, keepdims=True)
+    residual = dy - np.nan_to_num(beta) * dx
+    residual[~valid] = np.nan
+    return residual
+
+
+def _vector_projection_residual(x, y):
+    """逐日去除 x 在 y 方向上的投影"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.broadcast_to(np.asarray(y, dtype=np.float64), x.shape)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    xv, yv = np.where(valid, x, 0), np.where(valid, y, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        coef = (xv * yv).sum(axis=1, keepdims=True) / (yv * yv).sum(axis=1, keepdims=True)
+    out = x - np.nan_to_num(coef) * y
+    out[~valid] = np.nan
+    return out
+
+
+def _delay(x, d):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if d < x.shape[0]:
+        out[d:] = x[:x.shape[0] - d]
+    return out
+
+
+def _trade_when(trigger, alpha, exit_condition):
+    """trigger 为真时更新 alpha，exit 为真时置 NaN，否则保持上一日"""
+    alpha = np.asarray(alpha, dtype=np.float64)
+    trigger = np.broadcast_to(np.asarray(trigger, dtype=np.float64), alpha.shape) > 0
+    exit_condition = np.broadcast_to(np.asarray(exit_condition, dtype=np.float64), alpha.shape) > 0
+    out = np.full(alpha.shape, np.nan)
+    previous = np.full(alpha.shape[1], np.nan)
+    for t in range(alpha.shape[0]):
+        row = np.where(trigger[t], alpha[t], previous)
+        row = np.where(exit_condition[t], np.nan, row)
+        out[t] = previous = row
+    return out
+
+
+def _bucket(x, range_spec):
+    start, stop, step = (float(v) for v in range_spec.split(','))
+    edges = np.arange(start, stop + step / 2, step)
+    x = np.asarray(x, dtype=np.float64)
+    buckets = np.digitize(x, edges).astype(np.float64)
+    buckets[np.isnan(x)] = np.nan
+    return buckets
+
+
+class LocalEvaluator:
+    """在本地面板数据上计算表达式语法树"""
+
+    def __init__(self, panel, nan_handling='ON'):
+        self.panel = panel
+        self.nan_handling = nan_handling
+        self._cache = {}
+
+        self.operators = {
+            'abs': lambda x: np.abs(x),
+            'log': lambda x: np.log(np.where(np.asarray(x) > 0, x, np.nan)),
+            'sign': lambda x: np.sign(x),
+            'sqrt': lambda x: np.sqrt(np.where(np.asarray(x) >= 0, x, np.nan)),
+            'power': lambda x, p: np.power(x, p),
+            'signed_power': lambda x, p: np.sign(x) * np.power(np.abs(x), p),
+            'inverse': lambda x: 1.0 / np.where(np.asarray(x) != 0, x, np.nan),
+            'reverse': lambda x: -np.asarray(x, dtype=np.float64),
+            'max': lambda *xs: np.fmax.reduce(np.broadcast_arrays(*xs)),
+            'min': lambda *xs: np.fmin.reduce(np.broadcast_arrays(*xs)),
+            'rank': lambda x: cross_sectional_rank(self._panel(x)),
+            'zscore': self._zscore,
+            'scale': self._scale,
+            'if_else': lambda c, a, b: np.where(np.asarray(c) > 0, a, b),
+            'trade_when': lambda c, a, e: _trade_when(c, self._panel(a), e),
+            'delay': lambda x, d: _delay(self._panel(x), int(d)),
+            'ts_delay': lambda x, d: _delay(self._panel(x), int(d)),
+            'ts_delta': lambda x, d: self._panel(x) - _delay(self._panel(x), int(d)),
+            'delta': lambda x, d: self._panel(x) - _delay(self._panel(x), int(d)),
+            'ts_sum': lambda x, d: ts_kernels.ts_sum(self._panel(x), int(d), self.nan_handling),
+            'ts_mean': lambda x, d: ts_kernels.ts_mean(self._panel(x), int(d), self.nan_handling),
+            'ts_std_dev': lambda x, d: ts_kernels.ts_std_dev(self._panel(x), int(d), self.nan_handling),
+            'ts_rank': lambda x, d, constant=0: ts_kernels.ts_rank(
+                self._panel(x), int(d), constant, self.nan_handling),
+            'ts_corr': lambda x, y, d: ts_kernels.ts_corr(
+                self._panel(x), self._panel(y), int(d), self.nan_handling),
+            'ts_decay_exp_window': lambda x, d, factor=1.0: ts_kernels.ts_decay_exp_window(
+                self._panel(x), int(d), float(factor), self.nan_handling),
+            'ts_zscore': self._ts_zscore,
+            'regression_neut': _cross_sectional_residual,
+            'vector_neut': _vector_projection_residual,
+            'bucket': lambda x, range='0,1,0.1': _bucket(x, range),
+            'group_rank': group_rank,
+            'group_mean': lambda x, w, g: group_mean(x, g),
+            'group_neutralize': lambda x, g: np.asarray(x) - group_mean(x, g),
+            'group_zscore': group_zscore,
+        }
+
+    def _shape(self):
+        for value in self.panel.values():
+            if np.ndim(value) == 2:
+                return value.shape
+        raise UnsupportedExpressionError("本地面板数据为空")
+
+    def _panel(self, x):
+        return np.broadcast_to(np.asarray(x, dtype=np.float64), self._shape())
+
+    def _zscore(self, x):
+        x = self._panel(x)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (x - np.nanmean(x, axis=1, keepdims=True)) / np.nanstd(x, axis=1, keepdims=True)
+
+    def _scale(self, x, scale=1):
+        x = self._panel(x)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return x * scale / np.nansum(np.abs(x), axis=1, keepdims=True)
+
+    def _ts_zscore(self, x, d):
+        x = self._panel(x)
+        mean = ts_kernels.ts_mean(x, int(d), self.nan_handling)
+        std = ts_kernels.ts_std_dev(x, int(d), self.nan_handling)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (x - mean) / std
+
+    def clear_cache(self):
+        """清空中间结果缓存"""
+        self._cache.clear()
+
+    def evaluate_expression(self, expression):
+        """计算表达式文本，返回 (T, N) 面板"""
+        return self._panel(self.evaluate(parse_expression(expression)))
+
+    def evaluate(self, node):
+        """计算语法树节点（结果按表达式文本缓存）"""
+        key = node.to_expression()
+        if key not in self._cache:
+            with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+                self._cache[key] = self._evaluate(node)
+        return self._cache[key]
+
+    def _evaluate(self, node):
+        if isinstance(node, Number):
+            return float(node.value)
+        if isinstance(node, String):
+            return node.value
+        if isinstance(node, Field):
+            if node.name not in self.panel:
+                raise UnsupportedExpressionError(f"本地数据缺少字段: {node.name}")
+            return np.asarray(self.panel[node.name], dtype=np.float64)
+        if isinstance(node, UnaryOp):
+            value = self.evaluate(node.operand)
+            return -value if node.op == '-' else (np.asarray(value) <= 0).astype(np.float64)
+        if isinstance(node, BinaryOp):
+            return self._binary(node.op, self.evaluate(node.left), self.evaluate(node.right))
+        if isinstance(node, Conditional):
+            condition = self.evaluate(node.condition)
+            return np.where(np.asarray(condition) > 0, self.evaluate(node.if_true), self.evaluate(node.if_false))
+        if isinstance(node, Call):
+            func = self.operators.get(node.name)
+            if func is None:
+                raise UnsupportedExpressionError(f"本地不支持的算子: {node.name}")
+            args = [self.evaluate(arg) for arg in node.args]
+            kwargs = {key: self.evaluate(value) for key, value in node.kwargs}
+            try:
+                return func(*args, **kwargs)
+            except TypeError as e:
+                raise UnsupportedExpressionError(f"{node.name} 参数不匹配: {str(e)}")
+        raise UnsupportedExpressionError(f"未知节点类型: {type(node).__name__}")
+
+    @staticmethod
+    def _binary(op, left, right):
+        left, right = np.asarray(left, dtype=np.float64), np.asarray(right, dtype=np.float64)
+        if op == '+':
+            return left + right
+        if op == '-':
+            return left - right
+        if op == '*':
+            return left * right
+        if op == '/':
+            return left / np.where(right != 0, right, np.nan)
+        if op == '^':
+            return np.power(left, right)
+        comparisons = {
+            '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+            '==': np.equal, '!=': np.not_equal,
+        }
+        if op in comparisons:
+            return comparisons[op](left, right).astype(np.float64)
+        if op == '&&':
+            return ((left > 0) & (right > 0)).astype(np.float64)
+        if op == '||':
+            return ((left > 0) | (right > 0)).astype(np.float64)
+        raise UnsupportedExpressionError(f"本地不支持的运算符: {op}")
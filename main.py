@@ -1,10 +1,18 @@
-"""WorldQuant Brain 批量 Alpha 生成系统 - 支持智能断点续传"""
+"""WorldQuant Brain 批量 Alpha 生成系统 - 支持智能断点续传
 
+不带 --mode 时进入交互菜单；指定 --mode（及 --dataset / --strategy 等）时无需任何输入，
+--daemon 按 daemon_config.json 循环运行。例如:
+
+    python main.py --mode 2 --dataset fundamental6 --strategy 1
+    python main.py --mode 3 --submit-count 5
+    python main.py --daemon --daemon-config daemon_config.json
+"""
+
+import argparse
 import os
-import sys
 
 from brain_batch_alpha import BrainBatchAlpha
-from dataset_config import get_dataset_by_index, get_dataset_list
+from dataset_config import DATASET_CONFIGS, get_dataset_by_index, get_dataset_list
 
 STORAGE_ALPHA_ID_PATH = "alpha_ids.txt"
 
@@ -23,30 +31,179 @@ def submit_alpha_ids(brain, num_to_submit=2):
             print("❌ 没有可提交的Alpha ID")
             return
 
-        print("\n📝 已保存的Alpha ID列表:")
+        # 跳过已有提交结果的 ID，其余按模拟指标排序
+        alpha_ids = brain.rank_saved_alphas(alpha_ids)
+        if not alpha_ids:
+            print("❌ 所有保存的Alpha都已有提交结果")
+            return
+
+        print("\n📝 待提交的Alpha ID列表（按指标排序）:")
         for i, alpha_id in enumerate(alpha_ids, 1):
             print(f"{i}. {alpha_id}")
 
-        if num_to_submit > len(alpha_ids):
-            num_to_submit = len(alpha_ids)
-
-        selected_ids = alpha_ids[:num_to_submit]
-        successful, failed = brain.submit_multiple_alphas(selected_ids)
+        # 先在本地按日 PnL 跳过与已提交 Alpha 自相关过高的候选
+        candidates = brain.filter_self_correlated(alpha_ids)
+        if not candidates:
+            print("❌ 没有通过自相关检查的Alpha")
+            return
 
-        # 更新 alpha_ids.txt
-        remaining_ids = [id for id in alpha_ids if id not in successful]
-        with open(STORAGE_ALPHA_ID_PATH, 'w') as f:
-            f.writelines([f"{id}\n" for id in remaining_ids])
+        # 按顺序提交，直到成功 num_to_submit 个；结果记录在 alpha_results.jsonl
+        successful, failed = brain.submit_multiple_alphas(
+            candidates, check_correlation=False, target=num_to_submit
+        )
+        print(f"\n提交完成: 成功 {len(successful)} 个, 失败 {len(failed)} 个")
 
     except Exception as e:
         print(f"❌ 提交 Alpha 时出错: {str(e)}")
 
 
-def main():
+def check_alpha_ids(brain):
+    """对保存的 Alpha ID 执行提交前检查，输出可提交列表"""
+    if not os.path.exists(STORAGE_ALPHA_ID_PATH):
+        print("❌ 没有找到保存的Alpha ID文件")
+        return
+
+    with open(STORAGE_ALPHA_ID_PATH, 'r') as f:
+        alpha_ids = [line.strip() for line in f.readlines() if line.strip()]
+
+    ready_ids = brain.check_saved_alphas(alpha_ids)
+    if not ready_ids:
+        print("❌ 没有通过全部检查的Alpha")
+        return
+
+    print(f"\n✅ 可提交的Alpha ({len(ready_ids)} 个):")
+    for i, alpha_id in enumerate(ready_ids, 1):
+        print(f"{i}. {alpha_id}")
+
+
+def build_parser():
+    """命令行参数"""
+    parser = argparse.ArgumentParser(description="WorldQuant Brain 批量 Alpha 生成系统")
+    parser.add_argument('--mode', type=int, choices=range(1, 7),
+                        help="运行模式 1-6（同交互菜单），不指定时进入交互菜单")
+    parser.add_argument('--dataset', help="数据集名称或编号（模式 1/2）")
+    parser.add_argument('--strategy', type=int, choices=[1, 2, 3], default=1,
+                        help="策略模式：1 基础, 2 多因子组合, 3 进化搜索")
+    parser.add_argument('--screening', action='store_true', help="启用多级筛选（策略 1/2）")
+    parser.add_argument('--submit-count', type=int, default=2, help="模式 1/3 提交的 Alpha 数量")
+    parser.add_argument('--yes', action='store_true', help="模式 4 不再确认")
+    parser.add_argument('--daemon', action='store_true', help="守护模式：循环运行配置中的数据集与策略")
+    parser.add_argument('--daemon-config', default='daemon_config.json', help="守护模式配置文件")
+    parser.add_argument('--api-base-url', help="指定 API 地址（如本地模拟服务器）")
+    parser.add_argument('--clear-resume', action='store_true', help="清除断点续传记录后退出")
+    parser.add_argument('--verbose', action='store_true', help="输出每次模拟的请求/响应详情")
+    parser.add_argument('--record', metavar='FILE', help="录制全部 API 请求")
+    parser.add_argument('--replay', metavar='FILE', help="离线回放录制的 API 响应")
+    parser.add_argument('--replay-time-scale', type=float, default=1.0, help="回放等待时间倍数")
+    parser.add_argument('--profile', action='store_true', help="按阶段性能剖析，报告写入 profiles/")
+    parser.add_argument('--profile-mode', choices=['full', 'sample'], default='full')
+    return parser
+
+
+def resolve_dataset(value):
+    """数据集名称或编号 -> 名称，无效时返回 None"""
+    if value in DATASET_CONFIGS:
+        return value
+    return get_dataset_by_index(value)
+
+
+def prompt_options(args):
+    """交互菜单：补全 args 中的模式、数据集、策略等选项，无效输入返回 False"""
+    print("\n📋 请选择运行模式:")
+    print("1: 自动模式 (测试并自动提交 2 个合格 Alpha)")
+    print("2: 仅测试模式 (测试并保存合格 Alpha ID)")
+    print("3: 仅提交模式 (提交已保存的合格 Alpha ID)")
+    print("4: 清除断点续传记录")
+    print("5: 参数微调模式 (对接近合格的 Alpha 尝试相邻参数)")
+    print("6: 提交前检查模式 (并发检查已保存的 Alpha，列出可提交的 ID)")
+
+    args.mode = int(input("\n请选择模式 (1-6): "))
+    if args.mode not in [1, 2, 3, 4, 5, 6]:
+        print("❌ 无效的模式选择")
+        return False
+
+    if args.mode in [1, 2]:
+        print("\n📊 可用数据集列表:")
+        for dataset in get_dataset_list():
+            print(dataset)
+
+        args.dataset = input("\n请选择数据集编号: ")
+        if not resolve_dataset(args.dataset):
+            print("❌ 无效的数据集编号")
+            return False
+
+        print("\n📈 可用策略模式:")
+        print("1: 基础策略模式")
+        print("2: 多因子组合模式")
+        print("3: 进化搜索模式 (根据模拟结果迭代改进，支持中断续跑)")
+
+        args.strategy = int(input("\n请选择策略模式 (1-3): "))
+        if args.strategy not in [1, 2, 3]:
+            print("❌ 无效的策略模式")
+            return False
+
+        if args.strategy in [1, 2]:
+            answer = input("\n是否启用多级筛选 (先用低成本配置快速模拟，达标后再用生产配置)? (y/N): ")
+            args.screening = answer.lower() == 'y'
+
+    elif args.mode == 3:
+        args.submit_count = int(input("\n请输入要提交的 Alpha 数量: "))
+
+    elif args.mode == 4:
+        args.yes = input("\n⚠️ 确认清除所有断点续传记录？(y/N): ").lower() == 'y'
+
+    return True
+
+
+def run_mode(brain, args):
+    """执行一个运行模式（交互与非交互共用）"""
+    if args.mode in [1, 2]:
+        dataset_name = resolve_dataset(args.dataset) if args.dataset else None
+        if not dataset_name:
+            print(f"❌ 无效的数据集: {args.dataset}（可用: {', '.join(DATASET_CONFIGS)}）")
+            return
+
+        print("\n🔄 开始Alpha模拟（支持Ctrl+C中断和断点续传）...")
+        try:
+            brain.simulate_alphas(None, args.strategy, dataset_name, screening=args.screening)
+
+            if args.mode == 1:
+                submit_alpha_ids(brain, args.submit_count)
+
+        except KeyboardInterrupt:
+            print("\n⚠️ 用户中断操作")
+            print("💾 进度已自动保存，下次运行将从中断点继续")
+
+    elif args.mode == 3:
+        if args.submit_count <= 0:
+            print("❌ 无效的提交数量")
+            return
+        submit_alpha_ids(brain, args.submit_count)
+
+    elif args.mode == 4:
+        if args.yes:
+            brain.clear_resume_data()
+        else:
+            print("❌ 操作已取消")
+
+    elif args.mode == 5:
+        print("\n🔄 开始参数微调（支持Ctrl+C中断和断点续传）...")
+        try:
+            brain.hill_climb_near_misses()
+        except KeyboardInterrupt:
+            print("\n⚠️ 用户中断操作")
+            print("💾 进度已自动保存，下次运行将从中断点继续")
+
+    elif args.mode == 6:
+        check_alpha_ids(brain)
+
+
+def main(argv=None):
     """主程序入口"""
+    args = build_parser().parse_args(argv)
+    brain = None
     try:
-        # 检查命令行参数
-        if len(sys.argv) > 1 and sys.argv[1] == '--clear-resume':
+        if args.clear_resume:
             brain = BrainBatchAlpha()
             brain.clear_resume_data()
             return
@@ -54,75 +211,51 @@ def main():
         print("🚀 启动 WorldQuant Brain 批量 Alpha 生成系统")
         print("🧠 智能参数配置 + 断点续传功能已启用")
 
+        if args.replay:
+            # 回放时工作目录切换到临时目录，守护配置按原路径读取
+            args.daemon_config = os.path.abspath(args.daemon_config)
+
+        brain = BrainBatchAlpha(
+            verbose=args.verbose,
+            api_base_url=args.api_base_url,
+            record_cassette=args.record,
+            replay_cassette=args.replay,
+            replay_time_scale=args.replay_time_scale,
+            profile=args.profile_mode if args.profile else None
+        )
+
         # 显示断点续传状态
-        brain = BrainBatchAlpha()
         stats = brain.get_resume_stats()
         if stats['total_tested'] > 0:
             print(f"📊 断点续传状态: 已有 {stats['total_tested']} 个测试记录")
             print("💡 提示: 程序将自动跳过已测试的Alpha表达式")
             print("🗑️ 如需重新开始，请运行: python main.py --clear-resume")
+        print("📝 事件日志: alpha_events.jsonl（如需详细调试输出，请运行: python main.py --verbose）")
+
+        # 上次运行中已提交、尚未取回结果的模拟：先取回结果，再开始新的模拟
+        brain.collect_inflight_simulations()
 
-        print("\n📋 请选择运行模式:")
-        print("1: 自动模式 (测试并自动提交 2 个合格 Alpha)")
-        print("2: 仅测试模式 (测试并保存合格 Alpha ID)")
-        print("3: 仅提交模式 (提交已保存的合格 Alpha ID)")
-        print("4: 清除断点续传记录")
+        if args.daemon:
+            from daemon import AlphaDaemon
 
-        mode = int(input("\n请选择模式 (1-4): "))
-        if mode not in [1, 2, 3, 4]:
-            print("❌ 无效的模式选择")
+            def submit_after_cycle(brain, config):
+                if config['submit_per_cycle'] > 0:
+                    submit_alpha_ids(brain, config['submit_per_cycle'])
+
+            AlphaDaemon(brain, args.daemon_config, on_cycle_end=submit_after_cycle).run()
             return
 
-        if mode in [1, 2]:
-            print("\n📊 可用数据集列表:")
-            for dataset in get_dataset_list():
-                print(dataset)
-
-            dataset_index = input("\n请选择数据集编号: ")
-            dataset_name = get_dataset_by_index(dataset_index)
-            if not dataset_name:
-                print("❌ 无效的数据集编号")
-                return
-
-            print("\n📈 可用策略模式:")
-            print("1: 基础策略模式")
-            print("2: 多因子组合模式")
-
-            strategy_mode = int(input("\n请选择策略模式 (1-2): "))
-            if strategy_mode not in [1, 2]:
-                print("❌ 无效的策略模式")
-                return
-
-            print("\n🔄 开始Alpha模拟（支持Ctrl+C中断和断点续传）...")
-            try:
-                results = brain.simulate_alphas(None, strategy_mode, dataset_name)
-
-                if mode == 1:
-                    submit_alpha_ids(brain, 2)
-
-            except KeyboardInterrupt:
-                print("\n⚠️ 用户中断操作")
-                print("💾 进度已自动保存，下次运行将从中断点继续")
-                return
-
-        elif mode == 3:
-            num_to_submit = int(input("\n请输入要提交的 Alpha 数量: "))
-            if num_to_submit <= 0:
-                print("❌ 无效的提交数量")
-                return
-            submit_alpha_ids(brain, num_to_submit)
-
-        elif mode == 4:
-            confirm = input("\n⚠️ 确认清除所有断点续传记录？(y/N): ")
-            if confirm.lower() == 'y':
-                brain.clear_resume_data()
-            else:
-                print("❌ 操作已取消")
+        if args.mode is None and not prompt_options(args):
+            return
+        run_mode(brain, args)
 
     except KeyboardInterrupt:
         print("\n⚠️ 程序被用户中断")
     except Exception as e:
         print(f"❌ 程序运行出错: {str(e)}")
+    finally:
+        if brain is not None:
+            brain.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+"""近似合格 Alpha 参数微调模块 - 对差一点达标的表达式尝试相邻的模拟参数
+
+从断点续传记录中找出未通过但合格度得分接近达标的表达式，
+按未达标的指标有针对性地调整 decay / truncation / neutralization，
+每个表达式一旦合格或用完尝试次数即停止。
+"""
+
+from qualification_rules import (DEFAULT_THRESHOLDS, extract_metrics,
+                                 qualification_score)
+
+NEUTRALIZATION_ORDER = ['MARKET', 'SECTOR', 'INDUSTRY', 'SUBINDUSTRY']
+DECAY_STEP = 2
+DECAY_RANGE = (0, 20)
+TRUNCATION_STEP = 0.02
+TRUNCATION_RANGE = (0.01, 0.15)
+
+
+class NearMissClimber:
+    """近似合格表达式的参数爬山"""
+
+    def __init__(self, resume_manager, budget=6, min_score=0.85, variants_per_round=2, thresholds=None):
+        """
+        Args:
+            resume_manager: 断点续传管理器（结果来源与去重依据）
+            thresholds: 合格阈值（默认 DEFAULT_THRESHOLDS），用于计算得分和判断换手率方向
+            budget: 每个表达式最多模拟的参数组合数（含最初的一次）
+            min_score: 合格度得分下限，低于此值不视为近似合格
+            variants_per_round: 每轮为每个表达式安排的相邻参数数量
+        """
+        self.resume_manager = resume_manager
+        self.budget = budget
+        self.min_score = min_score
+        self.variants_per_round = variants_per_round
+        self.thresholds = thresholds or DEFAULT_THRESHOLDS
+
+    def _records_by_expression(self):
+        groups = {}
+        for record in self.resume_manager.tested_expressions.values():
+            if record.get('stage', 'production') != 'production':
+                continue
+            groups.setdefault(record.get('expression', ''), []).append(record)
+        return groups
+
+    def find_near_misses(self):
+        """[(表达式, 最佳记录, 合格度得分, 剩余预算)]，按得分从高到低"""
+        near_misses = []
+        for expression, records in self._records_by_expression().items():
+            results = [r.get('result') or {} for r in records]
+            if not expression or any(result.get('passed_all_checks') for result in results):
+                continue
+            remaining = self.budget - len(records)
+            if remaining <= 0:
+                continue
+
+            scored = [
+                (qualification_score(extract_metrics(result['metrics']), thresholds=self.thresholds), record)
+                for record, result in zip(records, results) if result.get('metrics')
+            ]
+            if not scored:
+                continue
+            score, best = max(scored, key=lambda item: item[0])
+            if score >= self.min_score:
+                near_misses.append((expression, best, score, remaining))
+
+        near_misses.sort(key=lambda item: item[2], reverse=True)
+        return near_misses
+
+    def _decay_directions(self, metrics):
+        """换手率过高时优先加大 decay，过低时优先减小 decay"""
+        if metrics['turnover'] > self.thresholds['turnover_max']:
+            return [DECAY_STEP, 2 * DECAY_STEP]
+        if metrics['turnover'] < self.thresholds['turnover_min']:
+            return [-DECAY_STEP, -2 * DECAY_STEP]
+        return [DECAY_STEP, -DECAY_STEP]
+
+    def propose_variants(self, record):
+        """按未达标的指标生成相邻参数组合，优先级从高到低"""
+        settings = record.get('parameters', {})
+        metrics = extract_metrics(record['result']['metrics'])
+        variants = []
+
+        def add(**changes):
+            variant = dict(settings, **changes)
+            if variant != settings:
+                variants.append(variant)
+
+        decay = int(settings.get('decay', 0))
+        for step in self._decay_directions(metrics):
+            add(decay=max(DECAY_RANGE[0], min(DECAY_RANGE[1], decay + step)))
+
+        truncation = float(settings.get('truncation', 0.08))
+        for step in (-TRUNCATION_STEP, TRUNCATION_STEP):
+            value = round(max(TRUNCATION_RANGE[0], min(TRUNCATION_RANGE[1], truncation + step)), 3)
+            add(truncation=value)
+
+        neutralization = settings.get('neutralization')
+        if neutralization in NEUTRALIZATION_ORDER:
+            position = NEUTRALIZATION_ORDER.index(neutralization)
+            for offset in (1, -1):
+                if 0 <= position + offset < len(NEUTRALIZATION_ORDER):
+                    add(neutralization=NEUTRALIZATION_ORDER[position + offset])
+
+        return variants
+
+    def build_round(self):
+        """生成一轮待模拟的 (表达式, 参数) 列表，已测试过的组合会被跳过"""
+        plan = []
+        for expression, record, score, remaining in self.find_near_misses():
+            quota = min(self.variants_per_round, remaining)
+            for variant in self.propose_variants(record):
+                if quota <= 0:
+                    break
+                if self.resume_manager.is_expression_tested(expression, variant):
+                    continue
+                plan.append((expression, variant, score))
+                quota -= 1
+        return plan
@@ -1,167 +1,246 @@
 """智能参数配置效果分析工具"""
 
-import json
 import os
-from collections import defaultdict
+import sys
+
+import pandas as pd
+
+from profiling import PhaseProfiler
+from result_aggregates import AGGREGATES_FILE, RunningAggregates, bucket_summary
+from result_store import RESULTS_FILE, ResultStore, iter_json_array
+
+ANALYSIS_COLUMNS = ['expression_type', 'universe', 'neutralization', 'decay',
+                    'sharpe', 'fitness', 'turnover', 'margin']
+METRIC_COLUMNS = ['sharpe', 'fitness', 'turnover', 'margin']
+
+
+def _combine(partials, keys):
+    """合并各数据块的分组部分和"""
+    partials = [p for p in partials if not p.empty]
+    if not partials:
+        return pd.DataFrame()
+    return pd.concat(partials).groupby(level=keys, dropna=False).sum()
 
 
 class ParameterAnalyzer:
-    """参数配置效果分析器"""
-    
-    def __init__(self, details_file="alpha_details.json"):
-        """初始化分析器"""
+    """参数配置效果分析器
+
+    按块流式读取模拟结果，每块只保留分组后的计数与求和，
+    内存占用与分组数量成正比，与历史记录条数无关。
+    """
+
+    def __init__(self, details_file="alpha_details.json", results_file=RESULTS_FILE,
+                 chunksize=200000, include_unqualified=False):
+        """初始化分析器
+
+        默认分析合格 Alpha：优先读取 alpha_results.jsonl 中通过全部检查的记录，
+        不存在时退回 alpha_details.json。include_unqualified=True 时分析全部模拟结果
+        （含未合格），报告标题会注明。
+        """
         self.details_file = details_file
-        self.data = self._load_data()
-    
-    def _load_data(self):
-        """加载Alpha详细数据"""
+        self.results_file = results_file
+        self.chunksize = chunksize
+        self.include_unqualified = include_unqualified
+        self.row_count = 0
+        self._aggregate()
+
+    def _iter_chunks(self):
+        """按块产出只含分析所需列的 DataFrame"""
+        store = ResultStore(self.results_file)
+        if store.exists():
+            for chunk in store.iter_frames(self.chunksize):
+                chunk = chunk[chunk['stage'] == 'production']
+                if not self.include_unqualified:
+                    chunk = chunk[chunk['passed'].fillna(False).astype(bool)]
+                yield chunk[ANALYSIS_COLUMNS]
+            return
+
+        if self.include_unqualified:
+            print(f"⚠️ {self.results_file} 不存在，只能分析 {self.details_file} 中的合格 Alpha")
+            self.include_unqualified = False
+
         if not os.path.exists(self.details_file):
-            print(f"❌ 数据文件不存在: {self.details_file}")
-            return []
-        
+            print(f"❌ 数据文件不存在: {self.results_file} / {self.details_file}")
+            return
+
+        records = []
         try:
-            with open(self.details_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            for record in iter_json_array(self.details_file):
+                records.append(record)
+                if len(records) >= self.chunksize:
+                    yield self._details_frame(records)
+                    records = []
         except Exception as e:
             print(f"❌ 加载数据失败: {str(e)}")
-            return []
-    
+            return
+        if records:
+            yield self._details_frame(records)
+
+    @staticmethod
+    def _details_frame(records):
+        """alpha_details.json 的一块记录 -> 只含分析所需列的 DataFrame"""
+        frame = pd.json_normalize(records)
+        frame = frame.rename(columns=lambda c: c.split('.', 1)[-1])
+        return frame.reindex(columns=ANALYSIS_COLUMNS)
+
+    def _aggregate(self):
+        """一次扫描计算三份报告需要的全部分组统计"""
+        type_partials, universe_partials, neutralization_partials = [], [], []
+        combination_partials, performance_partials = [], {'universe': [], 'neutralization': []}
+
+        for chunk in self._iter_chunks():
+            if chunk.empty:
+                continue
+            chunk = chunk.copy()
+            chunk['expression_type'] = chunk['expression_type'].fillna('unknown')
+            chunk[METRIC_COLUMNS] = chunk[METRIC_COLUMNS].apply(pd.to_numeric, errors='coerce').fillna(0.0)
+            chunk['performance'] = (chunk['sharpe'] + chunk['fitness']) / 2
+            chunk['count'] = 1
+            self.row_count += len(chunk)
+
+            type_partials.append(chunk.groupby('expression_type')[METRIC_COLUMNS + ['count']].sum())
+            universe_partials.append(chunk.groupby(['expression_type', 'universe'], dropna=False).size())
+            neutralization_partials.append(
+                chunk.groupby(['expression_type', 'neutralization'], dropna=False).size())
+
+            high = chunk[(chunk['sharpe'] >= 1.5) & (chunk['fitness'] >= 1.0)]
+            combination_partials.append(
+                high.groupby(['universe', 'neutralization', 'decay'], dropna=False).size())
+
+            for parameter in ('universe', 'neutralization'):
+                performance_partials[parameter].append(
+                    chunk.groupby(parameter, dropna=False)[['performance', 'count']].sum())
+
+        self.type_stats = _combine(type_partials, ['expression_type'])
+        self.universe_counts = _combine(universe_partials, ['expression_type', 'universe'])
+        self.neutralization_counts = _combine(neutralization_partials, ['expression_type', 'neutralization'])
+        self.high_performance = _combine(combination_partials, ['universe', 'neutralization', 'decay'])
+        self.parameter_performance = {
+            parameter: _combine(partials, [parameter])
+            for parameter, partials in performance_partials.items()
+        }
+
+    def has_data(self):
+        return self.row_count > 0
+
+    def scope(self):
+        """报告的数据范围说明"""
+        return "全部模拟结果，含未合格" if self.include_unqualified else "合格 Alpha"
+
     def analyze_parameter_performance(self):
         """分析参数配置性能"""
-        if not self.data:
+        if not self.has_data():
             print("❌ 没有可分析的数据")
             return
-        
-        print("📊 智能参数配置效果分析报告")
+
+        print(f"📊 智能参数配置效果分析报告 ({self.scope()})")
         print("=" * 50)
-        
-        # 按表达式类型分组分析
-        type_stats = defaultdict(list)
-        for alpha in self.data:
-            expr_type = alpha.get('expression_type', 'unknown')
-            metrics = alpha.get('metrics', {})
-            parameters = alpha.get('parameters', {})
-            
-            type_stats[expr_type].append({
-                'sharpe': float(metrics.get('sharpe', 0)),
-                'fitness': float(metrics.get('fitness', 0)),
-                'turnover': float(metrics.get('turnover', 0)),
-                'ic_mean': float(metrics.get('margin', 0)),
-                'universe': parameters.get('universe'),
-                'neutralization': parameters.get('neutralization'),
-                'decay': parameters.get('decay'),
-                'truncation': parameters.get('truncation')
-            })
-        
-        # 输出分析结果
-        for expr_type, alphas in type_stats.items():
-            print(f"\n🎯 {expr_type.upper()} 策略分析 ({len(alphas)} 个Alpha)")
+
+        averages = self.type_stats[METRIC_COLUMNS].div(self.type_stats['count'], axis=0)
+        for expr_type, row in averages.iterrows():
+            print(f"\n🎯 {str(expr_type).upper()} 策略分析 ({int(self.type_stats.at[expr_type, 'count'])} 个Alpha)")
             print("-" * 30)
-            
-            if alphas:
-                avg_sharpe = sum(a['sharpe'] for a in alphas) / len(alphas)
-                avg_fitness = sum(a['fitness'] for a in alphas) / len(alphas)
-                avg_turnover = sum(a['turnover'] for a in alphas) / len(alphas)
-                avg_ic_mean = sum(a['ic_mean'] for a in alphas) / len(alphas)
-                
-                print(f"  平均 Sharpe: {avg_sharpe:.3f}")
-                print(f"  平均 Fitness: {avg_fitness:.3f}")
-                print(f"  平均 Turnover: {avg_turnover:.3f}")
-                print(f"  平均 IC Mean: {avg_ic_mean:.3f}")
-                
-                # 参数使用统计
-                universe_count = defaultdict(int)
-                neutralization_count = defaultdict(int)
-                
-                for alpha in alphas:
-                    universe_count[alpha['universe']] += 1
-                    neutralization_count[alpha['neutralization']] += 1
-                
-                print(f"  常用Universe: {dict(universe_count)}")
-                print(f"  常用Neutralization: {dict(neutralization_count)}")
-    
+            print(f"  平均 Sharpe: {row['sharpe']:.3f}")
+            print(f"  平均 Fitness: {row['fitness']:.3f}")
+            print(f"  平均 Turnover: {row['turnover']:.3f}")
+            print(f"  平均 IC Mean: {row['margin']:.3f}")
+
+            # 参数使用统计
+            print(f"  常用Universe: {self.universe_counts.loc[expr_type].to_dict()}")
+            print(f"  常用Neutralization: {self.neutralization_counts.loc[expr_type].to_dict()}")
+
     def analyze_best_parameters(self):
         """分析最佳参数组合"""
-        if not self.data:
+        if not self.has_data():
             return
-        
-        print("\n🏆 最佳参数组合分析")
+
+        print(f"\n🏆 最佳参数组合分析 ({self.scope()})")
         print("=" * 50)
-        
-        # 找出高性能Alpha
-        high_performance_alphas = []
-        for alpha in self.data:
-            metrics = alpha.get('metrics', {})
-            sharpe = float(metrics.get('sharpe', 0))
-            fitness = float(metrics.get('fitness', 0))
-            
-            if sharpe >= 1.5 and fitness >= 1.0:
-                high_performance_alphas.append(alpha)
-        
-        if not high_performance_alphas:
+
+        if self.high_performance.empty:
             print("❌ 没有找到高性能Alpha")
             return
-        
-        print(f"✅ 找到 {len(high_performance_alphas)} 个高性能Alpha")
-        
-        # 分析高性能Alpha的参数特征
-        param_combinations = defaultdict(int)
-        for alpha in high_performance_alphas:
-            params = alpha.get('parameters', {})
-            combination = f"{params.get('universe')}-{params.get('neutralization')}-{params.get('decay')}"
-            param_combinations[combination] += 1
-        
+
+        print(f"✅ 找到 {int(self.high_performance.sum())} 个高性能Alpha")
+
         print("\n🎯 高性能参数组合排行:")
-        sorted_combinations = sorted(param_combinations.items(), key=lambda x: x[1], reverse=True)
-        for i, (combination, count) in enumerate(sorted_combinations[:5], 1):
-            print(f"  {i}. {combination}: {count} 次")
-    
+        top = self.high_performance.sort_values(ascending=False, kind='stable').head(5)
+        for i, ((universe, neutralization, decay), count) in enumerate(top.items(), 1):
+            print(f"  {i}. {universe}-{neutralization}-{decay}: {int(count)} 次")
+
     def generate_optimization_suggestions(self):
         """生成参数优化建议"""
-        if not self.data:
+        if not self.has_data():
             return
-        
-        print("\n💡 参数优化建议")
+
+        print(f"\n💡 参数优化建议 ({self.scope()})")
         print("=" * 50)
-        
-        # 分析各参数对性能的影响
-        universe_performance = defaultdict(list)
-        neutralization_performance = defaultdict(list)
-        
-        for alpha in self.data:
-            metrics = alpha.get('metrics', {})
-            parameters = alpha.get('parameters', {})
-            
-            sharpe = float(metrics.get('sharpe', 0))
-            fitness = float(metrics.get('fitness', 0))
-            performance_score = (sharpe + fitness) / 2
-            
-            universe_performance[parameters.get('universe')].append(performance_score)
-            neutralization_performance[parameters.get('neutralization')].append(performance_score)
-        
-        # Universe建议
-        print("🌍 Universe参数建议:")
-        for universe, scores in universe_performance.items():
-            avg_score = sum(scores) / len(scores) if scores else 0
-            print(f"  {universe}: 平均性能 {avg_score:.3f} ({len(scores)} 个样本)")
-        
-        # Neutralization建议
-        print("\n⚖️ Neutralization参数建议:")
-        for neutralization, scores in neutralization_performance.items():
-            avg_score = sum(scores) / len(scores) if scores else 0
-            print(f"  {neutralization}: 平均性能 {avg_score:.3f} ({len(scores)} 个样本)")
+
+        titles = {'universe': "🌍 Universe参数建议:", 'neutralization': "\n⚖️ Neutralization参数建议:"}
+        for parameter, title in titles.items():
+            stats = self.parameter_performance[parameter]
+            print(title)
+            for value, row in stats.iterrows():
+                avg_score = row['performance'] / row['count'] if row['count'] else 0
+                print(f"  {value}: 平均性能 {avg_score:.3f} ({int(row['count'])} 个样本)")
+
+
+def print_live_statistics(aggregates_file=AGGREGATES_FILE, limit=10):
+    """直接读取模拟过程中维护的增量统计（无需扫描历史结果）"""
+    if not os.path.exists(aggregates_file):
+        return
+
+    aggregates = RunningAggregates(aggregates_file)
+    print(f"\n⚡ 增量统计 ({aggregates.rows} 条模拟结果)")
+    print("=" * 50)
+
+    print("📦 样本最多的参数分组:")
+    groups = sorted(aggregates.buckets.items(), key=lambda item: item[1]['count'], reverse=True)
+    for key, bucket in groups[:limit]:
+        summary = bucket_summary(bucket)
+        print(f"  {key}: {summary['count']} 个, 合格率 {summary['pass_rate']:.1%}, "
+              f"Sharpe {summary['mean_sharpe']:.3f}±{summary['std_sharpe']:.3f}")
+
+    print("\n🧭 各参数取值的边际统计:")
+    for key, marginal in sorted(aggregates.marginals.items()):
+        summary = bucket_summary(marginal)
+        print(f"  {key}: {summary['count']} 个, 合格率 {summary['pass_rate']:.1%}, "
+              f"Sharpe {summary['mean_sharpe']:.3f}±{summary['std_sharpe']:.3f}")
+
+    print("\n🏅 得分最高的 Alpha:")
+    for i, record in enumerate(aggregates.top_results()[:limit], 1):
+        mark = "✅" if record['passed'] else ""
+        print(f"  {i}. {record['alpha_id']} Sharpe={record['sharpe']:.3f} "
+              f"Fitness={record['fitness']:.3f} {mark} {record['expression']}")
+        if 'universe' in record:
+            # 旧版统计文件的记录没有参数，不显示同组统计
+            group = aggregates.bucket(record['expression_type'], record['universe'],
+                                      record['neutralization'], record['decay'])
+            print(f"     同参数组: {group['count']} 个, 合格率 {group['pass_rate']:.1%}, "
+                  f"平均 Sharpe {group['mean_sharpe']:.3f}")
 
 
 def main():
-    """主函数"""
-    analyzer = ParameterAnalyzer()
-    
-    if analyzer.data:
-        analyzer.analyze_parameter_performance()
-        analyzer.analyze_best_parameters()
-        analyzer.generate_optimization_suggestions()
+    """主函数（--all 分析全部模拟结果；--profile [--profile-mode sample] 按阶段剖析读取与报告）"""
+    profile = None
+    if '--profile' in sys.argv:
+        index = sys.argv.index('--profile-mode') if '--profile-mode' in sys.argv else -1
+        profile = sys.argv[index + 1] if 0 <= index < len(sys.argv) - 1 else 'full'
+    profiler = PhaseProfiler(profile)
+
+    with profiler.phase('live_statistics'):
+        print_live_statistics()
+    with profiler.phase('load'):
+        analyzer = ParameterAnalyzer(include_unqualified='--all' in sys.argv)
+
+    if analyzer.has_data():
+        with profiler.phase('report'):
+            analyzer.analyze_parameter_performance()
+            analyzer.analyze_best_parameters()
+            analyzer.generate_optimization_suggestions()
     else:
         print("❌ 没有可分析的数据，请先运行Alpha模拟生成数据")
+    profiler.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""参数选择学习模块 - 基于历史模拟结果的 Thompson 采样
+
+每种表达式类型的每个参数维度（neutralization、decay、truncation、universe）
+各自维护一组 Beta 后验，每个候选取值是一个"臂"。
+奖励取值 0~1：通过全部检查为 1，未通过时按指标达标程度给部分奖励，
+这样在合格率很低的早期也能区分参数的好坏。
+"""
+
+import random
+
+from qualification_rules import extract_metrics, qualification_score
+
+TRUNCATION_STEP = 0.01
+
+
+def truncation_arms(low, high, step=TRUNCATION_STEP):
+    """把 truncation 区间离散为等间隔的候选值"""
+    count = int(round((high - low) / step))
+    return [round(low + i * step, 3) for i in range(count + 1)]
+
+
+def snap_to_arm(value, arms):
+    """把历史记录中的参数值对齐到最近的候选值"""
+    if value in arms:
+        return value
+    try:
+        return min(arms, key=lambda arm: abs(float(arm) - float(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def result_reward(result, thresholds=None):
+    """模拟结果 -> 0~1 奖励；模拟失败返回 None（不计入学习）
+
+    thresholds 为合格阈值（默认 DEFAULT_THRESHOLDS），应与判断合格时使用的一致。
+    """
+    if not result or not result.get('metrics'):
+        return None
+    passed = bool(result.get('passed_all_checks'))
+    if passed:
+        return 1.0
+    score = qualification_score(extract_metrics(result['metrics']), passed=False, thresholds=thresholds)
+    return max(0.0, min(score, 1.0)) * 0.5
+
+
+class ThompsonParameterSampler:
+    """按 (表达式类型, 参数维度, 取值) 维护 Beta 后验的 Thompson 采样器"""
+
+    def __init__(self, prior=(1.0, 1.0), rng=None):
+        self.prior = prior
+        self.random = rng or random.Random()
+        self.posteriors = {}    # {类型: {维度: {取值: [alpha, beta]}}}
+        self.observations = {}  # {类型: 观测次数}
+
+    def _posterior(self, expr_type, dimension, arm):
+        arms = self.posteriors.setdefault(expr_type, {}).setdefault(dimension, {})
+        return arms.setdefault(arm, list(self.prior))
+
+    def choose(self, expr_type, dimension, arms):
+        """对每个候选值抽样后验均值，选择最大者"""
+        best_arm, best_draw = None, -1.0
+        for arm in arms:
+            alpha, beta = self._posterior(expr_type, dimension, arm)
+            draw = self.random.betavariate(alpha, beta)
+            if draw > best_draw:
+                best_arm, best_draw = arm, draw
+        return best_arm
+
+    def update(self, expr_type, dimension, arm, reward):
+        """按奖励更新对应候选值的后验"""
+        posterior = self._posterior(expr_type, dimension, arm)
+        posterior[0] += reward
+        posterior[1] += 1.0 - reward
+
+    def seed(self, expr_type, dimension, arm, successes, failures):
+        """把已汇总的合格/未合格次数直接计入后验（来自增量统计的先验）"""
+        posterior = self._posterior(expr_type, dimension, arm)
+        posterior[0] += successes
+        posterior[1] += failures
+
+    def expected_reward(self, expr_type, dimension, arm):
+        """后验均值"""
+        alpha, beta = self._posterior(expr_type, dimension, arm)
+        return alpha / (alpha + beta)
+
+    def record_observation(self, expr_type):
+        self.observations[expr_type] = self.observations.get(expr_type, 0) + 1
@@ -0,0 +1,181 @@
+"""Alpha 日 PnL 本地缓存与自相关检查模块
+
+每个 Alpha 的日 PnL 只从平台获取一次，以紧凑的二进制格式保存在 pnl_cache/<alpha_id>.npz
+（日期为 int32 序号，PnL 为 float32）。提交前把候选的日收益与已提交 Alpha
+分块做相关性计算，超过平台自相关阈值的候选直接跳过，不再浪费提交次数。
+"""
+
+import json
+import os
+from datetime import date, datetime
+from time import sleep
+
+import numpy as np
+
+from correlation_filter import blocked_max_correlation
+
+PNL_CACHE_DIR = "pnl_cache"
+SELF_CORRELATION_THRESHOLD = 0.7
+CORRELATION_LOOKBACK_DAYS = 4 * 365   # 平台按最近 4 年的日收益计算自相关
+MIN_OVERLAP_DAYS = 60
+
+
+def parse_pnl_recordset(data):
+    """PnL recordset 接口返回 -> (日期序号数组, 累计 PnL 数组)"""
+    names = [prop.get('name') for prop in data.get('schema', {}).get('properties', [])]
+    date_index = names.index('date') if 'date' in names else 0
+    pnl_index = names.index('pnl') if 'pnl' in names else 1
+
+    dates, pnl = [], []
+    for record in data.get('records', []):
+        try:
+            dates.append(date.fromisoformat(str(record[date_index])[:10]).toordinal())
+            pnl.append(float(record[pnl_index]))
+        except (IndexError, TypeError, ValueError):
+            continue
+    return np.array(dates, dtype=np.int32), np.array(pnl, dtype=np.float32)
+
+
+def daily_return_vectors(series, lookback_days=CORRELATION_LOOKBACK_DAYS):
+    """[(日期, 累计PnL)] -> 对齐日期后的单位向量矩阵 (k, 天数)
+
+    每个序列取日差分，限制在最近 lookback_days 内，去均值后归一化；
+    缺失的日期填 0，因此内积即为（近似的）相关系数。
+    """
+    if not series:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    latest = max(int(dates[-1]) for dates, _ in series if len(dates))
+    start = latest - lookback_days
+    all_dates = np.unique(np.concatenate([dates[dates > start] for dates, _ in series]))
+
+    matrix = np.zeros((len(series), len(all_dates)), dtype=np.float32)
+    for row, (dates, pnl) in enumerate(series):
+        if len(dates) < 2:
+            continue
+        returns = np.diff(pnl.astype(np.float64))
+        return_dates = dates[1:]
+        keep = return_dates > start
+        if keep.sum() < MIN_OVERLAP_DAYS:
+            continue
+        values = returns[keep] - returns[keep].mean()
+        norm = np.linalg.norm(values)
+        if norm > 0:
+            matrix[row, np.searchsorted(all_dates, return_dates[keep])] = values / norm
+    return matrix
+
+
+class PnLStore:
+    """按 Alpha ID 缓存日 PnL，并记录哪些 Alpha 已经提交"""
+
+    def __init__(self, directory=PNL_CACHE_DIR):
+        self.directory = directory
+        self.index_file = os.path.join(directory, "index.json")
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._load_index()   # {alpha_id: {'fetched_at', 'submitted'}}
+
+    def _load_index(self):
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ 加载 PnL 缓存索引失败: {str(e)}")
+            return {}
+
+    def _save_index(self):
+        try:
+            with open(self.index_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"⚠️ 保存 PnL 缓存索引失败: {str(e)}")
+
+    def _path(self, alpha_id):
+        return os.path.join(self.directory, f"{alpha_id}.npz")
+
+    def has(self, alpha_id):
+        return os.path.exists(self._path(alpha_id))
+
+    def load(self, alpha_id):
+        """(日期序号数组, 累计 PnL 数组)，未缓存时返回 None"""
+        if not self.has(alpha_id):
+            return None
+        with np.load(self._path(alpha_id)) as data:
+            return data['dates'], data['pnl']
+
+    def save(self, alpha_id, dates, pnl):
+        np.savez_compressed(self._path(alpha_id), dates=dates, pnl=pnl)
+        entry = self.index.setdefault(alpha_id, {'submitted': False})
+        entry['fetched_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._save_index()
+
+    def fetch(self, session, api_base_url, alpha_id, max_wait=60):
+        """从平台获取日 PnL 并缓存，已缓存的直接返回"""
+        if self.has(alpha_id):
+            return self.load(alpha_id)
+
+        url = f"{api_base_url}/alphas/{alpha_id}/recordsets/pnl"
+        waited = 0.0
+        try:
+            while True:
+                response = session.get(url)
+                retry = float(response.headers.get('Retry-After', 0))
+                if retry == 0 or waited >= max_wait:
+                    break
+                sleep(retry)
+                waited += retry
+
+            if response.status_code != 200:
+                print(f"⚠️ 获取 Alpha {alpha_id} 的 PnL 失败: {response.status_code}")
+                return None
+
+            dates, pnl = parse_pnl_recordset(response.json())
+            if len(dates) == 0:
+                return None
+            self.save(alpha_id, dates, pnl)
+            return dates, pnl
+        except Exception as e:
+            print(f"⚠️ 获取 Alpha {alpha_id} 的 PnL 出错: {str(e)}")
+            return None
+
+    def mark_submitted(self, alpha_ids):
+        for alpha_id in alpha_ids:
+            self.index.setdefault(alpha_id, {})['submitted'] = True
+        self._save_index()
+
+    def submitted_ids(self):
+        return [alpha_id for alpha_id, entry in self.index.items() if entry.get('submitted')]
+
+    def self_correlation(self, candidate_ids, submitted_ids, threshold=SELF_CORRELATION_THRESHOLD,
+                         block_size=256):
+        """按顺序检查候选与已提交 Alpha 的最大相关系数
+
+        通过的候选加入参考集合（同一批提交的候选之间也不能高度相关）。
+
+        Returns:
+            (通过的 ID 列表, {被跳过的 ID: 最大相关系数}, 没有 PnL 数据的 ID 列表)
+        """
+        candidates = [(alpha_id, self.load(alpha_id)) for alpha_id in candidate_ids]
+        missing = [alpha_id for alpha_id, series in candidates if series is None]
+        candidates = [(alpha_id, series) for alpha_id, series in candidates if series is not None]
+        reference = [series for series in (self.load(alpha_id) for alpha_id in submitted_ids) if series is not None]
+        if not candidates:
+            return [], {}, missing
+
+        vectors = daily_return_vectors([series for _, series in candidates] + reference)
+        candidate_vectors, reference_vectors = vectors[:len(candidates)], vectors[len(candidates):]
+
+        # 先与已提交集合整体分块计算，再在幸存者之间贪心去重
+        max_corr = blocked_max_correlation(candidate_vectors, reference_vectors, block_size, absolute=False)
+        passed, rejected, accepted_rows = [], {}, []
+        for row, (alpha_id, _) in enumerate(candidates):
+            corr = float(max_corr[row])
+            if accepted_rows and corr <= threshold:
+                corr = max(corr, float((candidate_vectors[accepted_rows] @ candidate_vectors[row]).max()))
+            if corr > threshold:
+                rejected[alpha_id] = corr
+            else:
+                passed.append(alpha_id)
+                accepted_rows.append(row)
+        return passed, rejected, missing
@@ -0,0 +1,231 @@
+"""性能剖析模块 - 按阶段（生成、参数配置、断点续传过滤、模拟、保存等）记录 CPU 与内存
+
+两种模式：
+    full    每个阶段单独的 cProfile（profiles/<阶段>.prof，可用 snakeviz / pstats 查看）、
+            按函数耗时排序的文本报告，以及 tracemalloc 前后快照对比的内存分配报告
+    sample  后台线程定时采样主线程调用栈，开销很低，适合数小时的长时间运行；
+            定期写出各阶段的热点函数与折叠栈（<阶段>.folded，可直接生成火焰图）
+
+阶段可以嵌套，内层阶段的耗时不计入外层（同一时间只有一个 cProfile 在运行）。
+只剖析主线程；在其他线程中进入的阶段不做记录。
+"""
+
+import atexit
+import io
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# cProfile / pstats / tracemalloc 只在启用剖析时导入，不影响普通运行的启动时间
+
+PROFILE_DIR = "profiles"
+PROFILE_MODES = ('full', 'sample')
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 25
+SAMPLE_INTERVAL = 0.01     # 秒
+SAMPLE_FLUSH_EVERY = 60    # 秒，采样模式定期写出报告
+MAX_STACK_DEPTH = 64
+
+
+class PhaseProfiler:
+    """按阶段剖析；mode 为 None 时所有调用都是空操作"""
+
+    def __init__(self, mode=None, output_dir=PROFILE_DIR, sample_interval=SAMPLE_INTERVAL):
+        if mode is not None and mode not in PROFILE_MODES:
+            print(f"⚠️ 未知的剖析模式 {mode}，使用 full")
+            mode = 'full'
+        self.mode = mode
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.thread_id = threading.main_thread().ident
+        self._stack = []           # 当前嵌套的阶段名
+        self._profiles = {}        # full: {阶段: cProfile.Profile}
+        self._allocations = {}     # full: {阶段: [(大小差, 数量差, 位置)]}
+        self._samples = {}         # sample: {阶段: {折叠栈: 次数}}
+        self._durations = {}       # {阶段: [次数, 累计秒数]}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+        if mode is None:
+            return
+        os.makedirs(output_dir, exist_ok=True)
+        if mode == 'full':
+            import tracemalloc
+            tracemalloc.start(10)
+        else:
+            self._sampler = threading.Thread(target=self._sample_loop, name='profiler-sampler', daemon=True)
+            self._sampler.start()
+        atexit.register(self.close)
+        print(f"🔬 性能剖析已启用 ({mode} 模式)，报告输出到 {output_dir}/")
+
+    @property
+    def enabled(self):
+        return self.mode is not None
+
+    @contextmanager
+    def phase(self, name):
+        """剖析一个阶段；同名阶段多次进入时结果累加"""
+        if not self.enabled or threading.get_ident() != self.thread_id:
+            yield
+            return
+
+        parent = self._stack[-1] if self._stack else None
+        if self.mode == 'full':
+            import cProfile
+            if parent is not None:
+                self._profiles[parent].disable()
+            before = self._snapshot()
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+            profile.enable()
+
+        with self._lock:
+            self._stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._stack.pop()
+                stats = self._durations.setdefault(name, [0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+
+            if self.mode == 'full':
+                profile.disable()
+                self._record_allocations(name, before, self._snapshot())
+                self._write_full_report(name)
+                if parent is not None:
+                    self._profiles[parent].enable()
+
+    @staticmethod
+    def _snapshot():
+        """内存快照（排除剖析器自身的分配）"""
+        import tracemalloc
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def _record_allocations(self, name, before, after):
+        differences = after.compare_to(before, 'lineno')
+        merged = {}
+        for entry in self._allocations.get(name, []) + [
+            (stat.size_diff, stat.count_diff, str(stat.traceback[0])) for stat in differences if stat.size_diff
+        ]:
+            size, count, location = entry
+            total = merged.setdefault(location, [0, 0])
+            total[0] += size
+            total[1] += count
+        ranked = sorted(merged.items(), key=lambda item: -abs(item[1][0]))[:TOP_ALLOCATIONS * 4]
+        self._allocations[name] = [(size, count, location) for location, (size, count) in ranked]
+
+    def _write_full_report(self, name):
+        """写出该阶段的 .prof 文件、函数耗时报告和内存分配报告（累计值，每次覆盖）"""
+        import pstats
+        import tracemalloc
+        try:
+            profile = self._profiles[name]
+            profile.dump_stats(os.path.join(self.output_dir, f"{name}.prof"))
+
+            buffer = io.StringIO()
+            stats = pstats.Stats(profile, stream=buffer)
+            stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            count, total = self._durations[name]
+            with open(os.path.join(self.output_dir, f"{name}_functions.txt"), 'w', encoding='utf-8') as f:
+                f.write(f"阶段 {name}: {count} 次, 累计 {total:.3f} 秒\n")
+                f.write(buffer.getvalue())
+
+            current, peak = tracemalloc.get_traced_memory()
+            with open(os.path.join(self.output_dir, f"{name}_allocations.txt"), 'w', encoding='utf-8') as f:
+                f.write(f"阶段 {name}: 当前已分配 {current / 1024 / 1024:.1f} MB, "
+                        f"峰值 {peak / 1024 / 1024:.1f} MB\n")
+                f.write(f"{'净增字节':>14}{'净增对象':>10}  位置\n")
+                for size, count, location in self._allocations[name][:TOP_ALLOCATIONS]:
+                    f.write(f"{size:>14,}{count:>10,}  {location}\n")
+        except Exception as e:
+            print(f"⚠️ 写出剖析报告失败 ({name}): {str(e)}")
+
+    def _sample_loop(self):
+        last_flush = time.monotonic()
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self.thread_id)
+            with self._lock:
+                name = self._stack[-1] if self._stack else None
+            if frame is None or name is None:
+                continue
+
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            with self._lock:
+                counts = self._samples.setdefault(name, {})
+                counts[key] = counts.get(key, 0) + 1
+
+            if time.monotonic() - last_flush >= SAMPLE_FLUSH_EVERY:
+                self._write_sample_reports()
+                last_flush = time.monotonic()
+
+    def _write_sample_reports(self):
+        """写出各阶段的折叠栈文件和热点函数报告"""
+        with self._lock:
+            samples = {name: dict(counts) for name, counts in self._samples.items()}
+            durations = {name: list(stats) for name, stats in self._durations.items()}
+
+        for name, counts in samples.items():
+            try:
+                total = sum(counts.values())
+                self_counts, inclusive = {}, {}
+                for key, count in counts.items():
+                    frames = key.split(';')
+                    self_counts[frames[-1]] = self_counts.get(frames[-1], 0) + count
+                    for function in set(frames):
+                        inclusive[function] = inclusive.get(function, 0) + count
+
+                with open(os.path.join(self.output_dir, f"{name}.folded"), 'w', encoding='utf-8') as f:
+                    for key, count in sorted(counts.items(), key=lambda item: -item[1]):
+                        f.write(f"{key} {count}\n")
+
+                calls, seconds = durations.get(name, [0, 0.0])
+                with open(os.path.join(self.output_dir, f"{name}_samples.txt"), 'w', encoding='utf-8') as f:
+                    f.write(f"阶段 {name}: {calls} 次, 累计 {seconds:.3f} 秒, {total} 个采样 "
+                            f"(间隔 {self.sample_interval * 1000:.0f} ms)\n\n")
+                    f.write("自身耗时最多的位置:\n")
+                    for function, count in sorted(self_counts.items(), key=lambda item: -item[1])[:TOP_FUNCTIONS]:
+                        f.write(f"{count / total:>8.1%}  {function}\n")
+                    f.write("\n包含子调用耗时最多的位置:\n")
+                    for function, count in sorted(inclusive.items(), key=lambda item: -item[1])[:TOP_FUNCTIONS]:
+                        f.write(f"{count / total:>8.1%}  {function}\n")
+            except Exception as e:
+                print(f"⚠️ 写出采样报告失败 ({name}): {str(e)}")
+
+    def summary(self):
+        """各阶段次数与累计耗时（字符串）"""
+        with self._lock:
+            durations = sorted(self._durations.items(), key=lambda item: -item[1][1])
+        rows = [f"{'阶段':<22}{'次数':>8}{'累计':>12}"]
+        rows += [f"{name:<22}{count:>8}{total:>11.3f}s" for name, (count, total) in durations]
+        return "\n".join(rows)
+
+    def close(self):
+        """停止采样并写出最终报告"""
+        if not self.enabled:
+            return
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+            self._write_sample_reports()
+        else:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+        print(f"\n🔬 性能剖析报告已写入 {self.output_dir}/")
+        print(self.summary())
+        self.mode = None
@@ -0,0 +1,171 @@
+"""Alpha 提交标准模块 - 指标提取、合格阈值、合格度评分与批量重新评判"""
+
+import json
+import os
+
+THRESHOLDS_FILE = "qualification_thresholds.json"
+
+DEFAULT_THRESHOLDS = {
+    'sharpe': 1.5,
+    'fitness': 1.0,
+    'turnover_min': 0.1,
+    'turnover_max': 0.9,
+    'margin': 0.02,
+    'subuniverse': True,       # 是否要求子宇宙 Sharpe 达到平台要求
+    'platform_checks': True,   # 是否要求平台其他检查项全部通过
+}
+
+RULE_NAMES = ['sharpe', 'fitness', 'turnover', 'margin', 'subuniverse', 'platform_checks']
+
+
+def load_thresholds(path=THRESHOLDS_FILE):
+    """读取阈值配置文件（只需写要修改的项），不存在时使用默认阈值"""
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if not os.path.exists(path):
+        return thresholds
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            print(f"⚠️ 忽略未知的阈值项: {sorted(unknown)}")
+        thresholds.update({k: v for k, v in overrides.items() if k in DEFAULT_THRESHOLDS})
+    except Exception as e:
+        print(f"⚠️ 加载阈值配置失败，使用默认阈值: {str(e)}")
+    return thresholds
+
+
+def extract_metrics(is_data):
+    """从模拟结果的 'is' 字段提取用于评判的指标"""
+
+    sub_universe_check = next(
+        (
+            check for check in is_data.get('checks', [])
+            if check.get('name') == 'LOW_SUB_UNIVERSE_SHARPE'
+        ),
+        {}
+    )
+
+    return {
+        'sharpe': float(is_data.get('sharpe') or 0),
+        'fitness': float(is_data.get('fitness') or 0),
+        'turnover': float(is_data.get('turnover') or 0),
+        'margin': float(is_data.get('margin') or 0),  # margin 对应 IC Mean
+        'subuniverse_sharpe': float(sub_universe_check.get('value') or 0),
+        'required_subuniverse_sharpe': float(sub_universe_check.get('limit') or 0),
+    }
+
+
+def qualification_score(metrics, passed=False, thresholds=None):
+    """合格度得分，用于比较未合格 Alpha 之间的优劣
+
+    每项指标按达标程度计 0~1 分取平均；全部通过再加 1 分，
+    并按 Sharpe 超出阈值的部分给予少量奖励。
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+
+    def ratio(value, limit):
+        if limit <= 0:
+            return 1.0
+        return max(0.0, min(value / limit, 1.0))
+
+    turnover = metrics['turnover']
+    low, high = thresholds['turnover_min'], thresholds['turnover_max']
+    if low <= turnover <= high:
+        turnover_ratio = 1.0
+    else:
+        distance = low - turnover if turnover < low else turnover - high
+        turnover_ratio = max(0.0, 1.0 - distance / (high - low))
+
+    ratios = [
+        ratio(metrics['sharpe'], thresholds['sharpe']),
+        ratio(metrics['fitness'], thresholds['fitness']),
+        turnover_ratio,
+        ratio(metrics['margin'], thresholds['margin']),
+        ratio(metrics['subuniverse_sharpe'], metrics['required_subuniverse_sharpe']),
+    ]
+
+    score = sum(ratios) / len(ratios)
+    if passed:
+        score += 1.0 + 0.1 * max(metrics['sharpe'] - thresholds['sharpe'], 0.0)
+    return score
+
+
+def _column(frame, name):
+    import numpy as np
+
+    return np.nan_to_num(frame[name].to_numpy(dtype=float, na_value=np.nan))
+
+
+def evaluate_rules(frame, thresholds=None):
+    """对结果表整体计算每条规则是否通过，返回 {规则名: 布尔数组}
+
+    frame 为结果存储中的 DataFrame（每行一次模拟），所有规则一次向量化计算。
+    """
+    import numpy as np
+
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    turnover = _column(frame, 'turnover')
+    subuniverse = _column(frame, 'subuniverse_sharpe')
+    required = _column(frame, 'required_subuniverse_sharpe')
+    failed_checks = frame['failed_checks'].fillna('').astype(str).to_numpy()
+
+    rules = {
+        'sharpe': _column(frame, 'sharpe') >= thresholds['sharpe'],
+        'fitness': _column(frame, 'fitness') >= thresholds['fitness'],
+        'turnover': (turnover >= thresholds['turnover_min']) & (turnover <= thresholds['turnover_max']),
+        'margin': _column(frame, 'margin') >= thresholds['margin'],
+        'subuniverse': (subuniverse >= required) if thresholds['subuniverse'] else np.ones(len(frame), bool),
+        'platform_checks': (failed_checks == '') if thresholds['platform_checks'] else np.ones(len(frame), bool),
+    }
+    return rules
+
+
+def score_frame(frame, thresholds=None, passed=None):
+    """qualification_score 的向量化版本，passed 为 None 时按 evaluate_rules 计算"""
+    import numpy as np
+
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+
+    def ratio(values, limit):
+        if limit <= 0:
+            return np.ones_like(values)
+        return np.clip(values / limit, 0.0, 1.0)
+
+    turnover = _column(frame, 'turnover')
+    low, high = thresholds['turnover_min'], thresholds['turnover_max']
+    distance = np.where(turnover < low, low - turnover, np.maximum(turnover - high, 0.0))
+    turnover_ratio = np.clip(1.0 - distance / (high - low), 0.0, 1.0)
+
+    required = _column(frame, 'required_subuniverse_sharpe')
+    subuniverse = _column(frame, 'subuniverse_sharpe')
+    subuniverse_ratio = np.where(
+        required > 0, np.clip(subuniverse / np.where(required > 0, required, 1.0), 0.0, 1.0), 1.0
+    )
+
+    sharpe = _column(frame, 'sharpe')
+    score = (
+        ratio(sharpe, thresholds['sharpe']) +
+        ratio(_column(frame, 'fitness'), thresholds['fitness']) +
+        turnover_ratio +
+        ratio(_column(frame, 'margin'), thresholds['margin']) +
+        subuniverse_ratio
+    ) / 5
+
+    if passed is None:
+        rules = evaluate_rules(frame, thresholds)
+        passed = np.logical_and.reduce(list(rules.values()))
+    bonus = 1.0 + 0.1 * np.maximum(sharpe - thresholds['sharpe'], 0.0)
+    return score + np.where(passed, bonus, 0.0)
+
+
+def requalify(frame, thresholds=None):
+    """按新阈值重新评判全部历史结果，返回附加规则列、qualified、score 并按得分排序的表"""
+    import numpy as np
+
+    rules = evaluate_rules(frame, thresholds)
+    qualified = np.logical_and.reduce(list(rules.values()))
+    columns = {f'rule_{name}': values for name, values in rules.items()}
+    columns['qualified'] = qualified
+    columns['score'] = score_frame(frame, thresholds, passed=qualified)
+    return frame.assign(**columns).sort_values('score', ascending=False, kind='stable')
@@ -0,0 +1,91 @@
+"""离线重新评判工具 - 按新的阈值对全部历史模拟结果重新判定和排序，不调用 API
+
+用法:
+    python requalify.py                      # 使用 qualification_thresholds.json 或默认阈值
+    python requalify.py --sharpe 1.25 --fitness 0.8 --top 20
+    python requalify.py --no-subuniverse --save   # 保存修改后的阈值，供之后的模拟使用
+"""
+
+import argparse
+import json
+import os
+import time
+
+from qualification_rules import (RULE_NAMES, THRESHOLDS_FILE, load_thresholds,
+                                 requalify)
+from result_store import RESULTS_FILE, ResultStore
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="按新阈值重新评判历史模拟结果")
+    parser.add_argument('--results', default=RESULTS_FILE, help="模拟结果文件")
+    parser.add_argument('--sharpe', type=float)
+    parser.add_argument('--fitness', type=float)
+    parser.add_argument('--turnover-min', type=float)
+    parser.add_argument('--turnover-max', type=float)
+    parser.add_argument('--margin', type=float)
+    parser.add_argument('--no-subuniverse', action='store_true', help="不要求子宇宙 Sharpe")
+    parser.add_argument('--no-platform-checks', action='store_true', help="不要求平台其他检查项")
+    parser.add_argument('--top', type=int, default=10, help="显示得分最高的条数")
+    parser.add_argument('--save', action='store_true', help=f"把阈值写入 {THRESHOLDS_FILE}")
+    return parser.parse_args()
+
+
+def build_thresholds(args):
+    thresholds = load_thresholds()
+    for key in ('sharpe', 'fitness', 'turnover_min', 'turnover_max', 'margin'):
+        value = getattr(args, key)
+        if value is not None:
+            thresholds[key] = value
+    if args.no_subuniverse:
+        thresholds['subuniverse'] = False
+    if args.no_platform_checks:
+        thresholds['platform_checks'] = False
+    return thresholds
+
+
+def main():
+    args = parse_args()
+    thresholds = build_thresholds(args)
+    store = ResultStore(args.results)
+
+    # 结果存储建立之前的模拟记录从断点续传文件导入
+    if not store.exists() and os.path.exists("alpha_resume.json"):
+        with open("alpha_resume.json", 'r', encoding='utf-8') as f:
+            tested = json.load(f)
+        print(f"📥 从断点续传记录导入 {store.import_resume_records(tested)} 条历史结果")
+
+    start = time.perf_counter()
+    frame = store.load_frame()
+    if frame.empty:
+        print("❌ 没有可评判的模拟结果，请先运行Alpha模拟生成数据")
+        return
+    ranked = requalify(frame, thresholds)
+    elapsed = time.perf_counter() - start
+
+    previously = ranked['passed'].fillna(False).astype(bool)
+    now = ranked['qualified']
+    print(f"📊 重新评判 {len(ranked)} 条模拟结果，用时 {elapsed:.2f} 秒")
+    print(f"阈值: {thresholds}")
+    print(f"  模拟时合格: {int(previously.sum())} 个")
+    print(f"  新阈值合格: {int(now.sum())} 个 (新增 {int((now & ~previously).sum())}, "
+          f"不再合格 {int((previously & ~now).sum())})")
+
+    print("\n各规则通过率:")
+    for name in RULE_NAMES:
+        print(f"  {name}: {ranked[f'rule_{name}'].mean():.1%}")
+
+    print(f"\n🏆 得分最高的 {args.top} 个:")
+    for _, row in ranked.head(args.top).iterrows():
+        mark = "✅" if row['qualified'] else "  "
+        print(f"{mark} {row['score']:.3f} {row['alpha_id']} Sharpe={row['sharpe']:.2f} "
+              f"Fitness={row['fitness']:.2f} Turnover={row['turnover']:.2f} {row['expression']}")
+
+    if args.save:
+        with open(THRESHOLDS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(thresholds, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 阈值已保存到 {THRESHOLDS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""模拟结果的增量统计模块 - 在模拟过程中逐条更新分组计数、求和与平方和
+
+按 (表达式类型, Universe, Neutralization, Decay 区间) 分组维护各指标的
+count / sum / sum of squares，另按单个参数维度维护边际统计，并保留得分最高的 k 条记录。
+统计保存在 alpha_aggregates.json，报告和参数学习可以 O(1) 查询均值和标准差，
+不需要重新扫描全部历史结果。
+"""
+
+import heapq
+import json
+import math
+import os
+from datetime import datetime
+
+from qualification_rules import qualification_score
+
+AGGREGATES_FILE = "alpha_aggregates.json"
+AGGREGATE_METRICS = ['sharpe', 'fitness', 'turnover', 'margin', 'score']
+DECAY_BUCKET_WIDTH = 5
+KEY_SEPARATOR = '|'
+
+
+def decay_bucket(decay):
+    """decay -> 区间标签，如 0-4、5-9"""
+    try:
+        low = int(decay) // DECAY_BUCKET_WIDTH * DECAY_BUCKET_WIDTH
+    except (TypeError, ValueError):
+        return 'unknown'
+    return f"{low}-{low + DECAY_BUCKET_WIDTH - 1}"
+
+
+def _label(value):
+    """参数取值 -> 分组键中的字符串，缺失值统一为 unknown"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 'unknown'
+    return str(value)
+
+
+def _decay_value(decay):
+    """decay -> 可写入 JSON 的整数，缺失为 None"""
+    try:
+        return int(decay)
+    except (TypeError, ValueError):
+        return None
+
+
+def _empty_bucket():
+    return {
+        'count': 0,
+        'passed': 0,
+        'sum': {metric: 0.0 for metric in AGGREGATE_METRICS},
+        'sumsq': {metric: 0.0 for metric in AGGREGATE_METRICS},
+    }
+
+
+def _accumulate(bucket, values, passed):
+    bucket['count'] += 1
+    bucket['passed'] += int(passed)
+    for metric, value in values.items():
+        bucket['sum'][metric] += value
+        bucket['sumsq'][metric] += value * value
+
+
+def bucket_summary(bucket):
+    """分组统计 -> {count, pass_rate, mean_x, std_x}"""
+    count = bucket['count']
+    summary = {'count': count, 'pass_rate': bucket['passed'] / count if count else 0.0}
+    for metric in AGGREGATE_METRICS:
+        mean = bucket['sum'][metric] / count if count else 0.0
+        variance = bucket['sumsq'][metric] / count - mean * mean if count else 0.0
+        summary[f'mean_{metric}'] = mean
+        summary[f'std_{metric}'] = math.sqrt(max(variance, 0.0))
+    return summary
+
+
+class RunningAggregates:
+    """可持久化的增量分组统计"""
+
+    def __init__(self, path=AGGREGATES_FILE, top_k=20, save_every=10, thresholds=None):
+        """
+        Args:
+            thresholds: 计算得分使用的合格阈值（默认 DEFAULT_THRESHOLDS），应与判断合格时一致
+        """
+        self.path = path
+        self.thresholds = thresholds
+        self.top_k = top_k
+        self.save_every = save_every
+        self.buckets = {}     # {类型|universe|neutralization|decay区间: 统计}
+        self.marginals = {}   # {类型|维度|取值: 统计}
+        self.top = []         # [(score, 序号, 记录)] 最小堆
+        self.rows = 0
+        self._unsaved = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.buckets = state['buckets']
+            self.marginals = state['marginals']
+            self.top = [tuple(entry) for entry in state['top']]
+            heapq.heapify(self.top)
+            self.rows = state['rows']
+        except Exception as e:
+            print(f"⚠️ 加载增量统计失败: {str(e)}")
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'rows': self.rows,
+                    'buckets': self.buckets,
+                    'marginals': self.marginals,
+                    'top': self.top,
+                    'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }, f, ensure_ascii=False)
+            self._unsaved = 0
+        except Exception as e:
+            print(f"⚠️ 保存增量统计失败: {str(e)}")
+
+    def update(self, row):
+        """加入一条结果存储中的扁平记录"""
+        values = {metric: float(row.get(metric) or 0) for metric in AGGREGATE_METRICS if metric != 'score'}
+        values['score'] = qualification_score(
+            dict(values, subuniverse_sharpe=float(row.get('subuniverse_sharpe') or 0),
+                 required_subuniverse_sharpe=float(row.get('required_subuniverse_sharpe') or 0)),
+            passed=bool(row.get('passed')), thresholds=self.thresholds
+        )
+        passed = bool(row.get('passed'))
+        expr_type = row.get('expression_type') or 'unknown'
+        dimensions = {
+            'universe': _label(row.get('universe')),
+            'neutralization': _label(row.get('neutralization')),
+            'decay': decay_bucket(row.get('decay')),
+        }
+
+        key = KEY_SEPARATOR.join([expr_type] + list(dimensions.values()))
+        _accumulate(self.buckets.setdefault(key, _empty_bucket()), values, passed)
+        for dimension, value in dimensions.items():
+            marginal_key = KEY_SEPARATOR.join([expr_type, dimension, value])
+            _accumulate(self.marginals.setdefault(marginal_key, _empty_bucket()), values, passed)
+
+        # 第二项为序号，保证堆比较时不会比较到字典
+        entry = (values['score'], self.rows, {
+            'alpha_id': row.get('alpha_id'),
+            'expression': row.get('expression'),
+            'expression_type': expr_type,
+            'universe': dimensions['universe'],
+            'neutralization': dimensions['neutralization'],
+            'decay': _decay_value(row.get('decay')),
+            'sharpe': values['sharpe'],
+            'fitness': values['fitness'],
+            'passed': passed,
+        })
+        if len(self.top) < self.top_k:
+            heapq.heappush(self.top, entry)
+        elif entry[0] > self.top[0][0]:
+            heapq.heapreplace(self.top, entry)
+
+        self.rows += 1
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def bucket(self, expression_type, universe, neutralization, decay):
+        """单个分组的统计摘要，decay 为具体数值"""
+        key = KEY_SEPARATOR.join([expression_type, _label(universe), _label(neutralization), decay_bucket(decay)])
+        return bucket_summary(self.buckets.get(key, _empty_bucket()))
+
+    def marginal(self, expression_type, dimension, value):
+        """某类型下单个参数取值的边际统计，dimension 为 universe / neutralization / decay"""
+        if dimension == 'decay':
+            value = decay_bucket(value)
+        key = KEY_SEPARATOR.join([expression_type, dimension, _label(value)])
+        return bucket_summary(self.marginals.get(key, _empty_bucket()))
+
+    def top_results(self):
+        """得分最高的记录，从高到低"""
+        return [entry[2] for entry in sorted(self.top, key=lambda e: (-e[0], e[1]))]
+
+    def rebuild(self, result_store):
+        """从结果存储全量重建（统计文件丢失或首次启用时）"""
+        self.buckets, self.marginals, self.top, self.rows = {}, {}, [], 0
+        save_every, self.save_every = self.save_every, float('inf')
+        try:
+            for chunk in result_store.iter_frames():
+                for row in chunk[chunk['stage'] == 'production'].to_dict('records'):
+                    self.update(row)
+        finally:
+            self.save_every = save_every
+        self.save()
+        return self.rows
@@ -0,0 +1,174 @@
+"""模拟结果存储模块 - 每次模拟的指标与参数逐行追加到 JSONL 文件
+
+alpha_details.json 只保存合格 Alpha，这里保存全部模拟结果（含未合格），
+供离线重新评判、参数分析等批量计算使用。每行是一条扁平记录，
+按块读取为 pandas DataFrame。
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+from qualification_rules import extract_metrics
+
+RESULTS_FILE = "alpha_results.jsonl"
+
+RESULT_COLUMNS = [
+    'timestamp', 'alpha_id', 'expression', 'expression_type', 'stage',
+    'universe', 'neutralization', 'decay', 'truncation',
+    'sharpe', 'fitness', 'turnover', 'margin',
+    'subuniverse_sharpe', 'required_subuniverse_sharpe',
+    'failed_checks', 'passed', 'submission_status',
+]
+
+SUBMISSION_STAGE = 'submission'
+
+# 子宇宙 Sharpe 单独作为指标评判，不计入平台检查项
+_METRIC_CHECKS = {'LOW_SUB_UNIVERSE_SHARPE'}
+
+
+def iter_json_array(path, read_size=1 << 20):
+    """逐条产出 JSON 数组文件中的元素，内存占用与单条记录大小成正比
+
+    用于 alpha_details.json 这类整体写成一个数组的历史文件，避免一次 json.load。
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(read_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} 不是 JSON 数组")
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+
+def flatten_result(result, stage='production'):
+    """模拟结果 -> 扁平记录；没有指标的结果返回 None"""
+
+    if not result or not result.get('metrics'):
+        return None
+
+    is_data = result['metrics']
+    parameters = result.get('parameters') or {}
+    failed_checks = [
+        check.get('name') for check in is_data.get('checks', [])
+        if check.get('result') in ('FAIL', 'PENDING') and check.get('name') not in _METRIC_CHECKS
+    ]
+
+    row = {
+        'timestamp': result.get('timestamp'),
+        'alpha_id': result.get('alpha_id'),
+        'expression': result.get('expression'),
+        'expression_type': result.get('expression_type', 'unknown'),
+        'stage': stage,
+        'universe': parameters.get('universe'),
+        'neutralization': parameters.get('neutralization'),
+        'decay': parameters.get('decay'),
+        'truncation': parameters.get('truncation'),
+        'failed_checks': ','.join(name for name in failed_checks if name),
+        'passed': bool(result.get('passed_all_checks')),
+    }
+    row.update(extract_metrics(is_data))
+    return row
+
+
+class ResultStore:
+    """追加写入的模拟结果存储"""
+
+    def __init__(self, path=RESULTS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def append(self, result, stage='production'):
+        """追加一条模拟结果，返回写入的扁平记录（未写入时返回 None）"""
+        row = flatten_result(result, stage)
+        if row is None:
+            return None
+        try:
+            line = json.dumps(row, ensure_ascii=False)
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+            return row
+        except Exception as e:
+            print(f"⚠️ 保存模拟结果失败: {str(e)}")
+            return None
+
+    def append_submission(self, alpha_id, status):
+        """记录一次提交结果（stage 为 submission 的记录不含指标）"""
+        row = {
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'alpha_id': alpha_id,
+            'stage': SUBMISSION_STAGE,
+            'submission_status': status,
+        }
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"⚠️ 保存提交结果失败: {str(e)}")
+
+    def submission_outcomes(self):
+        """{alpha_id: 最近一次提交结果}"""
+        outcomes = {}
+        for chunk in self.iter_frames(columns=['alpha_id', 'stage', 'submission_status']):
+            chunk = chunk[chunk['stage'] == SUBMISSION_STAGE]
+            outcomes.update(zip(chunk['alpha_id'], chunk['submission_status']))
+        return outcomes
+
+    def import_resume_records(self, tested_expressions):
+        """从断点续传记录导入历史模拟结果（结果存储建立之前的数据）"""
+        count = 0
+        for record in tested_expressions.values():
+            result = dict(record.get('result') or {})
+            if not result.get('metrics'):
+                continue
+            result.setdefault('expression', record.get('expression'))
+            result.setdefault('parameters', record.get('parameters'))
+            result.setdefault('timestamp', record.get('timestamp'))
+            stage = 'production' if record.get('stage', 'production') == 'production' else 'screening'
+            if self.append(result, stage):
+                count += 1
+        return count
+
+    def iter_frames(self, chunksize=200000, columns=None):
+        """按块读取为 DataFrame，内存占用与块大小成正比"""
+        if not self.exists():
+            return
+        import pandas as pd
+
+        reader = pd.read_json(self.path, lines=True, chunksize=chunksize, dtype=False)
+        with reader:
+            for chunk in reader:
+                chunk = chunk.reindex(columns=columns or RESULT_COLUMNS)
+                yield chunk
+
+    def load_frame(self, columns=None, stage='production'):
+        """读取全部结果；stage 为 None 时包含多级筛选第一阶段的记录"""
+        frames = []
+        for chunk in self.iter_frames(columns=None):
+            if stage is not None:
+                chunk = chunk[chunk['stage'] == stage]
+            frames.append(chunk if columns is None else chunk[columns])
+        import pandas as pd
+
+        if not frames:
+            return pd.DataFrame(columns=columns or RESULT_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,180 @@
+"""运行指标模块 - 各阶段耗时直方图、计数器、吞吐率，导出 Prometheus 文本文件与汇总表
+
+直方图采用 HDR 风格的对数-线性分桶：每个 2 的幂区间再均分为 2^SUB_BUCKET_BITS 个子桶，
+相对误差不超过 1/2^SUB_BUCKET_BITS，内存与记录次数无关。
+所有数据保存在本地，不依赖外部服务。
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_FILE = "alpha_metrics.prom"
+SUB_BUCKET_BITS = 5
+MIN_RESOLUTION = 1e-3   # 秒；更小的值记入最低的桶
+PROMETHEUS_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800]
+
+# 各阶段的中文说明，汇总表中使用
+PHASE_LABELS = {
+    'simulation_total': "单次模拟总耗时",
+    'simulation_post': "模拟请求 POST",
+    'simulation_completion': "模拟提交到完成",
+    'fixed_sleep': "固定等待 sleep",
+    'detail_fetch': "获取 Alpha 详情",
+    'qualification': "合格检查",
+    'persistence': "结果保存",
+    'submit_total': "单次提交总耗时",
+    'submit_post': "提交请求 POST",
+}
+
+
+class LatencyHistogram:
+    """HDR 风格的对数-线性直方图（单位：秒）"""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @staticmethod
+    def _index(value):
+        scaled = max(value / MIN_RESOLUTION, 1.0)
+        exponent = int(math.floor(math.log2(scaled)))
+        sub = int((scaled / 2 ** exponent - 1.0) * (1 << SUB_BUCKET_BITS))
+        return exponent, min(sub, (1 << SUB_BUCKET_BITS) - 1)
+
+    @staticmethod
+    def _upper_bound(index):
+        exponent, sub = index
+        return MIN_RESOLUTION * 2 ** exponent * (1.0 + (sub + 1) / (1 << SUB_BUCKET_BITS))
+
+    def record(self, value):
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        """q 为 0~100；返回所在桶的上界（不超过实际最大值）"""
+        if self.count == 0:
+            return 0.0
+        target = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def cumulative_count(self, bound):
+        """不超过 bound 的记录数（按桶上界近似）"""
+        return sum(count for index, count in self.counts.items() if self._upper_bound(index) <= bound)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class RunMetrics:
+    """一次运行的阶段耗时与计数器（线程安全）"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            self.histograms.setdefault(phase, LatencyHistogram()).record(seconds)
+
+    def increment(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def percentile(self, phase, q):
+        """-> (该阶段的 q 百分位耗时, 记录次数)；没有记录时为 (0.0, 0)"""
+        with self._lock:
+            histogram = self.histograms.get(phase)
+            if histogram is None:
+                return 0.0, 0
+            return histogram.percentile(q), histogram.count
+
+    @contextmanager
+    def timer(self, phase):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(phase, self.clock() - start)
+
+    def sleep(self, seconds, sleep=time.sleep):
+        """固定等待也计入 fixed_sleep 阶段"""
+        with self.timer('fixed_sleep'):
+            sleep(seconds)
+
+    def elapsed_hours(self):
+        return max(self.clock() - self.started, 1e-9) / 3600
+
+    def rates(self):
+        hours = self.elapsed_hours()
+        return {
+            'simulations_per_hour': self.counters.get('simulations_total', 0) / hours,
+            'qualified_per_hour': self.counters.get('qualified_total', 0) / hours,
+        }
+
+    def export_prometheus(self, path=METRICS_FILE):
+        """写出 Prometheus 文本格式（node_exporter textfile collector 可直接读取）"""
+        lines = [
+            "# HELP alpha_phase_seconds Latency of each simulation/submission phase.",
+            "# TYPE alpha_phase_seconds histogram",
+        ]
+        with self._lock:
+            for phase, histogram in sorted(self.histograms.items()):
+                for bound in PROMETHEUS_BUCKETS:
+                    lines.append(f'alpha_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} '
+                                 f'{histogram.cumulative_count(bound)}')
+                lines.append(f'alpha_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}')
+                lines.append(f'alpha_phase_seconds_sum{{phase="{phase}"}} {histogram.total:.6f}')
+                lines.append(f'alpha_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+
+            lines += ["# HELP alpha_events_total Counters of simulation and submission events.",
+                      "# TYPE alpha_events_total counter"]
+            for counter, value in sorted(self.counters.items()):
+                lines.append(f'alpha_events_total{{event="{counter}"}} {value}')
+
+        lines += ["# HELP alpha_throughput_per_hour Events per hour since the run started.",
+                  "# TYPE alpha_throughput_per_hour gauge"]
+        for name, value in self.rates().items():
+            lines.append(f'alpha_throughput_per_hour{{rate="{name}"}} {value:.3f}')
+
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            print(f"⚠️ 导出运行指标失败: {str(e)}")
+
+    def summary_table(self):
+        """各阶段耗时汇总表（字符串）"""
+        header = f"{'阶段':<18}{'次数':>8}{'平均':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'最大':>10}{'合计':>10}"
+        rows = [header, "-" * 86]
+        with self._lock:
+            for phase, histogram in sorted(self.histograms.items(), key=lambda item: -item[1].total):
+                label = PHASE_LABELS.get(phase, phase)
+                rows.append(
+                    f"{label:<18}{histogram.count:>8}{histogram.mean():>9.2f}s"
+                    f"{histogram.percentile(50):>9.2f}s{histogram.percentile(90):>9.2f}s"
+                    f"{histogram.percentile(99):>9.2f}s{histogram.max:>9.2f}s{histogram.total:>9.0f}s"
+                )
+            counters = ", ".join(f"{name}={value}" for name, value in sorted(self.counters.items()))
+        rates = self.rates()
+        rows.append("-" * 86)
+        rows.append(f"计数: {counters or '无'}")
+        rows.append(f"吞吐: {rates['simulations_per_hour']:.1f} 次模拟/小时, "
+                    f"{rates['qualified_per_hour']:.2f} 个合格/小时")
+        return "\n".join(rows)
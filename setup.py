@@ -11,6 +11,7 @@ setup(
     install_requires=[
         "requests>=2.31.0",
         "pandas>=2.0.0",
+        "numpy>=1.24.0",
     ],
     entry_points={
         'console_scripts': [
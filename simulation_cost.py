@@ -0,0 +1,156 @@
+"""模拟耗时模型 - 按表达式特征预测平台计算耗时，用于短作业优先的模拟排序
+
+特征：算子数、时间序列算子数、分组算子数、回归中性化算子数、最大窗口、嵌套深度、股票池大小。
+模型为 log(耗时) 上的在线岭回归，先验权重给出没有观测数据时的经验估计（窗口越长、
+股票池越大、回归中性化越多越慢），每个完成的模拟都会更新模型，保存在 simulation_cost_model.json。
+特征维度很小，正规方程直接用高斯消元求解，不依赖 numpy。
+"""
+
+import json
+import math
+import os
+import re
+import threading
+
+from alpha_expression import Call, Number, parse_expression, tree_depth, walk
+from expression_validator import OPERATOR_SIGNATURES
+
+COST_MODEL_FILE = "simulation_cost_model.json"
+FEATURES = ('bias', 'operators', 'ts_operators', 'group_operators', 'regressions',
+            'log_max_window', 'depth', 'log_universe')
+# 先验权重（log 秒）：约 60 秒起，窗口、股票池和回归中性化增加耗时
+PRIOR_WEIGHTS = (4.1, 0.02, 0.05, 0.05, 0.2, 0.15, 0.05, 0.3)
+PRIOR_STRENGTH = 5.0        # 先验相当于多少个观测
+SAVE_EVERY = 10
+REGRESSION_OPERATORS = {'regression_neut', 'vector_neut', 'ts_regression'}
+
+
+def _universe_size(universe):
+    match = re.search(r'(\d+)', universe or '')
+    return int(match.group(1)) if match else 3000
+
+
+def expression_features(expression, settings=None):
+    """表达式与模拟参数 -> 特征向量（与 FEATURES 对应）；无法解析时只保留股票池特征"""
+    log_universe = math.log(_universe_size((settings or {}).get('universe')) / 1000)
+    try:
+        tree = parse_expression(expression)
+    except ValueError:
+        return [1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, log_universe]
+
+    calls = [node for node in walk(tree) if isinstance(node, Call)]
+    windows = [0]
+    for call in calls:
+        # 签名中类型为 d 的参数是窗口
+        params = OPERATOR_SIGNATURES.get(call.name, {}).get('params', '')
+        windows += [arg.value for arg, kind in zip(call.args, params)
+                    if kind == 'd' and isinstance(arg, Number)]
+    return [
+        1.0,
+        float(len(calls)),
+        float(sum(1 for call in calls if 'd' in OPERATOR_SIGNATURES.get(call.name, {}).get('params', ''))),
+        float(sum(1 for call in calls if call.name.startswith('group_'))),
+        float(sum(1 for call in calls if call.name in REGRESSION_OPERATORS)),
+        math.log1p(max(windows)),
+        float(tree_depth(tree)),
+        log_universe,
+    ]
+
+
+def _solve(matrix, vector):
+    """高斯消元（部分主元）求解线性方程组"""
+    size = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(size)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda r: abs(rows[r][column]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        if abs(rows[column][column]) < 1e-12:
+            continue
+        for r in range(size):
+            if r != column:
+                factor = rows[r][column] / rows[column][column]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[column])]
+    return [rows[i][size] / rows[i][i] if abs(rows[i][i]) >= 1e-12 else 0.0 for i in range(size)]
+
+
+class SimulationCostModel:
+    """在线岭回归：预测单个模拟的平台计算耗时（秒）"""
+
+    def __init__(self, path=COST_MODEL_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        size = len(FEATURES)
+        self.xtx = [[0.0] * size for _ in range(size)]
+        self.xty = [0.0] * size
+        self.samples = 0
+        self.abs_log_error = 0.0   # 观测前预测误差的累计值（|log 预测 - log 实际|）
+        self._unsaved = 0
+        self._load()
+        self._weights = self._fit()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if tuple(data.get('features', ())) != FEATURES:
+                print("⚠️ 模拟耗时模型的特征已变化，重新学习")
+                return
+            self.xtx, self.xty = data['xtx'], data['xty']
+            self.samples = data['samples']
+            self.abs_log_error = data.get('abs_log_error', 0.0)
+        except Exception as e:
+            print(f"⚠️ 加载模拟耗时模型失败: {str(e)}")
+
+    def save(self):
+        with self._lock:
+            data = {'features': list(FEATURES), 'xtx': self.xtx, 'xty': self.xty,
+                    'samples': self.samples, 'abs_log_error': self.abs_log_error}
+            self._unsaved = 0
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        except Exception as e:
+            print(f"⚠️ 保存模拟耗时模型失败: {str(e)}")
+
+    def _fit(self):
+        """(XᵀX + λI) w = Xᵀy + λ w₀"""
+        matrix = [[value + (PRIOR_STRENGTH if i == j else 0.0) for j, value in enumerate(row)]
+                  for i, row in enumerate(self.xtx)]
+        vector = [value + PRIOR_STRENGTH * prior for value, prior in zip(self.xty, PRIOR_WEIGHTS)]
+        return _solve(matrix, vector)
+
+    def predict(self, expression, settings=None):
+        """预测耗时（秒）"""
+        features = expression_features(expression, settings)
+        with self._lock:
+            weights = self._weights
+        return math.exp(sum(w * x for w, x in zip(weights, features)))
+
+    def observe(self, expression, settings, seconds):
+        """用一次完成的模拟耗时更新模型"""
+        if seconds <= 0:
+            return
+        features = expression_features(expression, settings)
+        target = math.log(seconds)
+        with self._lock:
+            predicted = sum(w * x for w, x in zip(self._weights, features))
+            self.abs_log_error += abs(predicted - target)
+            for i, xi in enumerate(features):
+                self.xty[i] += xi * target
+                row = self.xtx[i]
+                for j, xj in enumerate(features):
+                    row[j] += xi * xj
+            self.samples += 1
+            self._unsaved += 1
+            self._weights = self._fit()
+            should_save = self._unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def summary(self):
+        if not self.samples:
+            return "📐 模拟耗时模型: 暂无观测，使用先验估计"
+        error = math.exp(self.abs_log_error / self.samples) - 1
+        return f"📐 模拟耗时模型: {self.samples} 个观测, 平均预测误差约 {error:.0%}"
@@ -0,0 +1,106 @@
+"""模拟日志模块 - 记录已被平台接受、尚未取回结果的模拟
+
+每个模拟请求返回 201 后立即把进度 URL (Location) 和请求内容追加到
+inflight_simulations.jsonl；结果记录后追加一条完成记录。进程被终止或崩溃时，
+平台上的模拟仍在运行，下次启动时从日志中找回这些进度 URL 继续轮询并记录结果，
+而不是重新提交同样的模拟。
+
+日志只追加写入（每行一次 flush），启动加载时压缩为只含未完成模拟的新文件。
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+JOURNAL_FILE = "inflight_simulations.jsonl"
+POSTED = 'posted'
+DONE = 'done'
+
+
+class SimulationJournal:
+    """进行中模拟的追加式日志"""
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = self._load()   # {进度 URL: {'alpha': 请求内容, 'posted_at': 时间}}
+        self._compact()
+        self._file = None
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue   # 崩溃时写了一半的最后一行
+                    if record.get('event') == POSTED:
+                        entries[record['location']] = {'alpha': record['alpha'], 'posted_at': record['posted_at']}
+                    elif record.get('event') == DONE:
+                        entries.pop(record['location'], None)
+        except Exception as e:
+            print(f"⚠️ 加载模拟日志失败: {str(e)}")
+        return entries
+
+    def _compact(self):
+        """重写日志，只保留未完成的模拟"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            if not self.entries:
+                os.remove(self.path)
+                return
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for location, entry in self.entries.items():
+                    f.write(self._line(POSTED, location, **entry))
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ 压缩模拟日志失败: {str(e)}")
+
+    @staticmethod
+    def _line(event, location, **fields):
+        return json.dumps(dict(event=event, location=location, **fields), ensure_ascii=False) + "\n"
+
+    def _append(self, line):
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+        except Exception as e:
+            print(f"⚠️ 写入模拟日志失败: {str(e)}")
+
+    def posted(self, location, alpha):
+        """模拟已被接受：记录进度 URL 和请求内容（含内部字段，恢复时用于记录结果）"""
+        entry = {'alpha': alpha, 'posted_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        with self._lock:
+            self.entries[location] = entry
+            self._append(self._line(POSTED, location, **entry))
+
+    def done(self, location):
+        """模拟结果已记录（或已确定无法取回）"""
+        with self._lock:
+            if self.entries.pop(location, None) is not None:
+                self._append(self._line(DONE, location))
+
+    def pending(self):
+        """未完成的模拟 [(进度 URL, 请求内容)]，按提交顺序"""
+        with self._lock:
+            return [(location, entry['alpha']) for location, entry in self.entries.items()]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        """关闭追加句柄（每条记录写入后已 flush，关闭只释放文件句柄）"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,145 @@
+"""提交前检查模块 - 并发调用平台的提交检查接口并缓存结果
+
+每个 Alpha 的检查结果带时间戳保存在 submission_checks.json。
+再次运行时只刷新过期、尚未完成 (PENDING) 或出错的检查，
+全部检查通过的 Alpha 组成可提交列表。
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from time import sleep
+
+CHECKS_FILE = "submission_checks.json"
+CHECK_PASS = 'PASS'
+CHECK_FAIL = 'FAIL'
+CHECK_PENDING = 'PENDING'
+CHECK_ERROR = 'ERROR'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def summarize_checks(data):
+    """检查接口返回 -> (总体状态, 失败的检查项, 未完成的检查项)"""
+    checks = (data.get('is') or {}).get('checks')
+    if checks is None:
+        return CHECK_ERROR, [], []
+
+    failed = [check.get('name') for check in checks if check.get('result') == CHECK_FAIL]
+    pending = [check.get('name') for check in checks if check.get('result') == CHECK_PENDING]
+    if failed:
+        return CHECK_FAIL, failed, pending
+    if pending:
+        return CHECK_PENDING, failed, pending
+    return CHECK_PASS, failed, pending
+
+
+class CheckCache:
+    """带时间戳的提交检查结果缓存"""
+
+    def __init__(self, path=CHECKS_FILE, max_age_hours=24):
+        self.path = path
+        self.max_age = timedelta(hours=max_age_hours)
+        self.entries = self._load()   # {alpha_id: {'status', 'failed', 'pending', 'checked_at'}}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ 加载提交检查缓存失败: {str(e)}")
+            return {}
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"⚠️ 保存提交检查缓存失败: {str(e)}")
+
+    def record(self, alpha_id, status, failed=None, pending=None):
+        self.entries[alpha_id] = {
+            'status': status,
+            'failed': failed or [],
+            'pending': pending or [],
+            'checked_at': datetime.now().strftime(TIME_FORMAT)
+        }
+
+    def is_fresh(self, alpha_id, now=None):
+        """已有结果且未过期；PENDING 和出错的结果总是需要刷新"""
+        entry = self.entries.get(alpha_id)
+        if not entry or entry['status'] in (CHECK_PENDING, CHECK_ERROR):
+            return False
+        checked_at = datetime.strptime(entry['checked_at'], TIME_FORMAT)
+        return (now or datetime.now()) - checked_at < self.max_age
+
+    def status(self, alpha_id):
+        """未过期的检查状态，没有有效结果时返回 None"""
+        return self.entries[alpha_id]['status'] if self.is_fresh(alpha_id) else None
+
+    def ready_ids(self, alpha_ids):
+        """按给定顺序返回检查全部通过且未过期的 ID"""
+        return [alpha_id for alpha_id in alpha_ids if self.status(alpha_id) == CHECK_PASS]
+
+
+class SubmissionCheckRunner:
+    """并发执行提交前检查"""
+
+    def __init__(self, session, api_base_url, cache=None, max_workers=5, max_wait=300):
+        self.session = session
+        self.api_base_url = api_base_url
+        self.cache = cache or CheckCache()
+        self.max_workers = max_workers
+        self.max_wait = max_wait
+
+    def check_alpha(self, alpha_id):
+        """调用检查接口并等待结果，返回 (状态, 失败项, 未完成项)"""
+        url = f"{self.api_base_url}/alphas/{alpha_id}/check"
+        waited = 0.0
+        try:
+            while True:
+                response = self.session.get(url)
+                retry = float(response.headers.get('Retry-After', 0))
+                if retry == 0:
+                    break
+                if waited >= self.max_wait:
+                    return CHECK_PENDING, [], []
+                sleep(retry)
+                waited += retry
+
+            if response.status_code != 200:
+                print(f"⚠️ 检查 Alpha {alpha_id} 失败: {response.status_code}")
+                return CHECK_ERROR, [], []
+            return summarize_checks(response.json())
+        except Exception as e:
+            print(f"⚠️ 检查 Alpha {alpha_id} 出错: {str(e)}")
+            return CHECK_ERROR, [], []
+
+    def run(self, alpha_ids):
+        """刷新需要检查的 ID，返回可提交的 ID 列表（保持原顺序）"""
+        alpha_ids = list(dict.fromkeys(alpha_ids))
+        to_check = [alpha_id for alpha_id in alpha_ids if not self.cache.is_fresh(alpha_id)]
+        print(f"\n提交前检查: {len(alpha_ids)} 个 Alpha, 使用缓存 {len(alpha_ids) - len(to_check)} 个, "
+              f"需要检查 {len(to_check)} 个")
+
+        if to_check:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self.check_alpha, alpha_id): alpha_id for alpha_id in to_check}
+                for done, future in enumerate(as_completed(futures), 1):
+                    alpha_id = futures[future]
+                    status, failed, pending = future.result()
+                    self.cache.record(alpha_id, status, failed, pending)
+                    detail = f" ({', '.join(failed or pending)})" if failed or pending else ""
+                    print(f"[{done}/{len(to_check)}] {alpha_id}: {status}{detail}")
+                    if done % 10 == 0:
+                        self.cache.save()
+            self.cache.save()
+
+        counts = {}
+        for alpha_id in alpha_ids:
+            status = self.cache.entries.get(alpha_id, {}).get('status', CHECK_ERROR)
+            counts[status] = counts.get(status, 0) + 1
+        print(f"检查结果: {counts}")
+        return self.cache.ready_ids(alpha_ids)
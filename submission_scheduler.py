@@ -0,0 +1,161 @@
+"""Alpha 提交调度模块 - 按指标排序、限制并发数、在一个循环中轮询所有提交状态
+
+提交接口为异步：POST 返回 201 后需要反复 GET 同一地址，直到响应不再带 Retry-After。
+调度器同时保持最多 max_concurrent 个提交在进行中，每个提交按各自的
+Retry-After 安排下一次轮询，单线程即可同时等待多个提交。
+"""
+
+import os
+import time
+
+from qualification_rules import extract_metrics, qualification_score, score_frame
+from result_store import iter_json_array
+
+SUBMITTED = 'submitted'
+REJECTED = 'rejected'
+FAILED = 'failed'
+FINAL_STATUSES = (SUBMITTED, REJECTED)
+
+
+def rank_alpha_ids(alpha_ids, result_store, details_file="alpha_details.json", thresholds=None):
+    """按模拟指标的合格度得分从高到低排序，没有指标记录的保持原顺序排在最后
+
+    thresholds 为合格阈值（默认 DEFAULT_THRESHOLDS），应与判断合格时使用的一致。
+    """
+    scores = {}
+
+    if result_store.exists():
+        frame = result_store.load_frame(columns=None)
+        frame = frame[frame['alpha_id'].isin(set(alpha_ids))]
+        if not frame.empty:
+            frame = frame.assign(score=score_frame(frame, thresholds=thresholds,
+                                                     passed=frame['passed'].fillna(False).astype(bool)))
+            scores.update(frame.groupby('alpha_id')['score'].max().to_dict())
+
+    missing = set(alpha_ids) - set(scores)
+    if missing and os.path.exists(details_file):
+        try:
+            for detail in iter_json_array(details_file):
+                if detail.get('alpha_id') in missing and detail.get('metrics'):
+                    scores[detail['alpha_id']] = qualification_score(
+                        extract_metrics(detail['metrics']), passed=True, thresholds=thresholds)
+        except Exception as e:
+            print(f"⚠️ 读取 Alpha 详细信息失败: {str(e)}")
+
+    order = {alpha_id: i for i, alpha_id in enumerate(alpha_ids)}
+    return sorted(alpha_ids, key=lambda alpha_id: (alpha_id not in scores, -scores.get(alpha_id, 0.0),
+                                                   order[alpha_id]))
+
+
+class SubmissionScheduler:
+    """有并发上限的提交调度器"""
+
+    def __init__(self, session, api_base_url, max_concurrent=3, max_attempts=5, retry_delay=3,
+                 clock=time.monotonic, sleep=time.sleep, metrics=None):
+        """
+        Args:
+            metrics: RunMetrics，记录提交 POST 与单次提交总耗时
+        """
+        self.session = session
+        self.metrics = metrics
+        self.api_base_url = api_base_url
+        self.max_concurrent = max_concurrent
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self.sleep = sleep
+
+    def _submit_url(self, alpha_id):
+        return f"{self.api_base_url}/alphas/{alpha_id}/submit"
+
+    def run(self, alpha_ids, target=None, on_outcome=None):
+        """按给定顺序提交，成功 target 个后不再发起新的提交
+
+        Args:
+            on_outcome(alpha_id, 状态): 每个 Alpha 得到最终结果时调用
+        Returns:
+            {alpha_id: submitted / rejected / failed}
+        """
+        queue = [(alpha_id, 1, 0.0) for alpha_id in alpha_ids]   # (ID, 第几次尝试, 最早开始时间)
+        in_flight = {}   # {alpha_id: (下次轮询时间, 第几次尝试)}
+        outcomes = {}
+        started = {}     # {alpha_id: 第一次 POST 的时间}
+
+        def finish(alpha_id, status):
+            outcomes[alpha_id] = status
+            if self.metrics:
+                self.metrics.observe('submit_total', self.clock() - started.get(alpha_id, self.clock()))
+                self.metrics.increment('submissions_total')
+                if status == SUBMITTED:
+                    self.metrics.increment('submissions_succeeded')
+            print(f"{'✅' if status == SUBMITTED else '❌'} Alpha {alpha_id}: {status}")
+            if on_outcome:
+                on_outcome(alpha_id, status)
+
+        def successes():
+            return sum(1 for status in outcomes.values() if status == SUBMITTED)
+
+        while in_flight or queue:
+            now = self.clock()
+
+            # 补充新的提交，直到并发上限（有目标数量时不超过还需要的数量）
+            while queue and len(in_flight) < self.max_concurrent:
+                if target is not None and successes() + len(in_flight) >= target:
+                    break
+                ready = next((i for i, entry in enumerate(queue) if entry[2] <= now), None)
+                if ready is None:
+                    break
+                alpha_id, attempt, _ = queue.pop(ready)
+                print(f"第 {attempt} 次尝试提交 Alpha {alpha_id}")
+                started.setdefault(alpha_id, now)
+                post_start = self.clock()
+                try:
+                    response = self.session.post(self._submit_url(alpha_id))
+                    status_code = response.status_code
+                except Exception as e:
+                    print(f"提交请求异常: {str(e)}")
+                    status_code = None
+                if self.metrics:
+                    self.metrics.observe('submit_post', self.clock() - post_start)
+
+                if status_code == 201:
+                    in_flight[alpha_id] = (now, attempt)
+                elif status_code in [400, 403]:
+                    print(f"提交被拒绝 ({status_code})")
+                    finish(alpha_id, REJECTED)
+                elif attempt < self.max_attempts:
+                    queue.append((alpha_id, attempt + 1, now + self.retry_delay))
+                else:
+                    finish(alpha_id, FAILED)
+
+            if target is not None and successes() >= target and not in_flight:
+                break
+
+            # 轮询所有到期的提交状态
+            for alpha_id, (due, attempt) in list(in_flight.items()):
+                if due > now:
+                    continue
+                try:
+                    response = self.session.get(self._submit_url(alpha_id))
+                    retry = float(response.headers.get('Retry-After', 0))
+                except Exception as e:
+                    print(f"查询提交状态异常: {str(e)}")
+                    retry = self.retry_delay
+                    response = None
+
+                if retry > 0:
+                    in_flight[alpha_id] = (now + retry, attempt)
+                    continue
+                del in_flight[alpha_id]
+                finish(alpha_id, SUBMITTED if response.status_code == 200 else REJECTED)
+
+            # 等到最早需要处理的时间点
+            pending_times = [due for due, _ in in_flight.values()]
+            can_start = len(in_flight) < self.max_concurrent and (
+                target is None or successes() + len(in_flight) < target)
+            if queue and can_start:
+                pending_times += [entry[2] for entry in queue]
+            if pending_times:
+                self.sleep(max(min(pending_times) - self.clock(), 0))
+
+        return outcomes
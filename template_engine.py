@@ -0,0 +1,253 @@
+"""Alpha 模板引擎 - 带类型占位符的模板与字段组合的惰性枚举
+
+模板中用 {名称} 或 {名称:类型} 表示字段占位符，例如:
+    "if_else(rank({a:MATRIX}) > 0.5, {b:MATRIX}, -1 * {b:MATRIX})"
+
+同一类型的占位符从该类型的字段中取互不相同的 k 个字段：
+ordered=False 时为组合 C(n, k)，ordered=True 时为排列 P(n, k)。
+所有候选都按序号直接解码（组合数系统 / 排列编码），
+随机、分层、优先级三种采样都不需要展开完整的笛卡尔积。
+"""
+
+import heapq
+import itertools
+import math
+import random
+import re
+
+DEFAULT_FIELD_TYPE = 'MATRIX'
+SAMPLING_MODES = ('random', 'stratified', 'priority')
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)(?::(\w+))?\}")
+
+
+def unrank_combination(index, n, k):
+    """按字典序把序号解码为 range(n) 中的 k 组合"""
+    combination = []
+    start = 0
+    for remaining in range(k, 0, -1):
+        for value in range(start, n):
+            block = math.comb(n - value - 1, remaining - 1)
+            if index < block:
+                combination.append(value)
+                start = value + 1
+                break
+            index -= block
+    return combination
+
+
+def unrank_permutation(index, n, k):
+    """按字典序把序号解码为 range(n) 中的 k 排列"""
+    pool = list(range(n))
+    permutation = []
+    for position in range(k):
+        block = math.perm(n - position - 1, k - position - 1)
+        choice, index = divmod(index, block)
+        permutation.append(pool.pop(choice))
+    return permutation
+
+
+class AlphaTemplate:
+    """带类型占位符的表达式模板"""
+
+    def __init__(self, text, ordered=False, name=None):
+        self.text = text
+        self.ordered = ordered
+        self.name = name or text
+
+        # 按出现顺序记录占位符，同名占位符只算一个
+        self.placeholders = []
+        seen = {}
+        for match in _PLACEHOLDER_PATTERN.finditer(text):
+            placeholder, field_type = match.group(1), match.group(2) or DEFAULT_FIELD_TYPE
+            if placeholder in seen and seen[placeholder] != field_type:
+                raise ValueError(f"占位符 {placeholder} 的类型不一致: {seen[placeholder]} / {field_type}")
+            if placeholder not in seen:
+                seen[placeholder] = field_type
+                self.placeholders.append((placeholder, field_type))
+
+    def slots_by_type(self):
+        """{类型: [占位符名称]}，保持出现顺序"""
+        slots = {}
+        for placeholder, field_type in self.placeholders:
+            slots.setdefault(field_type, []).append(placeholder)
+        return slots
+
+    def render(self, assignment):
+        """用 {占位符: 字段名} 填充模板"""
+        return _PLACEHOLDER_PATTERN.sub(lambda m: assignment[m.group(1)], self.text)
+
+
+class _TemplateSpace:
+    """单个模板在给定字段池上的候选空间，支持按序号解码"""
+
+    def __init__(self, template, fields_by_type):
+        self.template = template
+        self.groups = []  # [(占位符列表, 字段列表, 该组候选数)]
+        for field_type, slots in template.slots_by_type().items():
+            pool = fields_by_type.get(field_type, [])
+            k, n = len(slots), len(pool)
+            size = (math.perm(n, k) if template.ordered else math.comb(n, k)) if n >= k else 0
+            self.groups.append((slots, pool, size))
+        self.size = math.prod(size for _, _, size in self.groups) if self.groups else 0
+
+    def decode(self, index):
+        """序号 -> 表达式（各类型组按混合进制拆分序号，第一组为最低位）"""
+        assignment = {}
+        for slots, pool, size in self.groups:
+            index, local = divmod(index, size)
+            unrank = unrank_permutation if self.template.ordered else unrank_combination
+            for slot, position in zip(slots, unrank(local, len(pool), len(slots))):
+                assignment[slot] = pool[position]
+        return self.template.render(assignment)
+
+    def strata(self):
+        """按首个占位符所选字段划分的连续序号区间 [(起点, 大小)]"""
+        if not self.groups or self.size == 0:
+            return []
+        slots, pool, size = self.groups[0]
+        inner = self.size // size
+        k, n = len(slots), len(pool)
+        result, start = [], 0
+        for first in range(n):
+            if self.template.ordered:
+                count = math.perm(n - 1, k - 1)
+            else:
+                count = math.comb(n - first - 1, k - 1)
+            if count:
+                result.append((start, count))
+            start += count
+        if inner == 1:
+            return result
+        # 首组位于最低位，其余组的每个取值各对应一段
+        return [(outer * size + s, c) for outer in range(inner) for s, c in result]
+
+
+def _allocate(sizes, budget):
+    """把预算尽量平均地分配到各层（注水法），不超过每层容量"""
+    allocation = [0] * len(sizes)
+    remaining = budget
+    open_layers = [i for i, size in enumerate(sizes) if size > 0]
+    while remaining > 0 and open_layers:
+        share = max(remaining // len(open_layers), 1)
+        next_open = []
+        for i in open_layers:
+            if remaining <= 0:
+                break
+            extra = min(share, sizes[i] - allocation[i], remaining)
+            allocation[i] += extra
+            remaining -= extra
+            if allocation[i] < sizes[i]:
+                next_open.append(i)
+        open_layers = next_open
+    return allocation
+
+
+class TemplateEngine:
+    """按模板惰性生成候选表达式"""
+
+    def __init__(self, templates, fields, field_priority=None, seed=None):
+        """
+        Args:
+            templates: AlphaTemplate 列表或模板字符串列表
+            fields: 字段名列表，或数据字段 API 返回的字典列表（含 id/type）
+            field_priority: {字段名: 优先级分数}，用于 priority 采样
+        """
+        self.templates = [t if isinstance(t, AlphaTemplate) else AlphaTemplate(t) for t in templates]
+        self.field_priority = field_priority or {}
+        self.random = random.Random(seed)
+
+        # 按类型分组，组内按优先级从高到低排序（同分保持原顺序）
+        self.fields_by_type = {}
+        for field in fields:
+            if isinstance(field, dict):
+                name, field_type = field['id'], field.get('type', DEFAULT_FIELD_TYPE)
+            else:
+                name, field_type = field, DEFAULT_FIELD_TYPE
+            bucket = self.fields_by_type.setdefault(field_type, [])
+            if name not in bucket:
+                bucket.append(name)
+        for field_type, names in self.fields_by_type.items():
+            names.sort(key=lambda name: -self.field_priority.get(name, 0))
+
+        self.spaces = [_TemplateSpace(t, self.fields_by_type) for t in self.templates]
+
+    def total_candidates(self):
+        """所有模板的候选总数（不展开）"""
+        return sum(space.size for space in self.spaces)
+
+    def generate(self, budget=None, sampling='stratified'):
+        """惰性生成最多 budget 个不重复的表达式，各模板轮流产出"""
+        if sampling not in SAMPLING_MODES:
+            raise ValueError(f"未知的采样方式: {sampling}，可选 {SAMPLING_MODES}")
+
+        total = self.total_candidates()
+        budget = total if budget is None else min(budget, total)
+        allocation = _allocate([space.size for space in self.spaces], budget)
+
+        iterators = [
+            self._iterate_space(space, quota, sampling)
+            for space, quota in zip(self.spaces, allocation) if quota > 0
+        ]
+        produced = 0
+        while iterators and produced < budget:
+            for iterator in list(iterators):
+                expression = next(iterator, None)
+                if expression is None:
+                    iterators.remove(iterator)
+                    continue
+                yield expression
+                produced += 1
+                if produced >= budget:
+                    return
+
+    def _iterate_space(self, space, quota, sampling):
+        if sampling == 'random':
+            for index in self.random.sample(range(space.size), quota):
+                yield space.decode(index)
+        elif sampling == 'stratified':
+            strata = space.strata()
+            counts = _allocate([size for _, size in strata], quota)
+            picks = [
+                [start + offset for offset in self.random.sample(range(size), count)]
+                for (start, size), count in zip(strata, counts) if count
+            ]
+            # 各层轮流产出，保证提前中断时覆盖依然均匀
+            for index in itertools.chain.from_iterable(itertools.zip_longest(*picks)):
+                if index is not None:
+                    yield space.decode(index)
+        else:
+            yield from itertools.islice(self._iterate_by_priority(space), quota)
+
+    def _iterate_by_priority(self, space):
+        """按所选字段优先级之和从高到低枚举（最佳优先搜索，仅适用单类型模板）"""
+        if len(space.groups) != 1:
+            # 多类型模板退化为按序号顺序枚举，字段已按优先级排序
+            for index in range(space.size):
+                yield space.decode(index)
+            return
+
+        slots, pool, _ = space.groups[0]
+        k, n = len(slots), len(pool)
+        scores = [self.field_priority.get(name, 0) for name in pool]
+
+        def total(state):
+            return sum(scores[i] for i in state)
+
+        start = tuple(range(k))
+        heap = [(-total(start), start)]
+        visited = {start}
+        while heap:
+            _, state = heapq.heappop(heap)
+            orderings = itertools.permutations(state) if space.template.ordered else [state]
+            for ordering in orderings:
+                yield space.template.render({slot: pool[i] for slot, i in zip(slots, ordering)})
+
+            # 后继：把某一位后移一格（保持严格递增）
+            for j in range(k):
+                limit = state[j + 1] if j + 1 < k else n
+                if state[j] + 1 < limit:
+                    successor = state[:j] + (state[j] + 1,) + state[j + 1:]
+                    if successor not in visited:
+                        visited.add(successor)
+                        heapq.heappush(heap, (-total(successor), successor))
@@ -0,0 +1,313 @@
+"""时间序列算子滚动窗口内核 - O(n) 向量化实现
+
+所有函数的输入为 (T, N) 面板（时间 × 股票），也接受一维序列。
+每个窗口只做增量更新，复杂度与窗口长度 d 无关：
+
+- ts_sum / ts_mean: 累加和差分
+- ts_std_dev / ts_corr: Welford 增删更新（数值稳定）
+- ts_decay_exp_window: 指数衰减递推
+- ts_rank: 按股票向量化的树状数组（Fenwick）顺序统计
+
+NaN 处理与 Brain 的 nanHandling 设置保持一致：
+- 'ON':  窗口内的 NaN 被忽略，只在有效值上计算
+- 'OFF': 窗口内出现任何 NaN，结果即为 NaN
+
+窗口未满 d 天时结果为 NaN。
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+NAN_HANDLING_OPTIONS = ('ON', 'OFF')
+# ts_rank 窗口不超过该长度时直接向量化比较整个窗口（常数小），更长时用树状数组
+TS_RANK_DIRECT_MAX_WINDOW = 256
+DIRECT_CHUNK_ELEMENTS = 4_000_000   # 直接比较时每块临时数组的元素数上限
+
+
+def _as_panel(x):
+    """转换为 float64 的二维面板，返回 (面板, 是否为一维输入)"""
+    arr = np.asarray(x, dtype=np.float64)
+    if arr.ndim == 1:
+        return arr[:, None], True
+    if arr.ndim != 2:
+        raise ValueError(f"仅支持一维或二维输入，收到 {arr.ndim} 维")
+    return arr, False
+
+
+def _restore(result, squeeze):
+    return result[:, 0] if squeeze else result
+
+
+def _check_args(d, nan_handling):
+    if int(d) != d or d < 1:
+        raise ValueError(f"窗口长度必须为正整数: {d}")
+    if nan_handling not in NAN_HANDLING_OPTIONS:
+        raise ValueError(f"nan_handling 必须为 {NAN_HANDLING_OPTIONS} 之一: {nan_handling}")
+    return int(d)
+
+
+def _window_diff(cum, d):
+    """由前缀累加和得到长度为 d 的窗口和（前 d-1 行为部分窗口）"""
+    out = cum.copy()
+    out[d:] -= cum[:-d]
+    return out
+
+
+def _finalize(result, valid_count, nan_count, d, nan_handling, min_valid=1):
+    """根据窗口有效值数量和 nanHandling 设置屏蔽结果"""
+    result[:d - 1] = np.nan
+    result[valid_count < min_valid] = np.nan
+    if nan_handling == 'OFF':
+        result[nan_count > 0] = np.nan
+    return result
+
+
+def _nan_counts(valid, d):
+    """窗口内有效值与 NaN 的数量"""
+    cum_valid = np.cumsum(valid, axis=0, dtype=np.int64)
+    valid_count = _window_diff(cum_valid, d)
+    window_len = np.minimum(np.arange(1, valid.shape[0] + 1), d)[:, None]
+    return valid_count, window_len - valid_count
+
+
+def ts_sum(x, d, nan_handling='ON'):
+    """过去 d 天的和"""
+    d = _check_args(d, nan_handling)
+    panel, squeeze = _as_panel(x)
+    valid = ~np.isnan(panel)
+
+    cum = np.cumsum(np.where(valid, panel, 0.0), axis=0)
+    result = _window_diff(cum, d)
+    valid_count, nan_count = _nan_counts(valid, d)
+    return _restore(_finalize(result, valid_count, nan_count, d, nan_handling), squeeze)
+
+
+def ts_mean(x, d, nan_handling='ON'):
+    """过去 d 天的均值"""
+    d = _check_args(d, nan_handling)
+    panel, squeeze = _as_panel(x)
+    valid = ~np.isnan(panel)
+
+    cum = np.cumsum(np.where(valid, panel, 0.0), axis=0)
+    total = _window_diff(cum, d)
+    valid_count, nan_count = _nan_counts(valid, d)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = total / valid_count
+    return _restore(_finalize(result, valid_count, nan_count, d, nan_handling), squeeze)
+
+
+class _RollingMoments:
+    """按股票向量化的 Welford 滚动矩（均值、二阶中心矩、协方差）"""
+
+    def __init__(self, n_cols):
+        self.count = np.zeros(n_cols)
+        self.mean_x = np.zeros(n_cols)
+        self.mean_y = np.zeros(n_cols)
+        self.m2_x = np.zeros(n_cols)
+        self.m2_y = np.zeros(n_cols)
+        self.c_xy = np.zeros(n_cols)
+
+    def add(self, x, y, mask):
+        if not mask.any():
+            return
+        self.count[mask] += 1
+        n = self.count[mask]
+        dx = x[mask] - self.mean_x[mask]
+        dy = y[mask] - self.mean_y[mask]
+        self.mean_x[mask] += dx / n
+        self.mean_y[mask] += dy / n
+        self.m2_x[mask] += dx * (x[mask] - self.mean_x[mask])
+        self.m2_y[mask] += dy * (y[mask] - self.mean_y[mask])
+        self.c_xy[mask] += dx * (y[mask] - self.mean_y[mask])
+
+    def remove(self, x, y, mask):
+        if not mask.any():
+            return
+        self.count[mask] -= 1
+        n = self.count[mask]
+        empty = n == 0
+        safe_n = np.where(empty, 1.0, n)
+        dx = x[mask] - self.mean_x[mask]
+        dy = y[mask] - self.mean_y[mask]
+        self.mean_x[mask] -= np.where(empty, self.mean_x[mask], dx / safe_n)
+        self.mean_y[mask] -= np.where(empty, self.mean_y[mask], dy / safe_n)
+        self.m2_x[mask] -= dx * (x[mask] - self.mean_x[mask])
+        self.m2_y[mask] -= dy * (y[mask] - self.mean_y[mask])
+        self.c_xy[mask] -= dx * (y[mask] - self.mean_y[mask])
+
+        # 窗口清空时重置，避免误差累积
+        if empty.any():
+            cols = np.flatnonzero(mask)[empty]
+            for arr in (self.m2_x, self.m2_y, self.c_xy):
+                arr[cols] = 0.0
+
+
+def _rolling_moments(x, y, d, on_step):
+    """遍历时间轴，对每个时点调用 on_step(t, moments)"""
+    valid = ~(np.isnan(x) | np.isnan(y))
+    moments = _RollingMoments(x.shape[1])
+
+    for t in range(x.shape[0]):
+        moments.add(x[t], y[t], valid[t])
+        if t >= d:
+            moments.remove(x[t - d], y[t - d], valid[t - d])
+        on_step(t, moments)
+    return valid
+
+
+def ts_std_dev(x, d, nan_handling='ON', ddof=1):
+    """过去 d 天的标准差（默认样本标准差）"""
+    d = _check_args(d, nan_handling)
+    panel, squeeze = _as_panel(x)
+    result = np.full(panel.shape, np.nan)
+
+    def on_step(t, m):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = m.m2_x / (m.count - ddof)
+        result[t] = np.sqrt(np.maximum(var, 0.0))
+
+    valid = _rolling_moments(panel, panel, d, on_step)
+    valid_count, nan_count = _nan_counts(valid, d)
+    result = _finalize(result, valid_count, nan_count, d, nan_handling, min_valid=ddof + 1)
+    return _restore(result, squeeze)
+
+
+def ts_corr(x, y, d, nan_handling='ON'):
+    """过去 d 天 x 与 y 的 Pearson 相关系数（成对有效值）"""
+    d = _check_args(d, nan_handling)
+    panel_x, squeeze = _as_panel(x)
+    panel_y, _ = _as_panel(y)
+    if panel_x.shape != panel_y.shape:
+        raise ValueError(f"ts_corr 输入形状不一致: {panel_x.shape} vs {panel_y.shape}")
+    result = np.full(panel_x.shape, np.nan)
+
+    def on_step(t, m):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[t] = m.c_xy / np.sqrt(m.m2_x * m.m2_y)
+
+    valid = _rolling_moments(panel_x, panel_y, d, on_step)
+    valid_count, nan_count = _nan_counts(valid, d)
+    result = _finalize(result, valid_count, nan_count, d, nan_handling, min_valid=2)
+    return _restore(np.clip(result, -1.0, 1.0), squeeze)
+
+
+def ts_decay_exp_window(x, d, factor=1.0, nan_handling='ON'):
+    """指数衰减加权平均: sum(x[t-i] * f^i) / sum(f^i), i = 0..d-1"""
+    d = _check_args(d, nan_handling)
+    if not 0 < factor <= 1:
+        raise ValueError(f"factor 必须在 (0, 1] 区间内: {factor}")
+    panel, squeeze = _as_panel(x)
+    valid = ~np.isnan(panel)
+    values = np.where(valid, panel, 0.0)
+    weights = valid.astype(np.float64)
+
+    tail = factor ** d
+    num = np.zeros(panel.shape[1])
+    den = np.zeros(panel.shape[1])
+    result = np.full(panel.shape, np.nan)
+
+    for t in range(panel.shape[0]):
+        num = values[t] + factor * num
+        den = weights[t] + factor * den
+        if t >= d:
+            num -= tail * values[t - d]
+            den -= tail * weights[t - d]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[t] = np.where(den > 1e-12, num / den, np.nan)
+
+    valid_count, nan_count = _nan_counts(valid, d)
+    return _restore(_finalize(result, valid_count, nan_count, d, nan_handling), squeeze)
+
+
+def _dense_positions(panel, valid):
+    """每列内的值压缩为 1..T 的整数位置（相同值位置相同），NaN 为 0"""
+    positions = np.zeros(panel.shape, dtype=np.int64)
+    ordered = np.sort(panel, axis=0)  # NaN 排在末尾
+    for col in range(panel.shape[1]):
+        positions[:, col] = np.searchsorted(ordered[:, col], panel[:, col], side='left') + 1
+    positions[~valid] = 0
+    return positions
+
+
+def _window_ranks_direct(panel, valid, d):
+    """O(n·d) 直接比较：按行分块展开 (行, 股票, d) 窗口，一次比较得到 less/equal 计数"""
+    n_rows, n_cols = panel.shape
+    padded = np.vstack([np.full((d - 1, n_cols), np.nan), panel])
+    windows = sliding_window_view(padded, d, axis=0)   # (T, N, d) 视图，不复制
+    result = np.full(panel.shape, np.nan)
+    chunk = max(1, DIRECT_CHUNK_ELEMENTS // (d * n_cols))
+    for start in range(0, n_rows, chunk):
+        window = windows[start:start + chunk]
+        current = panel[start:start + chunk, :, None]
+        less = (window < current).sum(axis=2)
+        equal = (window == current).sum(axis=2)   # 含当前值本身
+        count = (~np.isnan(window)).sum(axis=2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[start:start + chunk] = (less + 0.5 * (equal - 1)) / (count - 1)
+    result[~valid] = np.nan
+    return result
+
+
+def _window_ranks_fenwick(panel, valid, d):
+    """O(n·log T)：每只股票一棵树状数组，按行向量化增删"""
+    n_rows, n_cols = panel.shape
+    positions = _dense_positions(panel, valid)
+
+    # 每只股票一棵树状数组，计数不超过 d；下标 0 作为无效位置的占位
+    count_dtype = np.int16 if d < np.iinfo(np.int16).max else np.int32
+    tree = np.zeros((n_cols, n_rows + 1), dtype=count_dtype)
+    cols = np.arange(n_cols)
+    levels = int(n_rows).bit_length() + 1
+
+    def update(pos, delta):
+        idx = pos.copy()
+        for _ in range(levels):
+            tree[cols, idx] += delta
+            idx += idx & -idx
+            idx[idx > n_rows] = 0
+        tree[:, 0] = 0
+
+    def prefix(pos):
+        idx = np.maximum(pos, 0)
+        acc = np.zeros(n_cols, dtype=np.int64)
+        for _ in range(levels):
+            acc += tree[cols, idx]
+            idx -= idx & -idx
+        return acc
+
+    window_count = np.zeros(n_cols, dtype=np.int64)
+    result = np.full(panel.shape, np.nan)
+
+    for t in range(n_rows):
+        update(positions[t], 1)
+        window_count += valid[t]
+        if t >= d:
+            update(positions[t - d], -1)
+            window_count -= valid[t - d]
+
+        pos = positions[t]
+        less = prefix(pos - 1)
+        equal = prefix(pos) - less
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rank = (less + 0.5 * (equal - 1)) / (window_count - 1)
+        result[t] = np.where(valid[t], rank, np.nan)
+    return result
+
+
+def ts_rank(x, d, constant=0.0, nan_handling='ON'):
+    """当前值在过去 d 天中的排名，缩放到 [0, 1] 后加上 constant
+
+    相同值取平均排名；窗口内有效值少于 2 个时为 NaN。
+    窗口较短时直接比较更快，较长时用树状数组（见 TS_RANK_DIRECT_MAX_WINDOW）。
+    """
+    d = _check_args(d, nan_handling)
+    panel, squeeze = _as_panel(x)
+    valid = ~np.isnan(panel)
+    if d <= TS_RANK_DIRECT_MAX_WINDOW:
+        result = _window_ranks_direct(panel, valid, d)
+    else:
+        result = _window_ranks_fenwick(panel, valid, d)
+
+    valid_count, nan_count = _nan_counts(valid, d)
+    result = _finalize(result, valid_count, nan_count, d, nan_handling, min_valid=2)
+    return _restore(result + constant, squeeze)